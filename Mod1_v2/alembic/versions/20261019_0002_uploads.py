@@ -0,0 +1,26 @@
+from __future__ import annotations
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019_0002"
+down_revision = "20250905_0001"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "uploads",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("session_id", sa.String(), nullable=False, index=True),
+        sa.Column("lang", sa.String(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("total_bytes", sa.Integer(), nullable=False),
+        sa.Column("sha256", sa.String(), nullable=False),
+        sa.Column("ranges_json", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+def downgrade() -> None:
+    op.drop_table("uploads")
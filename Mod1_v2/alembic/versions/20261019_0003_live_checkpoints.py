@@ -0,0 +1,26 @@
+from __future__ import annotations
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019_0003"
+down_revision = "20261019_0002"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "live_checkpoints",
+        sa.Column("session_id", sa.String(), sa.ForeignKey("sessions.id"), primary_key=True),
+        sa.Column("tmp_path", sa.String(), nullable=False),
+        sa.Column("lang", sa.String(), nullable=False),
+        sa.Column("tier", sa.String(), nullable=False),
+        sa.Column("emitted_seq", sa.Integer(), nullable=False),
+        sa.Column("emitted_sentences", sa.Integer(), nullable=False),
+        sa.Column("full_text", sa.Text(), nullable=False),
+        sa.Column("audio_offset_sec", sa.Float(), nullable=False),
+        sa.Column("received_bytes", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+def downgrade() -> None:
+    op.drop_table("live_checkpoints")
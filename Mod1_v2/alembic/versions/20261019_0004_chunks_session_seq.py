@@ -0,0 +1,13 @@
+from __future__ import annotations
+from alembic import op
+
+revision = "20261019_0004"
+down_revision = "20261019_0003"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index("ix_chunks_session_seq", "chunks", ["session_id", "seq"])
+
+def downgrade() -> None:
+    op.drop_index("ix_chunks_session_seq", table_name="chunks")
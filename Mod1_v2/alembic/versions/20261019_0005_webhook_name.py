@@ -0,0 +1,18 @@
+from __future__ import annotations
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019_0005"
+down_revision = "20261019_0004"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    with op.batch_alter_table("webhooks") as b:
+        b.add_column(sa.Column("name", sa.String(), nullable=False, server_default="module2"))
+    op.create_index("ix_webhooks_name", "webhooks", ["name"])
+
+def downgrade() -> None:
+    op.drop_index("ix_webhooks_name", table_name="webhooks")
+    with op.batch_alter_table("webhooks") as b:
+        b.drop_column("name")
@@ -7,6 +7,15 @@ from typing import Literal
 class LimitCfg(BaseSettings):
     max_duration_sec: int = 900
     max_file_mb: int = 25
+    # квоты допуска (0 — без ограничения)
+    max_sessions: int = 20
+    max_asr_seconds: int = 3600
+    max_queued: int = 10
+
+class AdmissionCfg(BaseSettings):
+    enabled: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    audio_bytes_per_sec: int = 16000  # оценка длительности файла по размеру (~128 кбит/с)
+    default_rtf: float = 0.5          # пока нет замеров RTF
 
 class WhisperCfg(BaseSettings):
     model: str = Field(default=os.getenv("WHISPER_MODEL", "small"))
@@ -15,6 +24,14 @@ class WhisperCfg(BaseSettings):
     language: str = "ru"
     vad_filter: bool = True
     temperature: float = 0.0
+    num_workers: int = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+    cpu_threads: int = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0 — решает ctranslate2
+    beam_size: int = int(os.getenv("WHISPER_BEAM_SIZE", "5"))
+    batch_size: int = int(os.getenv("WHISPER_BATCH_SIZE", "1"))  # >1 — BatchedInferencePipeline, если доступен
+    # результат автотюнинга (app/services/autotune.py) поверх значений выше
+    tuned_path: str = os.getenv("WHISPER_TUNED_PATH", "./data/asr_tuned.json")
+    autotune_on_start: bool = os.getenv("WHISPER_AUTOTUNE_ON_START", "false").lower() == "true"
+    autotune_clip: str = os.getenv("WHISPER_AUTOTUNE_CLIP", "./assets/reference_ru.wav")
 
 class ChunkingCfg(BaseSettings):
     sent_min: int = Field(default=int(os.getenv("CHUNK_SENT_MIN", 3)))
@@ -22,6 +39,41 @@ class ChunkingCfg(BaseSettings):
     char_limit: int = Field(default=int(os.getenv("CHUNK_CHAR_LIMIT", 1200)))
     overlap_sent: int = Field(default=int(os.getenv("OVERLAP_SENT", 1)))
 
+class SchedulerCfg(BaseSettings):
+    # веса WFQ по тарифам и строгие классы приоритета (меньше — раньше)
+    tier_weights: dict[str, float] = {"Basic": 1.0, "Extended": 2.0, "Premium": 4.0}
+    tier_priority: dict[str, int] = {"Basic": 0, "Extended": 0, "Premium": 0}
+    stats_window: int = 1000
+
+class CadenceCfg(BaseSettings):
+    # адаптивный интервал/окно обработки живых сессий в зависимости от нагрузки ASR
+    enabled: bool = os.getenv("CADENCE_ENABLED", "true").lower() == "true"
+    min_interval_ms: int = 600
+    max_interval_ms: int = 6000
+    min_window_bytes: int = 0
+    max_window_bytes: int = 256 * 1024
+    queue_high: int = 4
+    rtf_high: float = 1.0
+    rtf_alpha: float = 0.2
+
+class ArchiveCfg(BaseSettings):
+    # перенос закрытых сессий из SQLite в сжатые append-only сегменты
+    dir: str = os.getenv("ARCHIVE_DIR", "./data/archive")
+    min_age_sec: int = int(os.getenv("ARCHIVE_MIN_AGE_SEC", str(7 * 24 * 3600)))
+    interval_sec: int = int(os.getenv("ARCHIVE_INTERVAL_SEC", "3600"))  # 0 — только вручную
+    batch_size: int = 100
+    segment_max_bytes: int = 64 * 1024 * 1024
+    compress_level: int = 6
+
+def _api_keys(raw: str) -> dict[str, str]:
+    """API_KEYS="ключ:Тариф,ключ2:Тариф" -> {ключ: тариф}"""
+    out: dict[str, str] = {}
+    for item in raw.split(","):
+        key, _, tier = item.strip().rpartition(":")
+        if key and tier:
+            out[key] = tier
+    return out
+
 class AppCfg(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8080
@@ -29,19 +81,29 @@ class AppCfg(BaseSettings):
     save_raw_audio: bool = os.getenv("SAVE_RAW_AUDIO", "false").lower() == "true"
     emit_partial: bool = os.getenv("EMIT_PARTIAL", "true").lower() == "true"
     webhook_url: str | None = os.getenv("WEBHOOK_URL") or None
-    tier: Literal['Basic','Extended','Premium'] = os.getenv("TIER", "Basic")
+    webhook_queue_size: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+    webhook_registry_ttl_sec: float = float(os.getenv("WEBHOOK_REGISTRY_TTL_SEC", "5"))  # как быстро воркеры видят чужой /v1/hook
+    tier: Literal['Basic','Extended','Premium'] = os.getenv("TIER", "Basic")  # тариф запросов без API-ключа
+    api_keys: dict[str, str] = _api_keys(os.getenv("API_KEYS", ""))  # API-ключ -> тариф (app/services/tiers.py)
     stub_asr: bool = os.getenv("STUB_ASR", "false").lower() == "true"
     ws_debounce_ms: int = int(os.getenv("WS_DEBOUNCE_MS", "1200"))
+    ws_resume_grace_sec: int = int(os.getenv("WS_RESUME_GRACE_SEC", "30"))
+    upload_dir: str = os.getenv("UPLOAD_DIR", "./data/uploads")
+    batch_root: str | None = os.getenv("BATCH_ROOT") or None
 
 class Settings(BaseSettings):
     db_url: str = os.getenv("DB_URL", "sqlite:///./data/asr.db")
     app: AppCfg = AppCfg()
     whisper: WhisperCfg = WhisperCfg()
     chunking: ChunkingCfg = ChunkingCfg()
+    scheduler: SchedulerCfg = SchedulerCfg()
+    cadence: CadenceCfg = CadenceCfg()
+    archive: ArchiveCfg = ArchiveCfg()
+    admission: AdmissionCfg = AdmissionCfg()
     limits: dict[str, LimitCfg] = {
         "Basic": LimitCfg(),
-        "Extended": LimitCfg(max_duration_sec=3600, max_file_mb=200),
-        "Premium": LimitCfg(max_duration_sec=14400, max_file_mb=2048),
+        "Extended": LimitCfg(max_duration_sec=3600, max_file_mb=200, max_sessions=100, max_asr_seconds=14400, max_queued=50),
+        "Premium": LimitCfg(max_duration_sec=14400, max_file_mb=2048, max_sessions=500, max_asr_seconds=57600, max_queued=200),
     }
 
     @staticmethod
@@ -59,11 +121,39 @@ class Settings(BaseSettings):
             if 'chunking' in data:
                 for k, v in data['chunking'].items():
                     setattr(s.chunking, k, v)
+            if 'scheduler' in data:
+                for k, v in data['scheduler'].items():
+                    setattr(s.scheduler, k, v)
+            if 'cadence' in data:
+                for k, v in data['cadence'].items():
+                    setattr(s.cadence, k, v)
+            if 'archive' in data:
+                for k, v in data['archive'].items():
+                    setattr(s.archive, k, v)
+            if 'admission' in data:
+                for k, v in data['admission'].items():
+                    setattr(s.admission, k, v)
             if 'limits' in data:
                 for tier, vals in data['limits'].items():
                     s.limits[tier] = LimitCfg(**vals)
             return s
         return Settings()
 
+TUNED_KEYS = ("compute_type", "cpu_threads", "num_workers", "beam_size", "batch_size")
+
+def apply_tuned(s: Settings) -> bool:
+    """Подмешивает сохранённый автотюнингом профиль faster-whisper, если он есть."""
+    path = s.whisper.tuned_path
+    if not path or not os.path.exists(path):
+        return False
+    import json
+    with open(path, 'r', encoding='utf-8') as f:
+        tuned = (json.load(f) or {}).get("whisper", {})
+    for k in TUNED_KEYS:
+        if k in tuned:
+            setattr(s.whisper, k, tuned[k])
+    return True
+
 CONFIG_FILE = os.getenv("CONFIG_FILE")
-settings = Settings.from_yaml(CONFIG_FILE)
\ No newline at end of file
+settings = Settings.from_yaml(CONFIG_FILE)
+apply_tuned(settings)
\ No newline at end of file
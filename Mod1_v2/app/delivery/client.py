@@ -1,6 +1,7 @@
 import os, json, time, random, hmac, hashlib
 import httpx
-from typing import Dict, Any, Optional
+from typing import Awaitable, Callable, Dict, Any, Optional
+from .governor import governor_for, CircuitOpen
 
 CHUNK_URL = os.getenv("MODULE2_WEBHOOK_CHUNK_URL", "http://module2:8000/v2/ingest/chunk")
 FINAL_URL = os.getenv("MODULE2_WEBHOOK_FINAL_URL", "http://module2:8000/v2/ingest/full")
@@ -23,23 +24,47 @@ async def _post_json(url: str, payload: Dict[str, Any], idem_key: str) -> httpx.
     async with httpx.AsyncClient(timeout=10) as client:
         return await client.post(url, content=body, headers=headers)
 
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    try:
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
 async def _deliver_with_retries(url: str, payload: Dict[str, Any], idem_key: str):
+    return await deliver_governed(url, lambda: _post_json(url, payload, idem_key))
+
+async def deliver_governed(url: str, send: Callable[[], Awaitable[httpx.Response]]):
+    """Повторы с backoff через общий на URL регулятор; send() делает один запрос."""
+    # общий на URL регулятор: лимит параллельных запросов и предохранитель для всех сессий
+    # и всех отправителей (доставка /v1/transcribe и рассылка подписчикам) сразу
+    gov = governor_for(url)
     for attempt in range(RETRIES + 1):
+        backoff = (BACKOFF_BASE_MS / 1000.0) * (2 ** attempt) + random.uniform(0, 0.5)
         try:
-            resp = await _post_json(url, payload, idem_key)
-            if resp.status_code >= 500:
-                raise RuntimeError(f"server_{resp.status_code}")
-            if resp.status_code == 429:
-                delay = (BACKOFF_BASE_MS / 1000.0) * (2 ** attempt) + random.uniform(0, 0.5)
-                await _sleep(delay * 2)
-                continue
-            if 400 <= resp.status_code < 500:
-                return resp
-            return resp
+            async with gov.slot():
+                t0 = time.perf_counter()
+                try:
+                    resp = await send()
+                except Exception:
+                    # таймаут/сетевые
+                    gov.record((time.perf_counter() - t0) * 1000.0, None)
+                    raise
+                gov.record((time.perf_counter() - t0) * 1000.0, resp.status_code,
+                           _retry_after(resp) if resp.status_code in (429, 503) else None)
+        except CircuitOpen as e:
+            # получатель перегружен: ждём окончания паузы предохранителя, не добавляя нагрузки
+            if attempt < RETRIES:
+                await _sleep(max(e.retry_in, backoff))
+            continue
         except Exception:
-            # таймаут/сетевые/5xx
-            delay = (BACKOFF_BASE_MS / 1000.0) * (2 ** attempt) + random.uniform(0, 0.5)
-            await _sleep(delay)
+            if attempt < RETRIES:
+                await _sleep(backoff)
+            continue
+        if resp.status_code == 429 or resp.status_code >= 500:
+            if attempt < RETRIES:
+                await _sleep(backoff * 2 if resp.status_code == 429 else backoff)
+            continue
+        return resp
     class _Fail:
         status_code = 503
         text = "delivery failed after retries"
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import asyncio, os, time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+MIN_INFLIGHT = int(os.getenv("DELIVERY_MIN_INFLIGHT", "1"))
+MAX_INFLIGHT = int(os.getenv("DELIVERY_MAX_INFLIGHT", "32"))
+INITIAL_INFLIGHT = int(os.getenv("DELIVERY_INITIAL_INFLIGHT", "4"))
+LATENCY_TARGET_MS = float(os.getenv("DELIVERY_LATENCY_TARGET_MS", "1000"))
+BREAKER_FAILURES = int(os.getenv("DELIVERY_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_SEC = float(os.getenv("DELIVERY_BREAKER_COOLDOWN_SEC", "10"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_in: float) -> None:
+        super().__init__(f"circuit open, retry in {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+
+class DeliveryGovernor:
+    """
+    Общий для всех сессий регулятор доставки на один URL.
+    Лимит одновременных запросов меняется по AIMD: +1/limit на каждый быстрый успех,
+    ×0.5 на 429/5xx/ошибку сети или при задержке выше цели (не чаще раза за окно задержки).
+    BREAKER_FAILURES неудач подряд открывают предохранитель на cooldown (или Retry-After),
+    затем один пробный запрос (half-open) решает — закрыть или открыть снова.
+    """
+
+    def __init__(self, url: str, clock: Callable[[], float] = time.monotonic) -> None:
+        self.url = url
+        self.clock = clock
+        self.limit = float(max(MIN_INFLIGHT, min(MAX_INFLIGHT, INITIAL_INFLIGHT)))
+        self.inflight = 0
+        self.latency_ms = 0.0
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.counters = {"ok": 0, "throttled": 0, "errors": 0, "rejected": 0}
+
+    def _check_breaker(self) -> None:
+        if self.state == OPEN:
+            now = self.clock()
+            if now < self.opened_until:
+                self.counters["rejected"] += 1
+                raise CircuitOpen(self.opened_until - now)
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and self.inflight > 0:
+            # пробный запрос уже в полёте
+            self.counters["rejected"] += 1
+            raise CircuitOpen(max(self.latency_ms / 1000.0, 0.1))
+
+    def _capacity(self) -> int:
+        return 1 if self.state == HALF_OPEN else int(self.limit)
+
+    async def acquire(self) -> None:
+        self._check_breaker()
+        while self.inflight >= self._capacity():
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+                elif not fut.cancelled():
+                    self._wake()  # нас уже разбудили — передаём место следующему
+                raise
+            try:
+                self._check_breaker()
+            except CircuitOpen:
+                self._wake()
+                raise
+        self.inflight += 1
+
+    def _wake(self, all_: bool = False) -> None:
+        while self._waiters and (all_ or self.inflight < self._capacity()):
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                if not all_:
+                    break
+
+    def release(self) -> None:
+        self.inflight -= 1
+        self._wake()
+
+    def _decrease(self) -> None:
+        now = self.clock()
+        window = max(self.latency_ms / 1000.0, 0.05)
+        if now - self._last_decrease >= window:
+            self.limit = max(float(MIN_INFLIGHT), self.limit * 0.5)
+            self._last_decrease = now
+
+    def _open(self, cooldown: float) -> None:
+        self.state = OPEN
+        self.opened_until = self.clock() + cooldown
+        self._wake(all_=True)  # ожидающие сразу получают CircuitOpen, а не висят до cooldown
+
+    def record(self, latency_ms: Optional[float], status: Optional[int], retry_after: Optional[float] = None) -> None:
+        """Итог одного запроса: status=None — таймаут/сетевая ошибка."""
+        if latency_ms is not None:
+            self.latency_ms = latency_ms if self.latency_ms == 0.0 else 0.8 * self.latency_ms + 0.2 * latency_ms
+        failed = status is None or status == 429 or status >= 500
+        if not failed:
+            self.counters["ok"] += 1
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                # пробный запрос прошёл — начинаем разгон заново с минимума
+                self.state = CLOSED
+                self.limit = float(MIN_INFLIGHT)
+                return
+            if latency_ms is not None and latency_ms > LATENCY_TARGET_MS:
+                self._decrease()
+            else:
+                self.limit = min(float(MAX_INFLIGHT), self.limit + 1.0 / self.limit)
+            return
+        self.counters["throttled" if status == 429 else "errors"] += 1
+        self.failures += 1
+        self._decrease()
+        if self.state == HALF_OPEN or self.failures >= BREAKER_FAILURES:
+            self._open(max(BREAKER_COOLDOWN_SEC, retry_after or 0.0))
+        elif retry_after:
+            self._open(retry_after)  # сервер сам попросил паузу — ждём все, а не каждый чанк отдельно
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "waiting": len(self._waiters),
+            "latency_ms_ewma": round(self.latency_ms, 1),
+            "consecutive_failures": self.failures,
+            "retry_in_sec": round(max(0.0, self.opened_until - self.clock()), 1) if self.state == OPEN else 0.0,
+            **self.counters,
+        }
+
+
+GOVERNORS: Dict[str, DeliveryGovernor] = {}
+
+
+def governor_for(url: str) -> DeliveryGovernor:
+    gov = GOVERNORS.get(url)
+    if gov is None:
+        gov = GOVERNORS[url] = DeliveryGovernor(url)
+    return gov
+
+
+def stats() -> Dict[str, Any]:
+    return {url: gov.stats() for url, gov in GOVERNORS.items()}
@@ -1,11 +1,22 @@
 from __future__ import annotations
+import asyncio
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from .utils.logging import setup_json_logging
 from .db import init_db
-from .config import settings
-from .routers import health, hooks, transcribe, stream, session
+from .config import settings, apply_tuned
+from .services.autotune import ensure_tuned
+from .services.scheduler import SCHEDULER
+
+# автотюнинг должен отработать до создания движка ASR (импорт роутеров); планировщик
+# к этому моменту уже создан (его импортирует и сам бенчмарк) — подгоняем число потоков
+if settings.whisper.autotune_on_start and ensure_tuned():
+    apply_tuned(settings)
+    SCHEDULER.resize(settings.whisper.num_workers)
+
+from .routers import health, hooks, transcribe, stream, session, uploads
+from .services.archive import archive_loop
 
 setup_json_logging(settings.app.log_level)
 init_db()
@@ -21,9 +32,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def _startup():
+    if settings.archive.interval_sec > 0:
+        asyncio.create_task(archive_loop())
+
 app.include_router(health.router)
 app.include_router(hooks.router)
 app.include_router(transcribe.router)
+app.include_router(uploads.router)
 app.include_router(session.router)
 app.include_router(stream.router)
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import uuid
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class SessionModel(SQLModel, table=True):
@@ -25,6 +26,7 @@ class TranscriptModel(SQLModel, table=True):
 
 class ChunkModel(SQLModel, table=True):
     __tablename__ = "chunks"
+    __table_args__ = (Index("ix_chunks_session_seq", "session_id", "seq"),)
     id: str = Field(primary_key=True, default_factory=lambda: str(uuid.uuid4()))
     session_id: str = Field(foreign_key="sessions.id", index=True)
     chunk_id: str = Field(index=True)
@@ -40,7 +42,34 @@ class ChunkModel(SQLModel, table=True):
 class WebhookModel(SQLModel, table=True):
     __tablename__ = "webhooks"
     id: str = Field(primary_key=True, default_factory=lambda: str(uuid.uuid4()))
+    name: str = Field(default="module2", index=True)
     url: str
     secret: str
     active: bool = True
-    created_at: datetime = Field(default_factory=lambda: datetime.utcnow())
\ No newline at end of file
+    created_at: datetime = Field(default_factory=lambda: datetime.utcnow())
+
+class UploadModel(SQLModel, table=True):
+    __tablename__ = "uploads"
+    id: str = Field(primary_key=True, default_factory=lambda: uuid.uuid4().hex)
+    session_id: str = Field(index=True)
+    lang: str = Field(default="ru-RU")
+    filename: str = ""
+    total_bytes: int
+    sha256: str = ""
+    ranges_json: str = "[]"
+    status: str = Field(default="open")
+    created_at: datetime = Field(default_factory=lambda: datetime.utcnow())
+    updated_at: datetime = Field(default_factory=lambda: datetime.utcnow())
+
+class LiveCheckpointModel(SQLModel, table=True):
+    __tablename__ = "live_checkpoints"
+    session_id: str = Field(primary_key=True, foreign_key="sessions.id")
+    tmp_path: str
+    lang: str = "ru-RU"
+    tier: str = "Basic"
+    emitted_seq: int = 0
+    emitted_sentences: int = 0
+    full_text: str = ""
+    audio_offset_sec: float = 0.0
+    received_bytes: int = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.utcnow())
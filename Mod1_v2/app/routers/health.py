@@ -2,6 +2,10 @@ from __future__ import annotations
 from fastapi import APIRouter
 import os
 from datetime import datetime
+from ..services.scheduler import SCHEDULER
+from ..services.cadence import CADENCE
+from ..services.admission import ADMISSION
+from ..delivery import governor as delivery_governor
 
 router = APIRouter()
 
@@ -20,4 +24,15 @@ async def healthz():
         "host": host,
         "port": port,
         "timestamp": datetime.utcnow().isoformat()
-    }
\ No newline at end of file
+    }
+
+@router.get("/v1/metrics/asr")
+async def asr_metrics():
+    """Состояние планировщика ASR: глубина очереди и ожидание по тарифам (для SLO)"""
+    return {**SCHEDULER.stats(), "cadence": CADENCE.stats(), "admission": ADMISSION.stats()}
+
+
+@router.get("/v1/metrics/delivery")
+async def delivery_metrics():
+    """Состояние регуляторов доставки в Mod2 по URL: лимит, задержка, предохранитель"""
+    return delivery_governor.stats()
@@ -1,7 +1,7 @@
 from __future__ import annotations
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from ..services.webhooks import set_webhook
+from ..services.webhooks import set_webhook, delete_webhook, REGISTRY, FANOUT
 
 router = APIRouter(prefix="/v1/hook")
 
@@ -9,7 +9,19 @@ class HookIn(BaseModel):
     url: str
     secret: str
 
-@router.post("/module2")
-async def register_hook(body: HookIn):
-    wh = await set_webhook(body.url, body.secret)
-    return {"url": wh.url, "active": wh.active}
\ No newline at end of file
+@router.get("")
+async def list_hooks():
+    stats = FANOUT.stats()
+    return [{"name": h.name, "url": h.url, "active": h.active, "delivery": stats.get(h.name)} for h in REGISTRY.active()]
+
+@router.post("/{name}")
+async def register_hook(name: str, body: HookIn):
+    """Создать или обновить подписку; /v1/hook/module2 — основной приёмник Mod2."""
+    wh = await set_webhook(body.url, body.secret, name=name)
+    return {"name": wh.name, "url": wh.url, "active": wh.active}
+
+@router.delete("/{name}")
+async def remove_hook(name: str):
+    if not await delete_webhook(name):
+        raise HTTPException(404, "not found")
+    return {"name": name, "active": False}
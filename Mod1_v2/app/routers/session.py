@@ -1,34 +1,162 @@
 from __future__ import annotations
-from fastapi import APIRouter, HTTPException
+import base64, hashlib, json
+from typing import Iterator
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlmodel import select
 from ..db import get_session
 from ..models import TranscriptModel, ChunkModel
+from ..services.archive import ARCHIVE
 
 router = APIRouter(prefix="/v1/session")
 
+NDJSON = "application/x-ndjson"
+TEXT_PIECE = 64 * 1024
+
+
+def _chunk_out(it: ChunkModel) -> dict:
+    return {
+        "session_id": it.session_id,
+        "chunk_id": it.chunk_id,
+        "seq": it.seq,
+        "text": it.text,
+        "overlap_prefix": it.overlap_prefix,
+        "lang": it.lang,
+        "policy": it.policy_json,
+        "hash": it.hash,
+        "created_at": it.created_at.isoformat() + "Z"
+    }
+
+
+def _encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"s": seq}).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return int(json.loads(raw)["s"])
+    except Exception:
+        raise HTTPException(400, "bad cursor")
+
+
+def _etag(*parts) -> str:
+    return 'W/"' + hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest() + '"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    return bool(inm) and etag in [t.strip() for t in inm.split(",")]
+
+
+def _wants_ndjson(request: Request, fmt: str | None) -> bool:
+    return fmt == "ndjson" or NDJSON in request.headers.get("accept", "")
+
+
+def _page_headers(request: Request, headers: dict, items: list, limit: int | None, seq) -> list:
+    if limit and len(items) > limit:
+        items = items[:limit]
+        nxt = _encode_cursor(seq(items[-1]))
+        headers["X-Next-Cursor"] = nxt
+        headers["Link"] = f'<{request.url.path}?cursor={nxt}&limit={limit}>; rel="next"'
+    return items
+
+
+def _archived_chunks(sid: str, request: Request, after: int, limit: int | None, fmt: str | None) -> Response:
+    """Те же семантики выборки, но по записи из холодного архива (целиком в памяти)."""
+    rec = ARCHIVE.load(sid) or {"chunks": []}
+    items = [c for c in rec["chunks"] if c["seq"] > after]
+    etag = _etag(sid, after, limit, len(items), items[-1]["seq"] if items else None, "archive")
+    headers = {"ETag": etag}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    items = [{k: v for k, v in c.items() if k != "delivered_at"} for c in items]
+    if _wants_ndjson(request, fmt):
+        rows = items[:limit] if limit else items
+        return StreamingResponse((json.dumps(c, ensure_ascii=False) + "\n" for c in rows), media_type=NDJSON, headers=headers)
+    items = _page_headers(request, headers, items, limit, lambda c: c["seq"])
+    return Response(content=json.dumps(items, ensure_ascii=False), media_type="application/json", headers=headers)
+
+
 @router.get("/{sid}/text")
-async def get_text(sid: str):
+async def get_text(
+    sid: str,
+    request: Request,
+    offset: int = Query(0, ge=0, description="Вернуть текст начиная с этого символа"),
+    format: str | None = Query(None, description="text — потоковая отдача text/plain"),
+):
     with get_session() as s:
         tr = s.exec(select(TranscriptModel).where(TranscriptModel.session_id == sid)).first()
-        if not tr:
+    if tr:
+        tid, text_full, lang = tr.id, tr.text_full, tr.lang
+    else:
+        # сессия могла уехать в холодный архив
+        rec = ARCHIVE.load(sid)
+        if not rec or not rec["transcripts"]:
             raise HTTPException(404, "not found")
-        return {"session_id": sid, "text_full": tr.text_full, "lang": tr.lang}
+        t = rec["transcripts"][0]
+        tid, text_full, lang = t["id"], t["text_full"], t["lang"]
+    etag = _etag(tid, len(text_full), offset, format)
+    headers = {"ETag": etag}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    text = text_full[offset:]
+    if format == "text":
+        def _pieces() -> Iterator[str]:
+            for i in range(0, len(text), TEXT_PIECE):
+                yield text[i:i + TEXT_PIECE]
+        return StreamingResponse(_pieces(), media_type="text/plain; charset=utf-8", headers=headers)
+    return Response(
+        content=json.dumps({"session_id": sid, "text_full": text, "lang": lang, "offset": offset, "length": len(text_full)}, ensure_ascii=False),
+        media_type="application/json",
+        headers=headers,
+    )
+
 
 @router.get("/{sid}/chunks")
-async def get_chunks(sid: str):
+async def get_chunks(
+    sid: str,
+    request: Request,
+    after_seq: int | None = Query(None, description="Только чанки с seq > after_seq"),
+    cursor: str | None = Query(None, description="Непрозрачный курсор из X-Next-Cursor"),
+    limit: int | None = Query(None, ge=1, le=1000),
+    format: str | None = Query(None, description="ndjson — потоковая отдача по строке на чанк"),
+):
+    """
+    Список чанков по seq. Без параметров — весь список, как раньше.
+    after_seq/cursor + limit — постраничная и инкрементальная выборка, следующий курсор
+    в заголовках X-Next-Cursor и Link. ETag/If-None-Match — 304, если новых чанков нет.
+    """
+    after = _decode_cursor(cursor) if cursor else (after_seq if after_seq is not None else -1)
+    cond = (ChunkModel.session_id == sid) & (ChunkModel.seq > after)
+    with get_session() as s:
+        count, max_seq = s.exec(select(func.count(ChunkModel.id), func.max(ChunkModel.seq)).where(cond)).one()
+    if not count and ARCHIVE.contains(sid):
+        return _archived_chunks(sid, request, after, limit, format)
+    etag = _etag(sid, after, limit, count, max_seq)
+    headers = {"ETag": etag}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if _wants_ndjson(request, format):
+        def _rows() -> Iterator[str]:
+            with get_session() as s:
+                q = select(ChunkModel).where(cond).order_by(ChunkModel.seq.asc())
+                if limit:
+                    q = q.limit(limit)
+                for it in s.exec(q.execution_options(yield_per=500)):
+                    yield json.dumps(_chunk_out(it), ensure_ascii=False) + "\n"
+        return StreamingResponse(_rows(), media_type=NDJSON, headers=headers)
+
     with get_session() as s:
-        items = s.exec(select(ChunkModel).where(ChunkModel.session_id == sid).order_by(ChunkModel.seq.asc())).all()
-        out = []
-        for it in items:
-            out.append({
-                "session_id": it.session_id,
-                "chunk_id": it.chunk_id,
-                "seq": it.seq,
-                "text": it.text,
-                "overlap_prefix": it.overlap_prefix,
-                "lang": it.lang,
-                "policy": it.policy_json,
-                "hash": it.hash,
-                "created_at": it.created_at.isoformat() + "Z"
-            })
-        return out
\ No newline at end of file
+        q = select(ChunkModel).where(cond).order_by(ChunkModel.seq.asc())
+        if limit:
+            q = q.limit(limit + 1)
+        items = s.exec(q).all()
+    items = _page_headers(request, headers, items, limit, lambda it: it.seq)
+    return Response(
+        content=json.dumps([_chunk_out(it) for it in items], ensure_ascii=False),
+        media_type="application/json",
+        headers=headers,
+    )
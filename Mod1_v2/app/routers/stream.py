@@ -1,7 +1,10 @@
 from __future__ import annotations
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 import json
+from ..config import settings
 from ..services.sessions import SESSION_MANAGER
+from ..services.admission import ADMISSION, Rejected
+from ..services.tiers import UnknownKey, resolve_tier
 
 router = APIRouter()
 
@@ -12,21 +15,64 @@ async def ws_stream(
     lang: str = Query("ru-RU"),
     emit_partial: bool = Query(True),
     chunking: str = Query("on"),
+    api_key: str | None = Query(None),
 ):
+    # тариф — по API-ключу (заголовок или api_key: браузерный WebSocket заголовки не шлёт)
+    try:
+        tier = resolve_tier(ws.headers.get("x-api-key") or api_key)
+    except UnknownKey as e:
+        await ws.close(code=1008, reason=str(e))
+        return
     await ws.accept()
-    await ws.send_text(json.dumps({"type": "hello", "session_id": session_id}))
+    if SESSION_MANAGER.is_closed(session_id):
+        # финализированную сессию не открываем заново: аудио дописывалось бы после final_full
+        await ws.send_text(json.dumps({"type": "error", "session_id": session_id, "message": "session is closed"}))
+        await ws.close(code=1008, reason="session is closed")
+        return
+    try:
+        ADMISSION.admit_session(session_id, tier)
+    except Rejected as e:
+        # 1013 Try Again Later: клиент переподключается не раньше retry_after
+        await ws.send_text(json.dumps({"type": "error", "session_id": session_id, **e.detail()}))
+        await ws.close(code=1013, reason=e.reason)
+        return
+    # resume: при переподключении с тем же session_id сообщаем, сколько байт уже принято,
+    # клиент досылает только недостающий хвост
+    state, resumed = await SESSION_MANAGER.attach(session_id, lang, tier)
+    await ws.send_text(json.dumps({
+        "type": "hello",
+        "session_id": session_id,
+        "resumed": resumed,
+        "offset": state.received_bytes,
+    }))
     try:
         while True:
             msg = await ws.receive()
+            if msg.get("type") == "websocket.disconnect":
+                raise WebSocketDisconnect(msg.get("code", 1000))
             if "bytes" in msg and msg["bytes"]:
-                await SESSION_MANAGER.append_audio(session_id, lang, msg["bytes"])
-                await ws.send_text(json.dumps({"type": "progress", "session_id": session_id}))
+                offset = await SESSION_MANAGER.append_audio(session_id, lang, msg["bytes"])
+                await ws.send_text(json.dumps({"type": "progress", "session_id": session_id, "offset": offset}))
             elif "text" in msg and msg["text"]:
                 try:
                     payload = json.loads(msg["text"])
                 except Exception:
                     payload = {"type": "text", "value": msg["text"]}
-                if payload.get("type") == "eos":
+                if payload.get("type") == "resume":
+                    # {"type": "resume", "offset": N} — смещение следующего бинарного кадра
+                    try:
+                        try:
+                            offset = int(payload.get("offset", 0))
+                        except (TypeError, ValueError):
+                            offset = -1
+                        if offset < 0:
+                            raise ValueError(f"invalid offset {payload.get('offset')!r}")
+                        expected = SESSION_MANAGER.seek(session_id, offset)
+                    except ValueError as e:
+                        await ws.send_text(json.dumps({"type": "error", "session_id": session_id, "message": str(e), "offset": state.received_bytes}))
+                        continue
+                    await ws.send_text(json.dumps({"type": "resumed", "session_id": session_id, "offset": expected}))
+                elif payload.get("type") == "eos":
                     final = await SESSION_MANAGER.close_session(session_id, lang)
                     await ws.send_text(json.dumps({"type": "final_full", "payload": final}, ensure_ascii=False))
                     await ws.close()
@@ -34,4 +80,4 @@ async def ws_stream(
             else:
                 pass
     except WebSocketDisconnect:
-        await SESSION_MANAGER.close_session(session_id, lang)
\ No newline at end of file
+        SESSION_MANAGER.detach(session_id, lang)
@@ -1,12 +1,17 @@
 from __future__ import annotations
-from fastapi import APIRouter, UploadFile, File, Query, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import tempfile, os
+import asyncio, json, tempfile, os
 import time
 import logging
+from datetime import datetime
 
-from ..services.asr import ASREngine
+from ..services.asr import transcribe_async
 from ..services.chunker import split_sentences, make_chunks
+from ..services.admission import ADMISSION, Rejected
+from ..services.scheduler import SCHEDULER
+from ..services.tiers import UnknownKey, resolve_tier
 from ..db import get_session
 from ..models import SessionModel, TranscriptModel, ChunkModel
 from ..config import settings
@@ -24,12 +29,42 @@ class BatchOut(BaseModel):
     chunks: list[dict]
 
 
+def request_tier(api_key: str | None = Header(default=None, alias="X-API-Key")) -> str:
+    """Тариф по API-ключу запроса (квоты, размер файла, вес в очереди ASR); клиент его не выбирает."""
+    try:
+        return resolve_tier(api_key)
+    except UnknownKey as e:
+        raise HTTPException(401, str(e))
+
+
 @router.post("/transcribe", response_model=BatchOut)
 async def transcribe(
+    response: Response,
     file: UploadFile = File(...),
     session_id: str = Query(default_factory=lambda: os.urandom(6).hex()),
     lang: str = Query(default="ru-RU"),
+    tier: str = Depends(request_tier),
 ):
+    try:
+        # очередь тарифа полна — отказываем до приёма тела
+        ADMISSION.check_job(tier)
+    except Rejected as e:
+        _over_capacity(e)
+    path, size = await _spool(file)
+    _check_size(path, size, tier)
+
+    def _queued(pos: int) -> None:
+        response.headers["X-Queue-Position"] = str(pos)
+    return await process_file(path, size, session_id, lang, tier=tier, on_queued=_queued)
+
+
+def _over_capacity(e: Rejected):
+    raise HTTPException(429, e.detail(), headers={"Retry-After": str(e.retry_after)})
+
+
+
+
+async def _spool(file: UploadFile) -> tuple[str, int]:
     size = 0
     with tempfile.NamedTemporaryFile(
         suffix=os.path.splitext(file.filename or "")[-1] or ".webm", delete=False
@@ -40,19 +75,37 @@ async def transcribe(
                 break
             f.write(chunk)
             size += len(chunk)
-        path = f.name
+        return f.name, size
 
-    limit_mb = settings.limits[settings.app.tier].max_file_mb
+
+def _check_size(path: str, size: int, tier: str) -> None:
+    limit_mb = settings.limits[tier].max_file_mb
     if size > limit_mb * 1024 * 1024:
         os.remove(path)
-        raise HTTPException(413, f"file too large for tier {settings.app.tier}")
+        raise HTTPException(413, f"file too large for tier {tier}")
+
 
+async def process_file(path: str, size: int, session_id: str, lang: str, remove: bool = True, tier: str | None = None,
+                       on_queued=None, bounded: bool = True) -> BatchOut:
+    """
+    ASR + чанкинг + сохранение + доставка в Модуль 2 для уже сохранённого на диск файла.
+    Файл удаляется после распознавания (если remove).
+    Сверх квоты тарифа по ASR-секундам ждёт в очереди допуска (on_queued(позиция)) или получает 429;
+    bounded=False — ждёт без отказа по max_queued (задачи пакета).
+    """
     # Start ASR processing with timing
+    tier = tier or settings.app.tier
     asr_start_time = time.time()
-    asr = ASREngine()
-    res = asr.transcribe_file(path)
+    try:
+        async with ADMISSION.job(tier, ADMISSION.estimate_sec(size, tier), on_queued, bounded=bounded):
+            # стоимость для справедливой очереди — размер файла в МБ
+            res = await transcribe_async(path, session_id, tier=tier, kind="batch", cost=max(size / (1024 * 1024), 1.0))
+    except Rejected as e:
+        _over_capacity(e)
+    finally:
+        if remove:
+            os.remove(path)
     asr_duration_ms = int((time.time() - asr_start_time) * 1000)
-    os.remove(path)
 
     # Log ASR processing details
     logger.info(f"ASR processing completed", extra={
@@ -74,8 +127,10 @@ async def transcribe(
     with get_session() as s:
         sess = s.get(SessionModel, session_id)
         if not sess:
-            sess = SessionModel(id=session_id, lang=lang, tier=settings.app.tier)
-            s.add(sess)
+            sess = SessionModel(id=session_id, lang=lang, tier=tier)
+        # файл разобран целиком — сессия закрыта и через archive.min_age_sec уйдёт в архив
+        sess.status, sess.ended_at = "closed", datetime.utcnow()
+        s.add(sess)
 
         tr = TranscriptModel(
             session_id=session_id,
@@ -168,3 +223,98 @@ async def transcribe(
             for c in chunks
         ],
     )
+
+
+def _manifest_items(manifest: str) -> list[dict]:
+    """
+    manifest: JSON-список путей или объектов {"path", "session_id"?, "lang"?}.
+    Пути разрешены только внутри settings.app.batch_root.
+    """
+    if not settings.app.batch_root:
+        raise HTTPException(400, "manifest paths are disabled (batch_root is not set)")
+    try:
+        raw = json.loads(manifest)
+    except ValueError:
+        raise HTTPException(400, "manifest must be JSON")
+    if not isinstance(raw, list):
+        raise HTTPException(400, "manifest must be a JSON list")
+    root = os.path.realpath(settings.app.batch_root)
+    items = []
+    for it in raw:
+        if isinstance(it, str):
+            it = {"path": it}
+        # запись — строка-путь или объект со строковыми полями; иначе 400, а не 500
+        if not isinstance(it, dict) or any(
+                it.get(k) is not None and not isinstance(it[k], str) for k in ("path", "session_id", "lang")):
+            raise HTTPException(400, f"bad manifest entry: {json.dumps(it, ensure_ascii=False)}")
+        path = os.path.realpath(os.path.join(root, it.get("path") or ""))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            raise HTTPException(400, f"bad manifest path: {it.get('path')}")
+        it["path"] = path
+        items.append(it)
+    return items
+
+
+@router.post("/transcribe/batch")
+async def transcribe_batch(
+    files: list[UploadFile] = File(default=[]),
+    manifest: str | None = Form(default=None),
+    lang: str = Query(default="ru-RU"),
+    tier: str = Depends(request_tier),
+):
+    """
+    Пакетное распознавание: много файлов или manifest путей на локальном диске.
+    Все задачи идут через общий экземпляр модели и пул ASR; результаты
+    отдаются NDJSON-строками по мере готовности (порядок — по завершению).
+    Пакет допускается целиком: 429 только если очередь тарифа уже полна, а его
+    файлы ждут здесь и занимают в очереди допуска не больше мест, чем потоков ASR.
+    """
+    try:
+        ADMISSION.check_job(tier)
+    except Rejected as e:
+        _over_capacity(e)
+    batch_id = os.urandom(4).hex()
+    jobs: list[dict] = []
+    for it in _manifest_items(manifest) if manifest else []:
+        jobs.append({"name": it["path"], "path": it["path"], "size": os.path.getsize(it["path"]), "remove": False,
+                     "session_id": it.get("session_id"), "lang": it.get("lang") or lang})
+    for f in files:
+        path, size = await _spool(f)
+        jobs.append({"name": f.filename, "path": path, "size": size, "remove": True, "session_id": None, "lang": lang})
+    if not jobs:
+        raise HTTPException(400, "no files")
+    limit = settings.limits[tier].max_file_mb * 1024 * 1024
+    for i, job in enumerate(jobs):
+        job["index"] = i
+        job["session_id"] = job["session_id"] or f"{batch_id}-{i}"
+        if job["size"] > limit:
+            job["error"] = f"file too large for tier {tier}"
+            if job["remove"]:
+                os.remove(job["path"])
+
+    slots = asyncio.Semaphore(max(1, SCHEDULER.workers))
+
+    async def _run(job: dict) -> dict:
+        out = {"index": job["index"], "file": job["name"], "session_id": job["session_id"]}
+        if "error" in job:
+            return {**out, "status": "error", "error": job["error"]}
+        try:
+            async with slots:
+                res = await process_file(job["path"], job["size"], job["session_id"], job["lang"],
+                                         remove=job["remove"], tier=tier, bounded=False)
+            return {**out, "status": "ok", "result": res.model_dump()}
+        except Exception as e:
+            logger.exception("batch item failed", extra={"session_id": job["session_id"]})
+            return {**out, "status": "error", "error": str(e)}
+
+    async def _stream():
+        t0 = time.time()
+        ok = 0
+        for fut in asyncio.as_completed([_run(j) for j in jobs]):
+            item = await fut
+            ok += item["status"] == "ok"
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+        yield json.dumps({"batch_id": batch_id, "status": "done", "total": len(jobs), "ok": ok,
+                          "elapsed_ms": int((time.time() - t0) * 1000)}) + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
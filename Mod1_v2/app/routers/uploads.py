@@ -0,0 +1,76 @@
+from __future__ import annotations
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from pydantic import BaseModel, Field
+import os
+
+from ..services import uploads
+from ..services.uploads import UploadError
+from .transcribe import BatchOut, process_file, request_tier
+
+router = APIRouter(prefix="/v1/uploads")
+
+
+class UploadIn(BaseModel):
+    size: int = Field(..., gt=0, description="Полный размер файла в байтах")
+    filename: str = ""
+    sha256: str = Field(default="", description="Сумма всего файла (hex), проверяется при финализации")
+    session_id: str = Field(default_factory=lambda: os.urandom(6).hex())
+    lang: str = "ru-RU"
+
+
+def _raise(e: UploadError):
+    raise HTTPException(e.status, e.message)
+
+
+@router.post("", status_code=201)
+async def create_upload(body: UploadIn, tier: str = Depends(request_tier)):
+    try:
+        up = uploads.create_upload(body.session_id, body.lang, body.filename, body.size, body.sha256, tier=tier)
+    except UploadError as e:
+        _raise(e)
+    return uploads.progress(up)
+
+
+@router.put("/{upload_id}")
+async def put_part(
+    upload_id: str,
+    request: Request,
+    content_range: str | None = Header(default=None, alias="Content-Range"),
+    content_sha256: str | None = Header(default=None, alias="X-Content-SHA256"),
+):
+    """Часть файла: Content-Range: bytes start-end/total, опционально X-Content-SHA256 части."""
+    try:
+        up = await uploads.write_part(upload_id, content_range, request.stream(), content_sha256)
+    except UploadError as e:
+        _raise(e)
+    return uploads.progress(up)
+
+
+@router.get("/{upload_id}")
+async def get_progress(upload_id: str):
+    try:
+        return uploads.progress(uploads.get_upload(upload_id))
+    except UploadError as e:
+        _raise(e)
+
+
+@router.post("/{upload_id}/complete", response_model=BatchOut)
+async def complete_upload(upload_id: str, tier: str = Depends(request_tier)):
+    async def _process(up):
+        # файл удаляет finalize_upload после успеха: при ошибке complete повторяют с тем же файлом
+        return await process_file(uploads.part_path(upload_id), up.total_bytes, up.session_id, up.lang,
+                                  remove=False, tier=tier)
+
+    try:
+        return await uploads.finalize_upload(upload_id, _process)
+    except UploadError as e:
+        _raise(e)
+
+
+@router.delete("/{upload_id}")
+async def abort_upload(upload_id: str):
+    try:
+        await uploads.abort_upload(upload_id)
+    except UploadError as e:
+        _raise(e)
+    return {"upload_id": upload_id, "status": "aborted"}
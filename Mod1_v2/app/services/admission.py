@@ -0,0 +1,174 @@
+from __future__ import annotations
+import asyncio, math
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Set
+
+from ..config import settings, LimitCfg
+from .cadence import CADENCE
+from .scheduler import SCHEDULER
+
+
+class Rejected(Exception):
+    """Тариф упёрся в квоту: быстрый отказ вместо ожидания в общей очереди."""
+
+    def __init__(self, tier: str, reason: str, retry_after: int, queued: int = 0) -> None:
+        super().__init__(f"{reason} for tier {tier}")
+        self.tier = tier
+        self.reason = reason
+        self.retry_after = retry_after
+        self.queued = queued
+
+    def detail(self) -> Dict[str, Any]:
+        return {"error": "over_capacity", "reason": self.reason, "tier": self.tier,
+                "retry_after": self.retry_after, "queued": self.queued}
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    asr_sec: float
+
+
+class _TierState:
+    def __init__(self) -> None:
+        self.sessions: Set[str] = set()
+        self.running_sec = 0.0
+        self.running_jobs = 0
+        self.waiters: Deque[_Waiter] = deque()
+        self.rejected = 0
+
+
+class AdmissionController:
+    """
+    Квоты тарифа (settings.limits, 0 — без ограничения):
+      max_sessions     — одновременные живые сессии (/v1/stream);
+      max_asr_seconds  — сумма оценочных секунд аудио в обработке (/v1/transcribe и др.);
+      max_queued       — сколько файловых задач может ждать своей очереди.
+    Сверх квоты — отказ сразу (429 / close 1013) с оценкой Retry-After,
+    а не рост задержки для всех пользователей.
+    """
+
+    def __init__(self) -> None:
+        self._tiers: Dict[str, _TierState] = {}
+        self._session_tier: Dict[str, str] = {}
+
+    def _t(self, tier: str) -> _TierState:
+        return self._tiers.setdefault(tier, _TierState())
+
+    @staticmethod
+    def _limits(tier: str) -> LimitCfg:
+        return settings.limits.get(tier) or LimitCfg()
+
+    def estimate_sec(self, size: int, tier: str) -> float:
+        """Оценка длительности по размеру файла; не больше max_duration_sec тарифа."""
+        sec = size / max(1, settings.admission.audio_bytes_per_sec)
+        return max(1.0, min(sec, float(self._limits(tier).max_duration_sec)))
+
+    def _retry_after(self, tier: str) -> int:
+        # сколько примерно займёт разбор уже принятой работы тарифа при текущем RTF
+        st = self._t(tier)
+        backlog = st.running_sec + sum(w.asr_sec for w in st.waiters)
+        rtf = CADENCE.stats()["rtf_ewma"] or settings.admission.default_rtf
+        return max(1, math.ceil(backlog * rtf / max(1, SCHEDULER.workers)))
+
+    def _reject(self, tier: str, reason: str) -> Rejected:
+        st = self._t(tier)
+        st.rejected += 1
+        return Rejected(tier, reason, self._retry_after(tier), len(st.waiters))
+
+    # --- живые сессии ---
+
+    def admit_session(self, session_id: str, tier: str) -> None:
+        if not settings.admission.enabled or session_id in self._session_tier:
+            return  # переподключение уже допущенной сессии
+        st = self._t(tier)
+        cap = self._limits(tier).max_sessions
+        if cap and len(st.sessions) >= cap:
+            raise self._reject(tier, "max_sessions")
+        st.sessions.add(session_id)
+        self._session_tier[session_id] = tier
+
+    def release_session(self, session_id: str) -> None:
+        tier = self._session_tier.pop(session_id, None)
+        if tier:
+            self._t(tier).sessions.discard(session_id)
+
+    # --- файловые задачи ---
+
+    def check_job(self, tier: str) -> None:
+        """Быстрая проверка до приёма тела запроса: очередь тарифа уже полна."""
+        if not settings.admission.enabled:
+            return
+        cap = self._limits(tier).max_queued
+        if cap and len(self._t(tier).waiters) >= cap:
+            raise self._reject(tier, "max_queued")
+
+    def _fits(self, tier: str, asr_sec: float) -> bool:
+        st = self._t(tier)
+        cap = self._limits(tier).max_asr_seconds
+        return not cap or st.running_jobs == 0 or st.running_sec + asr_sec <= cap
+
+    def _wake(self, tier: str) -> None:
+        st = self._t(tier)
+        # строго FIFO: большая задача в голове не обгоняется маленькими
+        while st.waiters and self._fits(tier, st.waiters[0].asr_sec):
+            w = st.waiters.popleft()
+            if w.future.done():
+                continue
+            st.running_sec += w.asr_sec
+            st.running_jobs += 1
+            w.future.set_result(None)
+
+    @asynccontextmanager
+    async def job(self, tier: str, asr_sec: float, on_queued: Optional[Callable[[int], None]] = None,
+                  bounded: bool = True) -> AsyncIterator[None]:
+        """bounded=False — задача пакета: ждёт и сверх max_queued (пакет сам держит в очереди не больше пула ASR)."""
+        if not settings.admission.enabled:
+            yield
+            return
+        st = self._t(tier)
+        cap_sec = self._limits(tier).max_asr_seconds
+        asr_sec = min(asr_sec, float(cap_sec)) if cap_sec else asr_sec
+        if not st.waiters and self._fits(tier, asr_sec):
+            st.running_sec += asr_sec
+            st.running_jobs += 1
+        else:
+            cap = self._limits(tier).max_queued
+            if bounded and cap and len(st.waiters) >= cap:
+                raise self._reject(tier, "max_queued")
+            w = _Waiter(asyncio.get_running_loop().create_future(), asr_sec)
+            st.waiters.append(w)
+            if on_queued:
+                on_queued(len(st.waiters))
+            try:
+                await w.future
+            except asyncio.CancelledError:
+                if w in st.waiters:
+                    st.waiters.remove(w)
+                elif not w.future.cancelled():
+                    st.running_sec -= asr_sec; st.running_jobs -= 1
+                    self._wake(tier)
+                raise
+        try:
+            yield
+        finally:
+            st.running_sec -= asr_sec
+            st.running_jobs -= 1
+            self._wake(tier)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            tier: {
+                "sessions": len(st.sessions),
+                "running_asr_sec": round(st.running_sec, 1),
+                "running_jobs": st.running_jobs,
+                "queued": len(st.waiters),
+                "rejected": st.rejected,
+            }
+            for tier, st in self._tiers.items()
+        }
+
+
+ADMISSION = AdmissionController()
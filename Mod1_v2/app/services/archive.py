@@ -0,0 +1,242 @@
+"""
+Холодный архив завершённых сессий.
+
+Закрытые дольше archive.min_age_sec сессии переносятся из SQLite в append-only
+сегменты archive.dir/seg-NNNNNN.bin: запись = 4 байта длины (big-endian) + zlib(JSON
+с сессией, транскриптами и чанками). Маленький индекс index.jsonl хранит
+session_id -> (segment, offset, length); при повторной архивации побеждает последняя строка.
+Порядок записи: сегмент (fsync) -> индекс (fsync) -> удаление строк из БД,
+поэтому сбой в середине даёт максимум дубль в архиве, но не потерю данных.
+Архиватор идёт в каждом воркере: перед записью строки забираются условным UPDATE
+closed -> archiving, так что одну сессию переносит только один процесс.
+Строки, оставшиеся в archiving после падения процесса, возвращает --reclaim
+(запускать, когда архиваторы остановлены).
+
+    python -m app.services.archive              # один проход
+    python -m app.services.archive --reclaim    # + вернуть зависшие archiving
+"""
+from __future__ import annotations
+import asyncio, fcntl, json, logging, os, struct, threading, zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlmodel import select, delete, update
+
+from ..config import settings
+from ..db import get_session
+from ..models import SessionModel, TranscriptModel, ChunkModel, LiveCheckpointModel
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.jsonl"
+_HDR = struct.Struct(">I")
+
+
+def _dt(v: Optional[datetime]) -> Optional[str]:
+    return v.isoformat() + "Z" if v else None
+
+
+class SessionArchive:
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._index: Dict[str, Tuple[str, int, int]] = {}
+        self._index_mtime = -1.0
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root, INDEX_NAME)
+
+    @contextmanager
+    def _writer_lock(self) -> Iterator[None]:
+        # между процессами/воркерами — flock на отдельном файле
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, "archive.lock"), "a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _load_index(self) -> Dict[str, Tuple[str, int, int]]:
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return self._index
+        with self._lock:
+            if mtime != self._index_mtime:
+                idx: Dict[str, Tuple[str, int, int]] = {}
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            rec = json.loads(line)
+                        except ValueError:
+                            continue  # недописанная строка после сбоя
+                        idx[rec["session_id"]] = (rec["segment"], rec["offset"], rec["length"])
+                self._index, self._index_mtime = idx, mtime
+        return self._index
+
+    def contains(self, session_id: str) -> bool:
+        return session_id in self._load_index()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        loc = self._load_index().get(session_id)
+        if not loc:
+            return None
+        segment, offset, length = loc
+        with open(os.path.join(self.root, segment), "rb") as f:
+            f.seek(offset)
+            (size,) = _HDR.unpack(f.read(_HDR.size))
+            blob = f.read(size)
+        if size + _HDR.size != length or len(blob) != size:
+            raise IOError(f"corrupted archive record for {session_id}")
+        return json.loads(zlib.decompress(blob))
+
+    def _current_segment(self) -> str:
+        segs = sorted(n for n in os.listdir(self.root) if n.startswith("seg-") and n.endswith(".bin"))
+        if segs and os.path.getsize(os.path.join(self.root, segs[-1])) < settings.archive.segment_max_bytes:
+            return segs[-1]
+        nxt = int(segs[-1][4:10]) + 1 if segs else 1
+        return f"seg-{nxt:06d}.bin"
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        """Дописывает записи в текущий сегмент и индекс (под межпроцессной блокировкой)."""
+        if not records:
+            return
+        with self._writer_lock():
+            segment = self._current_segment()
+            entries = []
+            with open(os.path.join(self.root, segment), "ab") as f:
+                for rec in records:
+                    blob = zlib.compress(json.dumps(rec, ensure_ascii=False).encode("utf-8"), settings.archive.compress_level)
+                    offset = f.tell()
+                    f.write(_HDR.pack(len(blob)) + blob)
+                    entries.append({
+                        "session_id": rec["session"]["id"],
+                        "segment": segment,
+                        "offset": offset,
+                        "length": _HDR.size + len(blob),
+                        "archived_at": datetime.utcnow().isoformat() + "Z",
+                    })
+                f.flush(); os.fsync(f.fileno())
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                for e in entries:
+                    f.write(json.dumps(e) + "\n")
+                f.flush(); os.fsync(f.fileno())
+
+
+ARCHIVE = SessionArchive(settings.archive.dir)
+
+
+def _record(s, sm: SessionModel) -> Dict[str, Any]:
+    trs = s.exec(select(TranscriptModel).where(TranscriptModel.session_id == sm.id)).all()
+    chs = s.exec(select(ChunkModel).where(ChunkModel.session_id == sm.id).order_by(ChunkModel.seq.asc())).all()
+    return {
+        "session": {
+            "id": sm.id, "lang": sm.lang, "tier": sm.tier, "status": sm.status,
+            "started_at": _dt(sm.started_at), "ended_at": _dt(sm.ended_at), "received_bytes": sm.received_bytes,
+        },
+        "transcripts": [
+            {"id": t.id, "text_full": t.text_full, "duration_sec": t.duration_sec, "total_chunks": t.total_chunks,
+             "lang": t.lang, "created_at": _dt(t.created_at)}
+            for t in trs
+        ],
+        "chunks": [
+            {"session_id": c.session_id, "chunk_id": c.chunk_id, "seq": c.seq, "text": c.text,
+             "overlap_prefix": c.overlap_prefix, "lang": c.lang, "policy": c.policy_json, "hash": c.hash,
+             "created_at": _dt(c.created_at), "delivered_at": _dt(c.delivered_at)}
+            for c in chs
+        ],
+    }
+
+
+def _claim(ids: List[str]) -> List[str]:
+    """
+    closed -> archiving условным UPDATE по каждой строке: при архиваторе в каждом воркере
+    сессию забирает ровно один из них, остальные получают rowcount 0 и её пропускают.
+    """
+    claimed = []
+    with get_session() as s:
+        for sid in ids:
+            r = s.execute(
+                update(SessionModel)
+                .where(SessionModel.id == sid, SessionModel.status == "closed")
+                .values(status="archiving")
+            )
+            if r.rowcount == 1:
+                claimed.append(sid)
+        s.commit()
+    return claimed
+
+
+def _release(ids: List[str]) -> None:
+    with get_session() as s:
+        s.execute(
+            update(SessionModel)
+            .where(SessionModel.id.in_(ids), SessionModel.status == "archiving")
+            .values(status="closed")
+        )
+        s.commit()
+
+
+def archive_sessions(now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+    """Один проход архиватора; возвращает число перенесённых сессий."""
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=settings.archive.min_age_sec)
+    with get_session() as s:
+        found = s.exec(
+            select(SessionModel.id)
+            .where(SessionModel.status == "closed", SessionModel.ended_at != None, SessionModel.ended_at < cutoff)  # noqa: E711
+            .limit(limit or settings.archive.batch_size)
+        ).all()
+    if not found:
+        return 0
+    ids = _claim(list(found))
+    if not ids:
+        return len(found)  # всё забрали другие воркеры — следующий проход не откладываем
+    try:
+        with get_session() as s:
+            olds = s.exec(select(SessionModel).where(SessionModel.id.in_(ids))).all()
+            ARCHIVE.append([_record(s, sm) for sm in olds])
+            s.execute(delete(ChunkModel).where(ChunkModel.session_id.in_(ids)))
+            s.execute(delete(TranscriptModel).where(TranscriptModel.session_id.in_(ids)))
+            s.execute(delete(LiveCheckpointModel).where(LiveCheckpointModel.session_id.in_(ids)))
+            s.execute(delete(SessionModel).where(SessionModel.id.in_(ids)))
+            s.commit()
+    except Exception:
+        _release(ids)
+        raise
+    logger.info("sessions archived", extra={"extra": {"count": len(ids), "skipped": len(found) - len(ids)}})
+    return len(found)
+
+
+def reclaim() -> int:
+    """Вернуть в closed сессии, оставшиеся в archiving после падения процесса посреди прохода."""
+    with get_session() as s:
+        r = s.execute(update(SessionModel).where(SessionModel.status == "archiving").values(status="closed"))
+        s.commit()
+    return r.rowcount
+
+
+async def archive_loop() -> None:
+    """Периодический архиватор (archive.interval_sec > 0), работает в потоке, не блокируя loop."""
+    while True:
+        await asyncio.sleep(settings.archive.interval_sec)
+        try:
+            while await asyncio.to_thread(archive_sessions) == settings.archive.batch_size:
+                pass
+        except Exception:
+            logger.exception("archive pass failed")
+
+
+if __name__ == "__main__":
+    import sys
+
+    reclaimed = reclaim() if "--reclaim" in sys.argv[1:] else 0
+    total = 0
+    while True:
+        n = archive_sessions()
+        total += n
+        if n < settings.archive.batch_size:
+            break
+    print(json.dumps({"archived": total, "reclaimed": reclaimed}))
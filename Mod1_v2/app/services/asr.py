@@ -1,32 +1,52 @@
 from __future__ import annotations
+import threading, time
 from dataclasses import dataclass
-from ..config import settings
+from typing import Optional
+from ..config import settings, WhisperCfg
+from .scheduler import SCHEDULER
+from .cadence import CADENCE
 
 try:
-    from faster_whisper import WhisperModel
+    from faster_whisper import WhisperModel, decode_audio
 except Exception as e:  # покажем, что именно не хватает
     print("FASTWHISPER_IMPORT_ERROR:", repr(e))
-    WhisperModel = None  # type: ignore
+    WhisperModel = decode_audio = None  # type: ignore
+
+SAMPLE_RATE = 16000  # частота, в которую faster-whisper декодирует вход
+
+try:  # faster-whisper >= 1.1
+    from faster_whisper import BatchedInferencePipeline
+except Exception:
+    BatchedInferencePipeline = None  # type: ignore
 
 
 @dataclass
 class ASRResult:
     text: str
+    duration_sec: float = 0.0
+    proc_sec: float = 0.0
 
 class ASREngine:
-    def __init__(self) -> None:
-        self.stub = settings.app.stub_asr
-        self.language = settings.whisper.language
+    def __init__(self, cfg: Optional[WhisperCfg] = None, stub: Optional[bool] = None) -> None:
+        self.cfg = cfg or settings.whisper
+        self.stub = settings.app.stub_asr if stub is None else stub
+        self.language = self.cfg.language
         self.model = None
+        self.pipeline = None
         if not self.stub:
             assert WhisperModel is not None, "faster-whisper is not installed"
             self.model = WhisperModel(
-                settings.whisper.model,
-                device=settings.whisper.device,
-                compute_type=settings.whisper.compute_type,
+                self.cfg.model,
+                device=self.cfg.device,
+                compute_type=self.cfg.compute_type,
+                cpu_threads=self.cfg.cpu_threads,
+                num_workers=self.cfg.num_workers,
             )
+            if self.cfg.batch_size > 1 and BatchedInferencePipeline is not None:
+                self.pipeline = BatchedInferencePipeline(model=self.model)
 
-    def transcribe_file(self, path: str) -> ASRResult:
+    def transcribe_file(self, path: str, offset_sec: float = 0.0) -> ASRResult:
+        """offset_sec > 0 — распознаём только аудио после этой отметки (восстановление из чекпоинта)."""
         if self.stub:
             text = (
                 "Здравствуйте. Это тестовая запись. Мы проверяем модуль распознавания. "
@@ -34,15 +54,50 @@ class ASREngine:
             )
             return ASRResult(text=text)
         assert self.model is not None
-        segments, info = self.model.transcribe(
-            path,
+        t0 = time.perf_counter()
+        kwargs = dict(
             language=self.language,
-            vad_filter=settings.whisper.vad_filter,
-            temperature=settings.whisper.temperature,
+            vad_filter=self.cfg.vad_filter,
+            temperature=self.cfg.temperature,
+            beam_size=self.cfg.beam_size,
             condition_on_previous_text=True,
         )
+        audio = path
+        if offset_sec > 0:
+            # хвост режем сами, до VAD: clip_timestamps применяется уже к склеенной
+            # после VAD шкале, и при паузах в записи отметка уезжает вперёд
+            audio = decode_audio(path, sampling_rate=SAMPLE_RATE)[int(offset_sec * SAMPLE_RATE):]
+        if self.pipeline is not None and offset_sec <= 0:
+            # батчевый режим декодирует окна VAD независимо, без контекста предыдущего текста
+            kwargs.pop("condition_on_previous_text")
+            segments, info = self.pipeline.transcribe(audio, batch_size=self.cfg.batch_size, **kwargs)
+        else:
+            segments, info = self.model.transcribe(audio, **kwargs)
         text_parts = []
         for seg in segments:
             text_parts.append(seg.text)
         text = " ".join(text_parts).strip()
-        return ASRResult(text=text)
\ No newline at end of file
+        # длительность — по всему файлу: от неё считается следующий чекпоинт
+        duration = (offset_sec if offset_sec > 0 else 0.0) + float(info.duration or 0.0)
+        return ASRResult(text=text, duration_sec=duration, proc_sec=time.perf_counter() - t0)
+
+# Один экземпляр модели на процесс; параллелизм (num_workers потоков)
+# и порядок работ задаёт планировщик (services/scheduler.py)
+_ENGINE: Optional[ASREngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine() -> ASREngine:
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = ASREngine()
+    return _ENGINE
+
+
+async def transcribe_async(path: str, session_id: str, tier: str = "Basic", kind: str = "batch", cost: float = 1.0, offset_sec: float = 0.0) -> ASRResult:
+    """Распознавание через планировщик ASR, не блокируя event loop."""
+    res = await SCHEDULER.run(get_engine().transcribe_file, path, offset_sec, session_id=session_id, tier=tier, kind=kind, cost=cost)
+    CADENCE.observe(res.proc_sec, res.duration_sec)
+    return res
@@ -0,0 +1,150 @@
+"""
+Автотюнинг параметров faster-whisper под конкретную машину и целевую конкуренцию.
+
+    python -m app.services.autotune --clip ./assets/reference_ru.wav --concurrency 4
+
+Перебирает compute_type / cpu_threads / num_workers / beam_size / batch_size,
+на каждом профиле гоняет `concurrency` параллельных распознаваний эталонного клипа,
+меряет RTF (время обработки / длительность аудио на поток) и пропускную способность
+(секунд аудио в секунду), выбирает лучший профиль с RTF <= max_rtf и сохраняет его
+в whisper.tuned_path — оттуда его подхватывает config.apply_tuned при старте.
+"""
+from __future__ import annotations
+import argparse, itertools, json, logging, os, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ..config import settings, WhisperCfg, TUNED_KEYS
+
+logger = logging.getLogger(__name__)
+
+Bench = Callable[[Dict[str, Any], str, int, int], Dict[str, float]]
+
+
+# batch_size > 1 имеет смысл только с BatchedInferencePipeline (faster-whisper >= 1.1)
+BATCH_SIZES = (1, 4, 8, 16)
+
+
+def _batched_supported() -> bool:
+    try:
+        from faster_whisper import BatchedInferencePipeline  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def candidates(cores: int, concurrency: int, compute_types: Iterable[str] = ("int8", "int8_float32"),
+               beam_sizes: Iterable[int] = (1, 5), batch_sizes: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+    """Профили без переподписки ядер: cpu_threads * num_workers <= cores."""
+    concurrency = max(1, concurrency)
+    if batch_sizes is None:
+        # без батчевого пайплайна профили с batch_size > 1 ничем не отличались бы от batch_size=1
+        batch_sizes = BATCH_SIZES if _batched_supported() else (1,)
+    threads = sorted({max(1, cores // concurrency), max(1, cores // (2 * concurrency)), max(1, cores // 2)})
+    workers = sorted({1, concurrency})
+    out = []
+    for ct, th, nw, beam, bs in itertools.product(compute_types, threads, workers, beam_sizes, batch_sizes):
+        if th * nw > cores:
+            continue
+        out.append({"compute_type": ct, "cpu_threads": th, "num_workers": nw, "beam_size": beam, "batch_size": bs})
+    return out
+
+
+def benchmark(profile: Dict[str, Any], clip: str, concurrency: int, repeats: int = 1) -> Dict[str, float]:
+    """Реальный прогон: модель с профилем, concurrency потоков, repeats проходов на поток."""
+    from .asr import ASREngine
+    cfg = WhisperCfg(**{**settings.whisper.model_dump(), **profile})
+    engine = ASREngine(cfg, stub=False)
+    engine.transcribe_file(clip)  # прогрев
+
+    def _one(_: int):
+        return [engine.transcribe_file(clip) for _ in range(repeats)]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        results = [r for batch in ex.map(_one, range(concurrency)) for r in batch]
+    wall = time.perf_counter() - t0
+    audio = sum(r.duration_sec for r in results)
+    per_stream = sum(r.proc_sec for r in results) / max(1, len(results))
+    clip_sec = results[0].duration_sec if results else 0.0
+    return {
+        "wall_sec": wall,
+        "rtf": per_stream / clip_sec if clip_sec else float("inf"),
+        "throughput": audio / wall if wall else 0.0,
+    }
+
+
+def pick_best(measured: List[Dict[str, Any]], max_rtf: float) -> Optional[Dict[str, Any]]:
+    """Максимум пропускной способности среди профилей, укладывающихся в max_rtf; иначе минимальный RTF."""
+    if not measured:
+        return None
+    ok = [m for m in measured if m["rtf"] <= max_rtf]
+    if ok:
+        return max(ok, key=lambda m: m["throughput"])
+    return min(measured, key=lambda m: m["rtf"])
+
+
+def autotune(clip: str, concurrency: int, out_path: str, max_rtf: float = 0.5, repeats: int = 1,
+             profiles: Optional[List[Dict[str, Any]]] = None, bench: Bench = benchmark) -> Dict[str, Any]:
+    if not os.path.exists(clip):
+        raise FileNotFoundError(f"reference clip not found: {clip}")
+    cores = os.cpu_count() or 1
+    profiles = profiles if profiles is not None else candidates(cores, concurrency)
+    measured: List[Dict[str, Any]] = []
+    for prof in profiles:
+        try:
+            res = bench(prof, clip, concurrency, repeats)
+        except Exception as e:  # неподдерживаемый compute_type и т.п.
+            logger.warning("autotune profile failed", extra={"extra": {"profile": prof, "error": str(e)}})
+            continue
+        measured.append({**prof, **res})
+        logger.info("autotune profile measured", extra={"extra": measured[-1]})
+    best = pick_best(measured, max_rtf)
+    if best is None:
+        raise RuntimeError("no profile could be measured")
+    report = {
+        "whisper": {k: best[k] for k in TUNED_KEYS},
+        "measured": {"rtf": best["rtf"], "throughput": best["throughput"]},
+        "model": settings.whisper.model,
+        "cores": cores,
+        "concurrency": concurrency,
+        "max_rtf": max_rtf,
+        "candidates": measured,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, out_path)
+    return report
+
+
+def ensure_tuned() -> bool:
+    """Режим autotune_on_start: тюним, только если сохранённого профиля ещё нет."""
+    if settings.app.stub_asr or os.path.exists(settings.whisper.tuned_path):
+        return False
+    clip = settings.whisper.autotune_clip
+    if not clip or not os.path.exists(clip):
+        # эталонный клип в репозиторий не входит: без него стартуем с профилем из конфига
+        logger.warning("autotune skipped: reference clip not found", extra={"extra": {"clip": clip}})
+        return False
+    autotune(clip, max(1, settings.whisper.num_workers), settings.whisper.tuned_path)
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="faster-whisper autotune")
+    ap.add_argument("--clip", default=settings.whisper.autotune_clip)
+    ap.add_argument("--concurrency", type=int, default=max(1, settings.whisper.num_workers))
+    ap.add_argument("--out", default=settings.whisper.tuned_path)
+    ap.add_argument("--max-rtf", type=float, default=0.5)
+    ap.add_argument("--repeats", type=int, default=1)
+    args = ap.parse_args(argv)
+    report = autotune(args.clip, args.concurrency, args.out, args.max_rtf, args.repeats)
+    print(json.dumps({"whisper": report["whisper"], "measured": report["measured"]}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
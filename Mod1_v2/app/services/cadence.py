@@ -0,0 +1,59 @@
+from __future__ import annotations
+import threading
+from typing import Any, Dict
+
+from ..config import settings
+from .scheduler import SCHEDULER
+
+
+class CadenceController:
+    """
+    Адаптивный темп обработки живых сессий.
+    Давление узла p ∈ [0, 1] — максимум из загрузки очереди ASR
+    (queue_depth / (workers * queue_high)) и сглаженного RTF (rtf / rtf_high).
+    При p=0 сессии обрабатываются с min_interval и минимальным окном новых байт,
+    при p=1 — с max_interval и max_window: узел деградирует по задержке, а не падает.
+    """
+
+    def __init__(self) -> None:
+        self.cfg = settings.cadence
+        self._rtf = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, proc_sec: float, audio_sec: float) -> None:
+        if audio_sec <= 0:
+            return
+        with self._lock:
+            a = self.cfg.rtf_alpha
+            rtf = proc_sec / audio_sec
+            self._rtf = rtf if self._rtf == 0.0 else (1 - a) * self._rtf + a * rtf
+
+    def pressure(self) -> float:
+        cfg = self.cfg
+        q = SCHEDULER.queue_depth() / float(max(1, SCHEDULER.workers) * max(1, cfg.queue_high))
+        r = self._rtf / cfg.rtf_high if cfg.rtf_high > 0 else 0.0
+        return min(1.0, max(q, r, 0.0))
+
+    def interval_sec(self) -> float:
+        if not self.cfg.enabled:
+            return settings.app.ws_debounce_ms / 1000.0
+        p = self.pressure()
+        return (self.cfg.min_interval_ms + (self.cfg.max_interval_ms - self.cfg.min_interval_ms) * p) / 1000.0
+
+    def window_bytes(self) -> int:
+        if not self.cfg.enabled:
+            return 0
+        p = self.pressure()
+        return int(self.cfg.min_window_bytes + (self.cfg.max_window_bytes - self.cfg.min_window_bytes) * p)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.cfg.enabled,
+            "pressure": round(self.pressure(), 3),
+            "rtf_ewma": round(self._rtf, 3),
+            "interval_ms": int(self.interval_sec() * 1000),
+            "window_bytes": self.window_bytes(),
+        }
+
+
+CADENCE = CadenceController()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import asyncio, heapq, itertools, threading, time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from ..config import settings
+
+# Классы приоритета: живые окна всегда раньше пакетной работы
+KIND_RANK = {"live": 0, "batch": 1}
+
+
+@dataclass(order=True)
+class _Job:
+    key: Tuple[int, int, float, int]
+    fn: Callable[..., Any] = field(compare=False)
+    args: tuple = field(compare=False)
+    future: Future = field(compare=False)
+    session_id: str = field(compare=False)
+    tier: str = field(compare=False)
+    kind: str = field(compare=False)
+    start_tag: float = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class ASRScheduler:
+    """
+    Очередь перед ASR: строгий приоритет live > batch (затем tier_priority),
+    внутри класса — взвешенная справедливая очередь (start-time fair queuing)
+    по сессиям с весами тарифов. Ведёт статистику ожидания в очереди по тарифам.
+    """
+
+    def __init__(self, workers: int, weights: Dict[str, float], tier_priority: Dict[str, int], window: int = 1000) -> None:
+        self.workers = max(1, workers)
+        self.weights = weights
+        self.tier_priority = tier_priority
+        self._heap: List[_Job] = []
+        self._cv = threading.Condition()
+        self._seq = itertools.count()
+        self._vtime = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._running = 0
+        self._waits: Dict[Tuple[str, str], Deque[float]] = {}
+        self._window = window
+        self._threads: List[threading.Thread] = []
+        self._retire = 0
+
+    def _ensure_threads(self) -> None:
+        if self._threads:
+            return
+        self._spawn(self.workers)
+
+    def _spawn(self, n: int) -> None:
+        for _ in range(n):
+            t = threading.Thread(target=self._worker, name=f"asr-{len(self._threads)}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def resize(self, workers: int) -> None:
+        """Новое число потоков ASR (профиль автотюнинга применён уже после создания планировщика)."""
+        workers = max(1, workers)
+        with self._cv:
+            if self._threads:
+                live = len(self._threads) - self._retire
+                if workers > live:
+                    grow = workers - live
+                    cancel = min(grow, self._retire)
+                    self._retire -= cancel
+                    self._spawn(grow - cancel)
+                elif workers < live:
+                    # лишние потоки выходят, доделав текущую работу
+                    self._retire += live - workers
+                    self._cv.notify_all()
+            self.workers = workers
+
+    def submit(self, fn: Callable[..., Any], *args: Any, session_id: str, tier: str = "Basic", kind: str = "batch", cost: float = 1.0) -> Future:
+        fut: Future = Future()
+        weight = self.weights.get(tier, 1.0) or 1.0
+        with self._cv:
+            self._ensure_threads()
+            start = max(self._vtime, self._last_finish.get(session_id, 0.0))
+            finish = start + max(cost, 0.0) / weight
+            self._last_finish[session_id] = finish
+            key = (KIND_RANK.get(kind, 1), self.tier_priority.get(tier, 0), finish, next(self._seq))
+            heapq.heappush(self._heap, _Job(key, fn, args, fut, session_id, tier, kind, start, time.monotonic()))
+            self._cv.notify()
+        return fut
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kw: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kw))
+
+    def forget(self, session_id: str) -> None:
+        """Сброс тега сессии после её закрытия, чтобы словарь не рос."""
+        with self._cv:
+            self._last_finish.pop(session_id, None)
+
+    def _worker(self) -> None:
+        while True:
+            with self._cv:
+                while not self._heap and not self._retire:
+                    self._cv.wait()
+                if self._retire:
+                    self._retire -= 1
+                    self._threads.remove(threading.current_thread())
+                    return
+                job = heapq.heappop(self._heap)
+                self._vtime = max(self._vtime, job.start_tag)
+                self._running += 1
+                waits = self._waits.setdefault((job.tier, job.kind), deque(maxlen=self._window))
+                waits.append((time.monotonic() - job.enqueued_at) * 1000.0)
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.fn(*job.args))
+                    except BaseException as e:
+                        job.future.set_exception(e)
+            finally:
+                with self._cv:
+                    self._running -= 1
+
+    def queue_depth(self) -> int:
+        return len(self._heap)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            queued: Dict[str, int] = {}
+            for j in self._heap:
+                queued[j.tier] = queued.get(j.tier, 0) + 1
+            tiers: Dict[str, Dict[str, Any]] = {}
+            for (tier, kind), waits in self._waits.items():
+                vals = sorted(waits)
+                if not vals:
+                    continue
+                tiers.setdefault(tier, {})[kind] = {
+                    "samples": len(vals),
+                    "wait_ms_p50": round(vals[len(vals) // 2], 1),
+                    "wait_ms_p95": round(vals[min(len(vals) - 1, int(len(vals) * 0.95))], 1),
+                    "wait_ms_max": round(vals[-1], 1),
+                }
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queue_depth": len(self._heap),
+                "queued_by_tier": queued,
+                "wait_by_tier": tiers,
+            }
+
+
+SCHEDULER = ASRScheduler(
+    workers=settings.whisper.num_workers,
+    weights=settings.scheduler.tier_weights,
+    tier_priority=settings.scheduler.tier_priority,
+    window=settings.scheduler.stats_window,
+)
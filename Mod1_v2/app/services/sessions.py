@@ -1,52 +1,179 @@
 from __future__ import annotations
 import asyncio, time, os
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Optional, Tuple
 from datetime import datetime
-from sqlmodel import select
+from sqlmodel import select, func
 
 from ..config import settings
 from ..db import get_session
-from ..models import SessionModel, TranscriptModel, ChunkModel
-from .asr import ASREngine
+from ..models import SessionModel, TranscriptModel, ChunkModel, LiveCheckpointModel
+from .asr import get_engine, transcribe_async
+from .scheduler import SCHEDULER
+from .cadence import CADENCE
+from .admission import ADMISSION
 from .chunker import split_sentences, make_chunks
-from .webhooks import get_active_webhook, send_chunk
+from .webhooks import FANOUT
+from .archive import ARCHIVE
 
 @dataclass
 class LiveState:
     session_id: str
     tmp_path: str
+    tier: str = "Basic"
     last_debounce: float = 0.0
+    last_processed: float = 0.0
+    processed_bytes: int = 0
     lock: asyncio.Lock = field(default_factory=asyncio.Lock)
     emitted_seq: int = 0
     emitted_sentences: int = 0
     full_text: str = ""
     closed: bool = False
+    # resume: сколько байт аудио уже подтверждено клиенту
+    received_bytes: int = 0
+    skip_bytes: int = 0
+    conn_gen: int = 0
+    close_task: Optional[asyncio.Task] = None
+    # чекпоинт: full_text соответствует аудио до audio_sec; после рестарта
+    # распознаём только хвост после base_offset_sec и дописываем к base_text
+    audio_sec: float = 0.0
+    base_text: str = ""
+    base_offset_sec: float = 0.0
 
 class SessionManager:
     def __init__(self) -> None:
         self.states: Dict[str, LiveState] = {}
-        self.asr = ASREngine()
+        self.asr = get_engine()
 
     def _ensure_session(self, session_id: str, lang: str, tier: str = "Basic") -> LiveState:
         if session_id in self.states:
             return self.states[session_id]
         os.makedirs("/app/tmp", exist_ok=True)
         tmp_path = f"/app/tmp/{session_id}.webm"
-        state = LiveState(session_id=session_id, tmp_path=tmp_path)
+        state = LiveState(session_id=session_id, tmp_path=tmp_path, tier=tier)
+        if os.path.exists(tmp_path):
+            state.received_bytes = os.path.getsize(tmp_path)
         self.states[session_id] = state
         with get_session() as s:
             existing = s.get(SessionModel, session_id)
             if not existing:
                 s.add(SessionModel(id=session_id, lang=lang, tier=tier))
                 s.commit()
+            elif existing.status == "active":
+                cp = s.get(LiveCheckpointModel, session_id)
+                if cp:
+                    self._restore(state, cp)
         return state
 
-    async def append_audio(self, session_id: str, lang: str, data: bytes) -> None:
+    def _restore(self, state: LiveState, cp: LiveCheckpointModel) -> None:
+        """Восстановление после рестарта воркера из последнего чекпоинта."""
+        state.tier = cp.tier
+        state.emitted_seq = cp.emitted_seq
+        with get_session() as s:
+            stored = s.exec(select(func.max(ChunkModel.seq)).where(ChunkModel.session_id == state.session_id)).one()
+        if stored and stored > cp.emitted_seq:
+            # чекпоинт старше сохранённых чанков (записан до атомарной записи): seq не переиспользуем
+            state.emitted_seq = stored
+        state.emitted_sentences = cp.emitted_sentences
+        state.full_text = cp.full_text
+        state.audio_sec = cp.audio_offset_sec
+        if not os.path.exists(state.tmp_path):
+            # файла нет — новое аудио начнётся с нуля в новом файле
+            state.base_text, state.base_offset_sec = cp.full_text, 0.0
+        elif cp.audio_offset_sec > 0:
+            state.base_text, state.base_offset_sec = cp.full_text, cp.audio_offset_sec
+        # иначе длительность неизвестна: файл распознаётся целиком, повторов не будет за счёт emitted_sentences
+        state.processed_bytes = state.received_bytes
+        state.last_processed = time.time() if state.received_bytes else 0.0
+
+    @staticmethod
+    def _checkpoint_row(state: LiveState, lang: str, **progress) -> LiveCheckpointModel:
+        """Строка чекпоинта; progress — значения emitted_* / full_text / audio_offset_sec ещё до их применения к state."""
+        return LiveCheckpointModel(**{
+            "session_id": state.session_id,
+            "tmp_path": state.tmp_path,
+            "lang": lang,
+            "tier": state.tier,
+            "emitted_seq": state.emitted_seq,
+            "emitted_sentences": state.emitted_sentences,
+            "full_text": state.full_text,
+            "audio_offset_sec": state.audio_sec,
+            "received_bytes": state.received_bytes,
+            "updated_at": datetime.utcnow(),
+            **progress,
+        })
+
+    def is_closed(self, session_id: str) -> bool:
+        """Сессия уже финализирована (eos, истёк grace или перенесена в архив) — к ней не переподключаются."""
+        state = self.states.get(session_id)
+        if state is not None:
+            return state.closed
+        with get_session() as s:
+            sm = s.get(SessionModel, session_id)
+            if sm is not None:
+                return sm.status != "active"  # closed или archiving
+        return ARCHIVE.contains(session_id)
+
+    async def attach(self, session_id: str, lang: str, tier: str = "Basic") -> Tuple[LiveState, bool]:
+        """
+        Подключение (или переподключение) WebSocket к сессии.
+        Отменяет отложенное закрытие; возвращает (state, resumed).
+        """
+        resumed = session_id in self.states
+        state = self._ensure_session(session_id, lang, tier)
+        resumed = resumed or state.emitted_seq > 0
+        state.conn_gen += 1
+        state.skip_bytes = 0
+        if state.close_task and not state.close_task.done():
+            state.close_task.cancel()
+        state.close_task = None
+        return state, resumed and not state.closed
+
+    def detach(self, session_id: str, lang: str) -> None:
+        """
+        Обрыв соединения: сессию не финализируем сразу, а ждём переподключения
+        в течение ws_resume_grace_sec.
+        """
+        state = self.states.get(session_id)
+        if not state or state.closed:
+            return
+        grace = settings.app.ws_resume_grace_sec
+        gen = state.conn_gen
+        state.close_task = asyncio.create_task(self._close_after_grace(session_id, lang, gen, grace))
+
+    async def _close_after_grace(self, session_id: str, lang: str, gen: int, grace: float) -> None:
+        if grace > 0:
+            await asyncio.sleep(grace)
+        state = self.states.get(session_id)
+        if not state or state.closed or state.conn_gen != gen:
+            return
+        state.close_task = None
+        await self.close_session(session_id, lang)
+
+    def seek(self, session_id: str, offset: int) -> int:
+        """
+        Клиент сообщает смещение следующего бинарного кадра.
+        Перекрытие с уже принятым аудио отбрасывается; возвращает ожидаемое смещение.
+        Смещение дальше принятого — это дыра в потоке, её не принимаем.
+        """
+        state = self.states[session_id]
+        if offset > state.received_bytes:
+            raise ValueError(f"offset {offset} is ahead of received {state.received_bytes}")
+        state.skip_bytes = state.received_bytes - offset
+        return state.received_bytes
+
+    async def append_audio(self, session_id: str, lang: str, data: bytes) -> int:
         state = self._ensure_session(session_id, lang)
         async with state.lock:
+            if state.skip_bytes:
+                cut = min(state.skip_bytes, len(data))
+                state.skip_bytes -= cut
+                data = data[cut:]
+            if not data:
+                return state.received_bytes
             with open(state.tmp_path, "ab") as f:
                 f.write(data)
+            state.received_bytes += len(data)
             state.last_debounce = time.time()
             with get_session() as s:
                 m = s.get(SessionModel, session_id)
@@ -54,21 +181,34 @@ class SessionManager:
                     m.received_bytes += len(data)
                     s.add(m); s.commit()
         asyncio.create_task(self._debounced_process(session_id, lang))
+        return state.received_bytes
 
     async def _debounced_process(self, session_id: str, lang: str) -> None:
-        await asyncio.sleep(settings.app.ws_debounce_ms / 1000.0)
+        # интервал и минимальное окно новых байт подстраиваются под нагрузку ASR
+        interval = CADENCE.interval_sec()
+        await asyncio.sleep(interval)
         state = self.states.get(session_id)
         if not state or state.closed:
             return
-        if time.time() - state.last_debounce < (settings.app.ws_debounce_ms / 1000.0) - 0.05:
+        now = time.time()
+        quiet = now - state.last_debounce >= interval - 0.05
+        due = now - state.last_processed >= interval
+        if not (quiet or due):
             return
-        await self._process_now(session_id, lang)
+        if not quiet and state.received_bytes - state.processed_bytes < CADENCE.window_bytes():
+            return
+        await self._process_now(session_id, lang, skip_unchanged=True)
 
-    async def _process_now(self, session_id: str, lang: str) -> None:
+    async def _process_now(self, session_id: str, lang: str, skip_unchanged: bool = False) -> None:
         state = self.states[session_id]
         async with state.lock:
-            res = self.asr.transcribe_file(state.tmp_path)
-            text = res.text.strip()
+            # отложенные задачи, дождавшиеся lock после уже выполненного прохода, ничего не делают
+            if skip_unchanged and state.last_processed and state.processed_bytes == state.received_bytes:
+                return
+            state.last_processed = time.time()
+            state.processed_bytes = state.received_bytes
+            res = await transcribe_async(state.tmp_path, session_id, tier=state.tier, kind="live", offset_sec=state.base_offset_sec)
+            text = " ".join(t for t in (state.base_text, res.text.strip()) if t)
             if not text:
                 return
             sents = split_sentences(text)
@@ -78,11 +218,14 @@ class SessionManager:
             chunks = make_chunks(session_id, new_sents, start_seq=state.emitted_seq + 1)
             if not chunks:
                 return
-            webhook = await get_active_webhook()
-            for ch in chunks:
-                import orjson
-                with get_session() as ds:
-                    cm = ChunkModel(
+            import orjson
+            # чанки и чекпоинт — одной транзакцией: после сбоя восстановление начинается
+            # ровно с последнего сохранённого seq, уже доставленные чанки не выпускаются повторно
+            progress = dict(emitted_seq=chunks[-1].seq, emitted_sentences=len(sents), full_text=text,
+                            audio_offset_sec=res.duration_sec)
+            with get_session() as ds:
+                for ch in chunks:
+                    ds.add(ChunkModel(
                         session_id=session_id,
                         chunk_id=ch.chunk_id,
                         seq=ch.seq,
@@ -91,37 +234,35 @@ class SessionManager:
                         lang=ch.lang,
                         policy_json=orjson.dumps(ch.policy).decode("utf-8"),
                         hash=ch.hash,
-                    )
-                    ds.add(cm); ds.commit()
-                if webhook:
-                    payload = {
-                        "session_id": ch.session_id,
-                        "chunk_id": ch.chunk_id,
-                        "seq": ch.seq,
-                        "text": ch.text,
-                        "overlap_prefix": ch.overlap_prefix,
-                        "lang": ch.lang,
-                        "policy": ch.policy,
-                        "hash": ch.hash,
-                        "created_at": datetime.utcnow().isoformat() + "Z"
-                    }
-                    try:
-                        await send_chunk(webhook, payload)
-                        with get_session() as ds:
-                            row = ds.exec(select(ChunkModel).where(ChunkModel.chunk_id == ch.chunk_id)).first()
-                            if row:
-                                row.delivered_at = datetime.utcnow(); ds.add(row); ds.commit()
-                    except Exception:
-                        pass
-                state.emitted_seq = ch.seq
-            state.emitted_sentences = len(sents)
-            state.full_text = text
+                    ))
+                ds.merge(self._checkpoint_row(state, lang, **progress))
+                ds.commit()
+            state.emitted_seq, state.emitted_sentences = progress["emitted_seq"], progress["emitted_sentences"]
+            state.full_text, state.audio_sec = text, res.duration_sec
+            for ch in chunks:
+                # доставка подписчикам асинхронно, через их собственные очереди
+                FANOUT.publish({
+                    "session_id": ch.session_id,
+                    "chunk_id": ch.chunk_id,
+                    "seq": ch.seq,
+                    "text": ch.text,
+                    "overlap_prefix": ch.overlap_prefix,
+                    "lang": ch.lang,
+                    "policy": ch.policy,
+                    "hash": ch.hash,
+                    "created_at": datetime.utcnow().isoformat() + "Z"
+                })
 
     async def close_session(self, session_id: str, lang: str) -> dict:
         state = self.states.get(session_id)
         if not state:
             return {"session_id": session_id, "text_full": "", "duration_sec": 0.0, "total_chunks": 0, "lang": lang}
+        if state.close_task and not state.close_task.done() and state.close_task is not asyncio.current_task():
+            state.close_task.cancel()
+        state.close_task = None
         await self._process_now(session_id, lang)
+        SCHEDULER.forget(session_id)
+        ADMISSION.release_session(session_id)
         async with state.lock:
             state.closed = True
             full = state.full_text
@@ -134,7 +275,11 @@ class SessionManager:
                 total_chunks = s.exec(select(ChunkModel).where(ChunkModel.session_id == session_id)).all()
                 total_chunks = len(total_chunks)
                 tr = TranscriptModel(session_id=session_id, text_full=full, duration_sec=0.0, total_chunks=total_chunks, lang=lang)
-                s.add(tr); s.commit()
+                s.add(tr)
+                cp = s.get(LiveCheckpointModel, session_id)
+                if cp:
+                    s.delete(cp)
+                s.commit()
             return {"session_id": session_id, "text_full": full, "duration_sec": 0.0, "total_chunks": total_chunks, "lang": lang}
 
 SESSION_MANAGER = SessionManager()
\ No newline at end of file
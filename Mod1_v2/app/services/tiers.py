@@ -0,0 +1,27 @@
+"""
+Тариф запроса определяет сервер, а не клиент.
+
+Клиент предъявляет API-ключ (заголовок X-API-Key; для WebSocket ещё и параметр api_key),
+тариф берётся из app.api_keys (ключ -> тариф; ENV API_KEYS="ключ:Premium,ключ2:Extended").
+Без ключа — тариф по умолчанию app.tier. Неизвестный ключ — отказ, а не тариф по умолчанию.
+"""
+from __future__ import annotations
+import hmac
+from typing import Optional
+
+from ..config import settings
+
+
+class UnknownKey(Exception):
+    pass
+
+
+def resolve_tier(api_key: Optional[str]) -> str:
+    if not api_key:
+        return settings.app.tier
+    for key, tier in settings.app.api_keys.items():
+        if hmac.compare_digest(key.encode("utf-8"), api_key.encode("utf-8")):
+            if tier not in settings.limits:
+                raise UnknownKey(f"API key is mapped to unknown tier {tier}")
+            return tier
+    raise UnknownKey("unknown API key")
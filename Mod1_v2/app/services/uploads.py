@@ -0,0 +1,225 @@
+from __future__ import annotations
+import asyncio, hashlib, json, os
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Tuple, TypeVar
+
+from sqlmodel import update
+
+from ..config import settings
+from ..db import get_session
+from ..models import UploadModel
+
+# Диапазоны храним как полуинтервалы [start, end)
+Range = Tuple[int, int]
+T = TypeVar("T")
+
+_LOCKS: Dict[str, asyncio.Lock] = {}
+
+
+def _lock(upload_id: str) -> asyncio.Lock:
+    """Одна блокировка на upload: запись частей и финализация не пересекаются."""
+    return _LOCKS.setdefault(upload_id, asyncio.Lock())
+
+
+class UploadError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    out: List[Range] = []
+    for start, end in sorted(ranges):
+        if out and start <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], end))
+        else:
+            out.append((start, end))
+    return out
+
+
+def missing_ranges(ranges: List[Range], total: int) -> List[Range]:
+    out: List[Range] = []
+    pos = 0
+    for start, end in merge_ranges(ranges):
+        if start > pos:
+            out.append((pos, start))
+        pos = max(pos, end)
+    if pos < total:
+        out.append((pos, total))
+    return out
+
+
+def parse_content_range(header: str | None) -> Tuple[int, int, int]:
+    """'bytes 0-1048575/2097152' -> (start, end_exclusive, total)"""
+    if not header or not header.startswith("bytes "):
+        raise UploadError(400, "Content-Range header required: bytes start-end/total")
+    try:
+        span, total = header[6:].split("/", 1)
+        start, end = span.split("-", 1)
+        return int(start), int(end) + 1, int(total)
+    except ValueError:
+        raise UploadError(400, f"bad Content-Range: {header}")
+
+
+def part_path(upload_id: str) -> str:
+    return os.path.join(settings.app.upload_dir, f"{upload_id}.part")
+
+
+def _ranges(up: UploadModel) -> List[Range]:
+    return [tuple(r) for r in json.loads(up.ranges_json or "[]")]  # type: ignore[misc]
+
+
+def progress(up: UploadModel) -> dict:
+    ranges = _ranges(up)
+    received = sum(e - s for s, e in ranges)
+    contiguous = ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+    return {
+        "upload_id": up.id,
+        "session_id": up.session_id,
+        "status": up.status,
+        "total_bytes": up.total_bytes,
+        "received_bytes": received,
+        "contiguous_bytes": contiguous,
+        "ranges": [list(r) for r in ranges],
+        "missing": [list(r) for r in missing_ranges(ranges, up.total_bytes)],
+    }
+
+
+def create_upload(session_id: str, lang: str, filename: str, total_bytes: int, sha256: str = "",
+                  tier: str | None = None) -> UploadModel:
+    tier = tier or settings.app.tier
+    limit_mb = settings.limits[tier].max_file_mb
+    if total_bytes <= 0:
+        raise UploadError(400, "size must be positive")
+    if total_bytes > limit_mb * 1024 * 1024:
+        raise UploadError(413, f"file too large for tier {tier}")
+    os.makedirs(settings.app.upload_dir, exist_ok=True)
+    up = UploadModel(session_id=session_id, lang=lang, filename=filename, total_bytes=total_bytes, sha256=sha256.lower())
+    # разреженный файл нужного размера: части пишутся по своим смещениям
+    with open(part_path(up.id), "wb") as f:
+        f.truncate(total_bytes)
+    with get_session() as s:
+        s.add(up); s.commit(); s.refresh(up)
+    return up
+
+
+def get_upload(upload_id: str) -> UploadModel:
+    with get_session() as s:
+        up = s.get(UploadModel, upload_id)
+    if not up:
+        raise UploadError(404, "upload not found")
+    return up
+
+
+async def write_part(upload_id: str, content_range: str | None, body: AsyncIterator[bytes], sha256: str | None) -> UploadModel:
+    """
+    Пишет часть [start, end) по смещению. Если передан X-Content-SHA256 и сумма не
+    сошлась — диапазон не засчитывается (байты будут перезаписаны повторной отправкой).
+    """
+    start, end, total = parse_content_range(content_range)
+    up = get_upload(upload_id)
+    if up.status != "open":
+        raise UploadError(409, f"upload is {up.status}")
+    if total != up.total_bytes or start < 0 or end > total or start >= end:
+        raise UploadError(416, f"range {start}-{end - 1}/{total} does not fit {up.total_bytes}")
+
+    async with _lock(upload_id):
+        # статус — под блокировкой: финализация могла начаться, пока часть ждала очереди
+        up = get_upload(upload_id)
+        if up.status != "open":
+            raise UploadError(409, f"upload is {up.status}")
+        h = hashlib.sha256()
+        written = 0
+        # файловый I/O — в потоке, чтобы многогигабайтные загрузки не держали event loop
+        f = await asyncio.to_thread(open, part_path(upload_id), "r+b")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            async for piece in body:
+                if written + len(piece) > end - start:
+                    raise UploadError(400, "body is longer than Content-Range")
+                await asyncio.to_thread(_write, f, h, piece)
+                written += len(piece)
+        finally:
+            await asyncio.to_thread(f.close)
+        if written != end - start:
+            raise UploadError(400, f"body has {written} bytes, Content-Range expects {end - start}")
+        if sha256 and h.hexdigest() != sha256.lower():
+            raise UploadError(422, "part checksum mismatch")
+
+        with get_session() as s:
+            up = s.get(UploadModel, upload_id)
+            up.ranges_json = json.dumps(merge_ranges(_ranges(up) + [(start, end)]))
+            up.updated_at = datetime.utcnow()
+            s.add(up); s.commit(); s.refresh(up)
+        return up
+
+
+def _write(f, h, piece: bytes) -> None:
+    f.write(piece)
+    h.update(piece)
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for piece in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(piece)
+    return h.hexdigest()
+
+
+def _set_status(upload_id: str, status: str, expected: str) -> bool:
+    """Условная смена статуса (expected -> status); False — его уже сменил другой запрос/процесс."""
+    with get_session() as s:
+        res = s.execute(
+            update(UploadModel)
+            .where(UploadModel.id == upload_id, UploadModel.status == expected)
+            .values(status=status, updated_at=datetime.utcnow())
+        )
+        s.commit()
+        return res.rowcount == 1
+
+
+async def finalize_upload(upload_id: str, process: Callable[[UploadModel], Awaitable[T]]) -> T:
+    """
+    Проверяет полноту и (опционально) сумму всего файла, затем запускает process(upload).
+    На время обработки upload в статусе processing (повторный complete и PUT получают 409);
+    complete — только после успеха, при ошибке upload снова open и complete можно повторить.
+    """
+    async with _lock(upload_id):
+        up = get_upload(upload_id)
+        if up.status != "open":
+            raise UploadError(409, f"upload is {up.status}")
+        missing = missing_ranges(_ranges(up), up.total_bytes)
+        if missing:
+            raise UploadError(409, f"upload incomplete, missing {missing[:5]}")
+        if up.sha256 and await asyncio.to_thread(_file_sha256, part_path(upload_id)) != up.sha256:
+            raise UploadError(422, "file checksum mismatch")
+        if not _set_status(upload_id, "processing", "open"):
+            raise UploadError(409, "upload is already being finalized")
+    try:
+        result = await process(up)
+    except BaseException:
+        _set_status(upload_id, "open", "processing")
+        raise
+    if _set_status(upload_id, "complete", "processing"):
+        _remove_part(upload_id)
+    _LOCKS.pop(upload_id, None)
+    return result
+
+
+def _remove_part(upload_id: str) -> None:
+    try:
+        os.remove(part_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+async def abort_upload(upload_id: str) -> None:
+    """Отмена только открытого upload: файл обрабатываемого или завершённого не трогаем (409)."""
+    async with _lock(upload_id):
+        up = get_upload(upload_id)
+        if up.status != "open" or not _set_status(upload_id, "aborted", "open"):
+            raise UploadError(409, f"upload is {up.status}")
+        _remove_part(upload_id)
+    _LOCKS.pop(upload_id, None)
@@ -1,32 +1,269 @@
 from __future__ import annotations
-import hmac, hashlib, json
+import asyncio, hmac, hashlib, json, logging, time
 import httpx
-from typing import Optional
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
 from sqlmodel import select
+from ..config import settings
+from ..delivery.client import deliver_governed
 from ..db import get_session
-from ..models import WebhookModel
+from ..models import WebhookModel, ChunkModel
 
 HEADER_NAME = "X-Signature"
 
+logger = logging.getLogger(__name__)
+
+OnDelivered = Callable[[str, Dict[str, Any]], None]
+
+
+class WebhookRegistry:
+    """
+    Кэш активных подписок. В своём процессе сбрасывается сразу при изменении через /v1/hook,
+    остальные воркеры перечитывают БД не реже раза в ttl_sec.
+    """
+
+    def __init__(self, ttl_sec: float) -> None:
+        self.ttl_sec = ttl_sec
+        self._cache: Optional[List[WebhookModel]] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        self._cache = None
+
+    def active(self) -> List[WebhookModel]:
+        if self._cache is None or time.monotonic() - self._loaded_at >= self.ttl_sec:
+            with get_session() as s:
+                self._cache = list(s.exec(select(WebhookModel).where(WebhookModel.active == True)))  # noqa: E712
+            self._loaded_at = time.monotonic()
+        return self._cache
+
+
+REGISTRY = WebhookRegistry(settings.app.webhook_registry_ttl_sec)
+
+
 async def get_active_webhook() -> Optional[WebhookModel]:
-    with get_session() as s:
-        wh = s.exec(select(WebhookModel).where(WebhookModel.active == True)).first()  # noqa: E712
-        return wh
+    hooks = REGISTRY.active()
+    return hooks[0] if hooks else None
+
 
-async def set_webhook(url: str, secret: str) -> WebhookModel:
+async def set_webhook(url: str, secret: str, name: str = "module2") -> WebhookModel:
     with get_session() as s:
-        wh = s.exec(select(WebhookModel).where(WebhookModel.active == True)).first()  # noqa: E712
+        wh = s.exec(select(WebhookModel).where(WebhookModel.name == name, WebhookModel.active == True)).first()  # noqa: E712
         if wh:
             wh.url = url
             wh.secret = secret
         else:
-            wh = WebhookModel(url=url, secret=secret, active=True)
+            wh = WebhookModel(name=name, url=url, secret=secret, active=True)
             s.add(wh)
         s.commit(); s.refresh(wh)
-        return wh
+    REGISTRY.invalidate()
+    return wh
 
-async def send_chunk(webhook: WebhookModel, payload: dict) -> None:
+
+async def delete_webhook(name: str) -> bool:
+    with get_session() as s:
+        rows = s.exec(select(WebhookModel).where(WebhookModel.name == name, WebhookModel.active == True)).all()  # noqa: E712
+        for wh in rows:
+            wh.active = False
+            s.add(wh)
+        s.commit()
+    REGISTRY.invalidate()
+    return bool(rows)
+
+
+def _signed(secret: str, payload: dict) -> tuple[bytes, dict]:
     body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-    sig = hmac.new(webhook.secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        await client.post(webhook.url, content=body, headers={HEADER_NAME: f"sha256={sig}", "Content-Type": "application/json"})
\ No newline at end of file
+    sig = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return body, {HEADER_NAME: f"sha256={sig}", "Content-Type": "application/json"}
+
+
+async def _post_chunk(webhook: WebhookModel, payload: dict, client: Optional[httpx.AsyncClient] = None) -> httpx.Response:
+    body, headers = _signed(webhook.secret, payload)
+    if client is not None:
+        return await client.post(webhook.url, content=body, headers=headers)
+    async with httpx.AsyncClient(timeout=5.0) as c:
+        return await c.post(webhook.url, content=body, headers=headers)
+
+
+async def send_chunk(webhook: WebhookModel, payload: dict, client: Optional[httpx.AsyncClient] = None) -> None:
+    """
+    Доставка одного чанка подписчику через тот же регулятор (AIMD + предохранитель) и те же
+    повторы, что и доставка в Модуль 2 (app/delivery/client.py).
+    """
+    resp = await deliver_governed(webhook.url, lambda: _post_chunk(webhook, payload, client))
+    if resp.status_code >= 400:
+        raise RuntimeError(f"webhook {webhook.name} answered {resp.status_code}")
+
+
+def _payload(row: ChunkModel) -> Dict[str, Any]:
+    return {
+        "session_id": row.session_id,
+        "chunk_id": row.chunk_id,
+        "seq": row.seq,
+        "text": row.text,
+        "overlap_prefix": row.overlap_prefix,
+        "lang": row.lang,
+        "policy": json.loads(row.policy_json) if row.policy_json else {},
+        "hash": row.hash,
+        "created_at": row.created_at.isoformat() + "Z",
+    }
+
+
+def _load_chunks(session_id: str, from_seq: int, limit: int) -> List[Dict[str, Any]]:
+    with get_session() as s:
+        rows = s.exec(
+            select(ChunkModel)
+            .where(ChunkModel.session_id == session_id, ChunkModel.seq >= from_seq)
+            .order_by(ChunkModel.seq.asc())
+            .limit(limit)
+        ).all()
+    return [_payload(r) for r in rows]
+
+
+class Subscriber:
+    """
+    Одна подписка: своя ограниченная очередь и свой отправитель, порядок seq сохраняется.
+    При переполнении очереди чанк не теряется: запоминается первый пропущенный seq сессии,
+    и когда очередь опустеет, пропуск дочитывается из БД (чанки сохраняются до публикации).
+    """
+
+    def __init__(self, hook: WebhookModel, maxsize: int, on_delivered: Optional[OnDelivered] = None) -> None:
+        self.hook = hook
+        self.maxsize = maxsize
+        self.on_delivered = on_delivered
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.backfilled = 0
+        self._missed: Dict[str, int] = {}  # session_id -> первый недоставленный seq
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_task(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = loop.create_task(self._run(), name=f"webhook-{self.hook.name}")
+
+    def offer(self, payload: Dict[str, Any]) -> bool:
+        self._ensure_task()
+        sid = payload.get("session_id")
+        if sid in self._missed:
+            self.dropped += 1
+            return False  # сессия отстаёт — чанк будет дочитан из БД следом за пропущенными, по порядку
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            # медленный подписчик не тормозит остальных; чанк дочитается из БД, если он там есть
+            self.dropped += 1
+            if sid is not None:
+                self._missed[sid] = payload["seq"]
+            logger.warning("webhook queue full, chunk deferred" if sid is not None else "webhook queue full, chunk dropped",
+                           extra={"extra": {"name": self.hook.name, "session_id": sid, "seq": payload.get("seq")}})
+            return False
+
+    async def _backfill(self) -> None:
+        """Очередь пуста: перекладываем в неё пропущенные чанки из БД, начиная с первого пропущенного seq."""
+        for sid, seq in list(self._missed.items()):
+            free = self.maxsize - self._queue.qsize()
+            if free <= 0:
+                return
+            rows = await asyncio.to_thread(_load_chunks, sid, seq, free)
+            for p in rows:
+                self._queue.put_nowait(p)
+            self.backfilled += len(rows)
+            if len(rows) < free:
+                del self._missed[sid]  # дочитали до конца — новые чанки сессии снова идут через очередь
+            else:
+                self._missed[sid] = rows[-1]["seq"] + 1
+            logger.info("webhook backfill", extra={"extra": {"name": self.hook.name, "session_id": sid,
+                                                             "from_seq": seq, "count": len(rows)}})
+
+    async def _run(self) -> None:
+        q = self._queue
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            while True:
+                payload = await q.get()
+                try:
+                    await send_chunk(self.hook, payload, client)
+                    self.sent += 1
+                    if self.on_delivered:
+                        self.on_delivered(self.hook.name, payload)
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning("webhook delivery failed", extra={"extra": {"name": self.hook.name, "session_id": payload.get("session_id"),
+                                                                               "seq": payload.get("seq"), "error": str(e)}})
+                finally:
+                    if q.empty() and self._missed:
+                        try:
+                            await self._backfill()
+                        except Exception:
+                            logger.exception("webhook backfill failed")
+                    q.task_done()
+
+    async def drain(self) -> None:
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.hook.url,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "backfilled": self.backfilled,
+            "lagging_sessions": len(self._missed),
+        }
+
+
+class WebhookFanout:
+    """Рассылка чанков всем активным подпискам параллельно."""
+
+    def __init__(self, registry: WebhookRegistry, maxsize: int, on_delivered: Optional[OnDelivered] = None) -> None:
+        self.registry = registry
+        self.maxsize = maxsize
+        self.on_delivered = on_delivered
+        self._subs: Dict[str, Subscriber] = {}
+
+    def _sync(self) -> List[Subscriber]:
+        hooks = {h.name: h for h in self.registry.active()}
+        for name in list(self._subs):
+            if name not in hooks:
+                self._subs.pop(name).stop()
+        for name, h in hooks.items():
+            sub = self._subs.get(name)
+            if sub is None:
+                self._subs[name] = Subscriber(h, self.maxsize, self.on_delivered)
+            else:
+                sub.hook = h  # новый url/secret подхватывается со следующей отправки
+        return list(self._subs.values())
+
+    def publish(self, payload: Dict[str, Any]) -> int:
+        """Кладёт чанк в очереди подписчиков, не дожидаясь отправки; возвращает число принявших."""
+        return sum(sub.offer(payload) for sub in self._sync())
+
+    async def drain(self) -> None:
+        await asyncio.gather(*(sub.drain() for sub in list(self._subs.values())))
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: sub.stats() for name, sub in self._subs.items()}
+
+
+def mark_delivered(name: str, payload: Dict[str, Any]) -> None:
+    # delivered_at — время первой успешной доставки любому подписчику
+    with get_session() as s:
+        row = s.exec(select(ChunkModel).where(ChunkModel.chunk_id == payload["chunk_id"])).first()
+        if row and row.delivered_at is None:
+            row.delivered_at = datetime.utcnow(); s.add(row); s.commit()
+
+
+FANOUT = WebhookFanout(REGISTRY, settings.app.webhook_queue_size, on_delivered=mark_delivered)
@@ -0,0 +1,25 @@
+import uuid
+from fastapi.testclient import TestClient
+from app.config import settings, LimitCfg
+from app.main import app
+from app.services.admission import ADMISSION
+
+client = TestClient(app)
+
+
+def test_over_quota_client_cannot_switch_tier_pool(monkeypatch):
+    monkeypatch.setattr(settings.app, "tier", "Basic")
+    monkeypatch.setattr(settings.app, "api_keys", {})
+    busy = ADMISSION.stats().get("Basic", {}).get("sessions", 0)
+    monkeypatch.setitem(settings.limits, "Basic", LimitCfg(max_sessions=busy + 1))
+    first, second = (f"adm-{uuid.uuid4().hex[:8]}" for _ in range(2))
+
+    with client.websocket_connect(f"/v1/stream?session_id={first}") as ws:
+        assert ws.receive_json()["type"] == "hello"
+        # квота Basic исчерпана; ?tier=Premium не переводит в пул Premium
+        with client.websocket_connect(f"/v1/stream?session_id={second}&tier=Premium") as ws2:
+            err = ws2.receive_json()
+        assert err["error"] == "over_capacity" and err["tier"] == "Basic"
+        assert second not in ADMISSION._session_tier
+        ws.send_json({"type": "eos"})
+        assert ws.receive_json()["type"] == "final_full"
@@ -0,0 +1,51 @@
+import io
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlmodel import select
+from app.main import app
+from app.db import get_session
+from app.models import SessionModel, ChunkModel
+from app.services import archive
+
+client = TestClient(app)
+
+def test_archived_session_still_readable(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive.ARCHIVE, "root", str(tmp_path))
+    sid = "arch1"
+    files = {"file": ("t.webm", io.BytesIO(b"webm data"), "audio/webm")}
+    assert client.post(f"/v1/transcribe?session_id={sid}", files=files).status_code == 200
+    text = client.get(f"/v1/session/{sid}/text").json()["text_full"]
+    chunks = client.get(f"/v1/session/{sid}/chunks").json()
+
+    with get_session() as s:
+        assert s.get(SessionModel, sid).status == "closed"  # /v1/transcribe закрывает свою сессию
+    assert archive.archive_sessions(now=datetime.utcnow() + timedelta(days=30)) >= 1
+    with get_session() as s:
+        assert s.get(SessionModel, sid) is None
+        assert not s.exec(select(ChunkModel).where(ChunkModel.session_id == sid)).all()
+
+    assert client.get(f"/v1/session/{sid}/text").json()["text_full"] == text
+    r = client.get(f"/v1/session/{sid}/chunks")
+    assert [c["seq"] for c in r.json()] == [c["seq"] for c in chunks]
+    assert client.get(f"/v1/session/{sid}/chunks", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+    assert client.get("/v1/session/missing/text").status_code == 404
+
+
+def test_archive_claims_rows_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive.ARCHIVE, "root", str(tmp_path))
+    sid = "arch2"
+    files = {"file": ("t.webm", io.BytesIO(b"webm data"), "audio/webm")}
+    assert client.post(f"/v1/transcribe?session_id={sid}", files=files).status_code == 200
+
+    assert archive._claim([sid]) == [sid]  # сессию уже забрал архиватор другого воркера
+    assert archive._claim([sid]) == []
+    archive.archive_sessions(now=datetime.utcnow() + timedelta(days=30))
+    assert not archive.ARCHIVE.contains(sid)
+    with get_session() as s:
+        assert s.get(SessionModel, sid).status == "archiving"
+
+    assert archive.reclaim() >= 1
+    archive.archive_sessions(now=datetime.utcnow() + timedelta(days=30))
+    assert archive.ARCHIVE.contains(sid)
+    with get_session() as s:
+        assert s.get(SessionModel, sid) is None
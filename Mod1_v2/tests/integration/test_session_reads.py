@@ -0,0 +1,48 @@
+import io, json
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db import get_session
+from app.models import ChunkModel
+
+client = TestClient(app)
+
+def _make_session(sid):
+    files = {"file": ("t.webm", io.BytesIO(b"webm data"), "audio/webm")}
+    assert client.post(f"/v1/transcribe?session_id={sid}", files=files).status_code == 200
+
+def test_chunks_pagination_etag_and_ndjson():
+    sid = "reads1"
+    _make_session(sid)
+    with get_session() as s:
+        for seq in (2, 3):
+            s.add(ChunkModel(session_id=sid, chunk_id=f"{sid}-{seq}", seq=seq, text=f"Чанк {seq}.", hash=str(seq)))
+        s.commit()
+    full = client.get(f"/v1/session/{sid}/chunks").json()
+    assert [c["seq"] for c in full] == [1, 2, 3]
+
+    # постранично по одному чанку через курсор
+    seen, url = [], f"/v1/session/{sid}/chunks?limit=1"
+    while url:
+        r = client.get(url)
+        seen += [c["seq"] for c in r.json()]
+        nxt = r.headers.get("X-Next-Cursor")
+        url = f"/v1/session/{sid}/chunks?limit=1&cursor={nxt}" if nxt else None
+    assert seen == [c["seq"] for c in full]
+
+    last = full[-1]["seq"]
+    r = client.get(f"/v1/session/{sid}/chunks?after_seq={last}")
+    assert r.json() == []
+    r2 = client.get(f"/v1/session/{sid}/chunks?after_seq={last}", headers={"If-None-Match": r.headers["ETag"]})
+    assert r2.status_code == 304
+
+    r = client.get(f"/v1/session/{sid}/chunks?format=ndjson")
+    assert [json.loads(l)["seq"] for l in r.text.splitlines()] == [c["seq"] for c in full]
+
+def test_text_etag_and_offset():
+    sid = "reads2"
+    _make_session(sid)
+    r = client.get(f"/v1/session/{sid}/text")
+    text = r.json()["text_full"]
+    assert client.get(f"/v1/session/{sid}/text", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+    assert client.get(f"/v1/session/{sid}/text?offset=5").json()["text_full"] == text[5:]
+    assert client.get(f"/v1/session/{sid}/text?format=text").text == text
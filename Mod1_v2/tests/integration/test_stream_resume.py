@@ -0,0 +1,46 @@
+import uuid
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def test_stream_resume_reports_offset():
+    sid = f"resume-{uuid.uuid4().hex[:8]}"
+    with client.websocket_connect(f"/v1/stream?session_id={sid}") as ws:
+        hello = ws.receive_json()
+        assert hello["type"] == "hello" and hello["offset"] == 0
+        ws.send_bytes(b"a" * 10)
+        assert ws.receive_json()["offset"] == 10
+
+    # переподключение: сервер помнит принятый объём, сессия не финализирована
+    with client.websocket_connect(f"/v1/stream?session_id={sid}") as ws:
+        hello = ws.receive_json()
+        assert hello["resumed"] is True
+        assert hello["offset"] == 10
+        # клиент пересылает с 6-го байта: перекрытие отбрасывается
+        ws.send_json({"type": "resume", "offset": 6})
+        assert ws.receive_json() == {"type": "resumed", "session_id": sid, "offset": 10}
+        ws.send_bytes(b"a" * 4 + b"b" * 5)
+        assert ws.receive_json()["offset"] == 15
+        ws.send_json({"type": "resume", "offset": 99})
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_stream_resume_rejects_bad_offset_and_closed_session():
+    sid = f"resume-{uuid.uuid4().hex[:8]}"
+    with client.websocket_connect(f"/v1/stream?session_id={sid}") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "resume", "offset": "abc"})
+        err = ws.receive_json()
+        assert err["type"] == "error" and "invalid offset" in err["message"]
+        ws.send_json({"type": "resume", "offset": None})
+        assert ws.receive_json()["type"] == "error"
+        # соединение живо после ошибки
+        ws.send_bytes(b"a" * 3)
+        assert ws.receive_json()["offset"] == 3
+        ws.send_json({"type": "eos"})
+        assert ws.receive_json()["type"] == "final_full"
+
+    with client.websocket_connect(f"/v1/stream?session_id={sid}") as ws:
+        err = ws.receive_json()
+        assert err == {"type": "error", "session_id": sid, "message": "session is closed"}
@@ -14,4 +14,16 @@ def test_batch_transcribe_stub():
     assert "text_full" in data and len(data["text_full"]) > 0
     assert len(data["chunks"]) >= 1
     seqs = [c["seq"] for c in data["chunks"]]
-    assert seqs == sorted(seqs)
\ No newline at end of file
+    assert seqs == sorted(seqs)
+
+def test_tier_is_not_client_selectable(monkeypatch):
+    from app.config import settings, LimitCfg
+    monkeypatch.setattr(settings.app, "api_keys", {"k-prem": "Premium"})
+    monkeypatch.setattr(settings.app, "tier", "Basic")
+    monkeypatch.setitem(settings.limits, "Basic", LimitCfg(max_file_mb=0))
+    files = lambda: {"file": ("a.webm", io.BytesIO(b"webm data"), "audio/webm")}  # noqa: E731
+    # ?tier= не параметр API: действует лимит тарифа по умолчанию
+    r = client.post("/v1/transcribe?session_id=tier1&tier=Premium", files=files())
+    assert r.status_code == 413 and "Basic" in r.json()["detail"]
+    assert client.post("/v1/transcribe?session_id=tier1", files=files(), headers={"X-API-Key": "nope"}).status_code == 401
+    assert client.post("/v1/transcribe?session_id=tier2", files=files(), headers={"X-API-Key": "k-prem"}).status_code == 200
@@ -0,0 +1,42 @@
+import io, json
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def test_batch_endpoint_streams_per_file_results():
+    files = [("files", (f"f{i}.webm", io.BytesIO(b"webm data"), "audio/webm")) for i in range(3)]
+    r = client.post("/v1/transcribe/batch?lang=ru-RU", files=files)
+    assert r.status_code == 200
+    lines = [json.loads(l) for l in r.text.splitlines() if l]
+    items, summary = lines[:-1], lines[-1]
+    assert sorted(it["index"] for it in items) == [0, 1, 2]
+    assert all(it["status"] == "ok" and it["result"]["chunks"] for it in items)
+    assert summary["total"] == 3 and summary["ok"] == 3
+
+def test_batch_manifest_requires_batch_root():
+    r = client.post("/v1/transcribe/batch", data={"manifest": json.dumps(["a.wav"])})
+    assert r.status_code == 400
+
+def test_batch_items_wait_instead_of_max_queued(monkeypatch):
+    from app.config import settings, LimitCfg
+    from app.services.admission import ADMISSION
+    monkeypatch.setattr(settings.admission, "enabled", True)
+    # одна задача в обработке, одна в очереди — пакет из 8 файлов всё равно проходит целиком
+    monkeypatch.setitem(settings.limits, settings.app.tier, LimitCfg(max_asr_seconds=1, max_queued=1))
+    rejected = ADMISSION.stats().get(settings.app.tier, {}).get("rejected", 0)
+    files = [("files", (f"f{i}.webm", io.BytesIO(b"webm data"), "audio/webm")) for i in range(8)]
+    r = client.post("/v1/transcribe/batch", files=files)
+    assert r.status_code == 200
+    lines = [json.loads(l) for l in r.text.splitlines() if l]
+    assert all(it["status"] == "ok" for it in lines[:-1])
+    assert lines[-1]["ok"] == 8
+    assert ADMISSION.stats()[settings.app.tier]["rejected"] == rejected
+
+def test_batch_manifest_rejects_malformed_entries(tmp_path, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings.app, "batch_root", str(tmp_path))
+    (tmp_path / "a.wav").write_bytes(b"wav data")
+    for bad in ([1], [None], [["a.wav"]], [{"path": 5}], [{"path": "a.wav", "lang": ["ru"]}], {"path": "a.wav"}):
+        r = client.post("/v1/transcribe/batch", data={"manifest": json.dumps(bad)})
+        assert r.status_code == 400, bad
@@ -0,0 +1,85 @@
+import hashlib
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def test_resumable_upload_flow():
+    data = b"x" * 3000 + b"y" * 2000
+    r = client.post("/v1/uploads", json={"size": len(data), "session_id": "up1", "sha256": hashlib.sha256(data).hexdigest()})
+    assert r.status_code == 201
+    uid = r.json()["upload_id"]
+
+    # вторая часть пришла раньше первой
+    part = data[3000:]
+    r = client.put(f"/v1/uploads/{uid}", content=part, headers={
+        "Content-Range": f"bytes 3000-{len(data) - 1}/{len(data)}",
+        "X-Content-SHA256": hashlib.sha256(part).hexdigest(),
+    })
+    assert r.status_code == 200
+    assert r.json()["missing"] == [[0, 3000]]
+
+    # битая часть не засчитывается
+    r = client.put(f"/v1/uploads/{uid}", content=data[:3000], headers={
+        "Content-Range": f"bytes 0-2999/{len(data)}", "X-Content-SHA256": "00" * 32,
+    })
+    assert r.status_code == 422
+    assert client.post(f"/v1/uploads/{uid}/complete").status_code == 409
+
+    r = client.put(f"/v1/uploads/{uid}", content=data[:3000], headers={"Content-Range": f"bytes 0-2999/{len(data)}"})
+    assert r.json()["received_bytes"] == len(data)
+
+    r = client.post(f"/v1/uploads/{uid}/complete")
+    assert r.status_code == 200
+    assert r.json()["session_id"] == "up1"
+    assert len(r.json()["chunks"]) >= 1
+
+
+def test_failed_processing_leaves_upload_retryable(monkeypatch):
+    import os
+    from app.routers import transcribe
+    from app.services.uploads import part_path
+
+    data = b"z" * 4000
+    uid = client.post("/v1/uploads", json={"size": len(data), "session_id": "up2"}).json()["upload_id"]
+    client.put(f"/v1/uploads/{uid}", content=data, headers={"Content-Range": f"bytes 0-{len(data) - 1}/{len(data)}"})
+
+    real = transcribe.transcribe_async
+
+    async def broken(*a, **kw):
+        raise RuntimeError("asr down")
+
+    monkeypatch.setattr(transcribe, "transcribe_async", broken)  # падает внутри настоящего process_file
+    with pytest.raises(RuntimeError):
+        client.post(f"/v1/uploads/{uid}/complete")
+    assert client.get(f"/v1/uploads/{uid}").json()["status"] == "open"
+    assert os.path.exists(part_path(uid))  # собранный файл не удалён — повтор возможен
+
+    monkeypatch.setattr(transcribe, "transcribe_async", real)
+    r = client.post(f"/v1/uploads/{uid}/complete")
+    assert r.status_code == 200 and r.json()["session_id"] == "up2"
+    assert client.get(f"/v1/uploads/{uid}").json()["status"] == "complete"
+    assert not os.path.exists(part_path(uid))
+    assert client.post(f"/v1/uploads/{uid}/complete").status_code == 409
+
+
+def test_abort_only_open_upload():
+    import os
+    from app.services.uploads import _set_status, part_path
+
+    data = b"a" * 1000
+    uid = client.post("/v1/uploads", json={"size": len(data), "session_id": "up3"}).json()["upload_id"]
+    client.put(f"/v1/uploads/{uid}", content=data, headers={"Content-Range": f"bytes 0-{len(data) - 1}/{len(data)}"})
+
+    assert _set_status(uid, "processing", "open")  # complete уже идёт
+    assert client.delete(f"/v1/uploads/{uid}").status_code == 409
+    assert os.path.exists(part_path(uid))  # файл под ASR-задачей не тронут
+    assert _set_status(uid, "complete", "processing")
+    assert client.delete(f"/v1/uploads/{uid}").status_code == 409
+    assert client.get(f"/v1/uploads/{uid}").json()["status"] == "complete"
+
+    uid = client.post("/v1/uploads", json={"size": len(data), "session_id": "up4"}).json()["upload_id"]
+    assert client.delete(f"/v1/uploads/{uid}").status_code == 200
+    assert client.get(f"/v1/uploads/{uid}").json()["status"] == "aborted"
+    assert client.delete(f"/v1/uploads/{uid}").status_code == 409
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.config import settings, LimitCfg
+from app.services.admission import AdmissionController, Rejected
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setitem(settings.limits, "Basic", LimitCfg(max_sessions=2, max_asr_seconds=100, max_queued=1))
+
+def test_session_cap_and_release(limits):
+    adm = AdmissionController()
+    adm.admit_session("s1", "Basic")
+    adm.admit_session("s2", "Basic")
+    adm.admit_session("s1", "Basic")  # переподключение не занимает новый слот
+    with pytest.raises(Rejected) as e:
+        adm.admit_session("s3", "Basic")
+    assert e.value.reason == "max_sessions" and e.value.retry_after >= 1
+    adm.release_session("s1")
+    adm.admit_session("s3", "Basic")
+
+def test_jobs_queue_then_reject(limits):
+    adm = AdmissionController()
+    order, positions = [], []
+
+    async def job(name, sec, gate):
+        async with adm.job("Basic", sec, positions.append):
+            order.append(name)
+            await gate.wait()
+
+    async def run():
+        g1, g2 = asyncio.Event(), asyncio.Event()
+        t1 = asyncio.ensure_future(job("a", 80, g1))
+        await asyncio.sleep(0)
+        t2 = asyncio.ensure_future(job("b", 50, g2))  # не влезает в 100 сек — ждёт
+        await asyncio.sleep(0)
+        assert order == ["a"] and positions == [1]
+        with pytest.raises(Rejected):
+            adm.check_job("Basic")  # очередь из одной задачи уже занята
+        g1.set(); g2.set()
+        await asyncio.gather(t1, t2)
+        assert order == ["a", "b"]
+        assert adm.stats()["Basic"] == {"sessions": 0, "running_asr_sec": 0.0, "running_jobs": 0, "queued": 0, "rejected": 1}
+    asyncio.run(run())
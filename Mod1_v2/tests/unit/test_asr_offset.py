@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+import numpy as np
+from app.services import asr
+from app.services.asr import ASREngine, SAMPLE_RATE
+
+
+def _tone(sec):
+    t = np.arange(int(sec * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def _silence(sec):
+    return np.zeros(int(sec * SAMPLE_RATE), dtype=np.float32)
+
+
+class _VadModel:
+    """Как faster-whisper с vad_filter: речь — только непустые участки, тишина выброшена."""
+
+    def __init__(self):
+        self.audio = None
+
+    def transcribe(self, audio, **kw):
+        self.audio = audio
+        voiced = int(np.count_nonzero(audio))
+        segs = [SimpleNamespace(text=f"voiced={voiced}")]
+        return iter(segs), SimpleNamespace(duration=len(audio) / SAMPLE_RATE)
+
+
+def test_offset_is_applied_before_vad(monkeypatch):
+    # речь 1с, пауза 2с, речь 1с | чекпоинт на 4с | пауза 1с, речь 1с
+    signal = np.concatenate([_tone(1), _silence(2), _tone(1), _silence(1), _tone(1)])
+    monkeypatch.setattr(asr, "decode_audio", lambda path, sampling_rate: signal)
+
+    engine = ASREngine(stub=True)
+    engine.stub, engine.pipeline, engine.model = False, None, _VadModel()
+    res = engine.transcribe_file("rec.wav", offset_sec=4.0)
+
+    # в модель ушёл ровно хвост после отметки по исходной шкале, с последней фразой целиком
+    assert np.array_equal(engine.model.audio, signal[4 * SAMPLE_RATE:])
+    assert res.text == f"voiced={np.count_nonzero(_tone(1))}"
+    # следующий чекпоинт считается по длительности всего файла
+    assert res.duration_sec == 6.0
@@ -0,0 +1,50 @@
+import json
+from app.config import Settings, apply_tuned
+from app.services.autotune import autotune, candidates
+
+def test_candidates_do_not_oversubscribe_cores():
+    profs = candidates(cores=8, concurrency=4)
+    assert profs
+    assert all(p["cpu_threads"] * p["num_workers"] <= 8 for p in profs)
+
+def test_autotune_picks_fastest_within_rtf_and_persists(tmp_path):
+    clip = tmp_path / "clip.wav"
+    clip.write_bytes(b"RIFF")
+    out = tmp_path / "tuned.json"
+    profiles = [
+        {"compute_type": "int8", "cpu_threads": 2, "num_workers": 2, "beam_size": 5, "batch_size": 1},
+        {"compute_type": "int8", "cpu_threads": 2, "num_workers": 2, "beam_size": 1, "batch_size": 1},
+        {"compute_type": "int8", "cpu_threads": 4, "num_workers": 1, "beam_size": 1, "batch_size": 1},
+    ]
+    fake = {5: (0.4, 3.0), 1: (0.2, 6.0)}
+
+    def bench(prof, clip, concurrency, repeats):
+        rtf, thr = fake[prof["beam_size"]]
+        if prof["num_workers"] == 1:
+            rtf, thr = 0.9, 9.0  # быстрее, но не укладывается в RTF
+        return {"rtf": rtf, "throughput": thr, "wall_sec": 1.0}
+
+    report = autotune(str(clip), 2, str(out), max_rtf=0.5, profiles=profiles, bench=bench)
+    assert report["whisper"]["beam_size"] == 1 and report["whisper"]["num_workers"] == 2
+
+    s = Settings()
+    s.whisper.tuned_path = str(out)
+    assert apply_tuned(s)
+    assert s.whisper.beam_size == 1 and s.whisper.cpu_threads == 2
+    assert json.loads(out.read_text())["concurrency"] == 2
+
+def test_ensure_tuned_skips_missing_clip(tmp_path, monkeypatch):
+    from app.config import settings
+    from app.services import autotune as at
+    monkeypatch.setattr(settings.app, "stub_asr", False)
+    monkeypatch.setattr(settings.whisper, "tuned_path", str(tmp_path / "tuned.json"))
+    monkeypatch.setattr(settings.whisper, "autotune_clip", str(tmp_path / "missing.wav"))
+    monkeypatch.setattr(at, "autotune", lambda *a, **kw: (_ for _ in ()).throw(AssertionError("must not run")))
+    assert at.ensure_tuned() is False
+
+def test_candidates_explore_batch_size_only_with_batched_pipeline(monkeypatch):
+    from app.services import autotune as at
+    monkeypatch.setattr(at, "_batched_supported", lambda: True)
+    assert {p["batch_size"] for p in candidates(cores=8, concurrency=2)} == set(at.BATCH_SIZES)
+    monkeypatch.setattr(at, "_batched_supported", lambda: False)
+    assert {p["batch_size"] for p in candidates(cores=8, concurrency=2)} == {1}
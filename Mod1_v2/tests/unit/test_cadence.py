@@ -0,0 +1,13 @@
+from app.services.cadence import CadenceController
+
+def test_cadence_stretches_under_load():
+    c = CadenceController()
+    # своя копия конфига: глобальный settings.cadence другим тестам не меняем
+    c.cfg = c.cfg.model_copy(update={"enabled": True})
+    idle_interval, idle_window = c.interval_sec(), c.window_bytes()
+    assert idle_interval == c.cfg.min_interval_ms / 1000.0
+    # ASR медленнее реального времени -> давление 1 -> максимальные интервал и окно
+    c.observe(proc_sec=20.0, audio_sec=10.0)
+    assert c.pressure() == 1.0
+    assert c.interval_sec() == c.cfg.max_interval_ms / 1000.0
+    assert c.window_bytes() == c.cfg.max_window_bytes > idle_window
@@ -0,0 +1,64 @@
+import asyncio, os, uuid
+from sqlmodel import select
+from app.db import get_session
+from app.models import ChunkModel
+from app.services import sessions
+from app.services.asr import ASRResult
+from app.services.sessions import SessionManager
+
+def test_restart_resumes_from_checkpoint():
+    sid = f"cp-{uuid.uuid4().hex[:8]}"
+    mgr = SessionManager()
+
+    async def first_worker():
+        await mgr.append_audio(sid, "ru-RU", b"a" * 64)
+        await mgr._process_now(sid, "ru-RU")  # чекпоинт пишется вместе с чанками
+        st = mgr.states[sid]
+        return st.emitted_seq, st.emitted_sentences, st.full_text
+
+    seq, sents, text = asyncio.run(first_worker())
+    assert seq >= 1
+
+    # новый процесс: состояния в памяти нет, поднимаемся из чекпоинта
+    restarted = SessionManager()
+    state, resumed = asyncio.run(restarted.attach(sid, "ru-RU"))
+    assert resumed
+    assert (state.emitted_seq, state.emitted_sentences, state.full_text) == (seq, sents, text)
+    assert state.received_bytes == 64
+
+    # повторная обработка того же аудио не выпускает чанки заново
+    asyncio.run(restarted._process_now(sid, "ru-RU"))
+    assert restarted.states[sid].emitted_seq == seq
+
+def test_crash_between_passes_does_not_reemit(monkeypatch):
+    sid = f"cp-{uuid.uuid4().hex[:8]}"
+    published = []
+
+    async def fake_asr(path, session_id, offset_sec=0.0, **kw):
+        # одно предложение (секунда аудио) на каждые 10 байт; offset_sec — распознаём только хвост
+        n = os.path.getsize(path) // 10
+        tail = range(int(offset_sec), n)
+        return ASRResult(text=" ".join(f"Предложение номер {i}." for i in tail), duration_sec=float(n))
+
+    monkeypatch.setattr(sessions, "transcribe_async", fake_asr)
+    monkeypatch.setattr(sessions.FANOUT, "publish", published.append)
+
+    async def worker(mgr, audio):
+        await mgr.append_audio(sid, "ru-RU", audio)
+        await mgr._process_now(sid, "ru-RU")
+
+    mgr = SessionManager()
+    asyncio.run(worker(mgr, b"a" * 60))
+    asyncio.run(worker(mgr, b"a" * 60))  # второй проход сразу за первым; затем «падение» процесса
+    emitted = mgr.states[sid].emitted_seq
+    assert emitted >= 2
+
+    restarted = SessionManager()
+    state, _ = asyncio.run(restarted.attach(sid, "ru-RU"))
+    assert state.emitted_seq == emitted
+    asyncio.run(restarted._process_now(sid, "ru-RU"))
+
+    with get_session() as s:
+        seqs = [c.seq for c in s.exec(select(ChunkModel).where(ChunkModel.session_id == sid)).all()]
+    assert sorted(seqs) == list(range(1, emitted + 1))
+    assert [p["seq"] for p in published] == list(range(1, emitted + 1))
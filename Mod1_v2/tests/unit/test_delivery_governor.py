@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from app.delivery import governor as g
+from app.delivery.governor import DeliveryGovernor, CircuitOpen
+
+class _Clock:
+    def __init__(self):
+        self.t = 100.0
+    def __call__(self):
+        return self.t
+
+def test_aimd_limit_follows_responses():
+    clock = _Clock()
+    gov = DeliveryGovernor("http://mod2", clock=clock)
+    start = gov.limit
+    for _ in range(20):
+        gov.record(50.0, 200)
+    assert gov.limit > start
+    grown = gov.limit
+    gov.record(50.0, 429)
+    assert gov.limit == pytest.approx(grown * 0.5)
+    # повторный сигнал в том же окне задержки не режет лимит ещё раз
+    gov.record(50.0, 503)
+    assert gov.limit == pytest.approx(grown * 0.5)
+    clock.t += 5
+    gov.record(5000.0, 200)  # медленный успех — тоже сигнал к снижению
+    assert gov.limit == pytest.approx(grown * 0.25)
+
+def test_breaker_opens_and_probes():
+    clock = _Clock()
+    gov = DeliveryGovernor("http://mod2", clock=clock)
+    for _ in range(g.BREAKER_FAILURES):
+        clock.t += 1
+        gov.record(10.0, 500)
+    assert gov.state == g.OPEN
+    with pytest.raises(CircuitOpen):
+        asyncio.run(gov.acquire())
+    clock.t += g.BREAKER_COOLDOWN_SEC + 1
+
+    async def probe():
+        await gov.acquire()
+        assert gov.state == g.HALF_OPEN
+        with pytest.raises(CircuitOpen):
+            await gov.acquire()  # в half-open только один пробный запрос
+        gov.record(10.0, 200)
+        gov.release()
+    asyncio.run(probe())
+    assert gov.state == g.CLOSED and gov.limit == g.MIN_INFLIGHT
+
+def test_concurrency_is_capped():
+    gov = DeliveryGovernor("http://mod2")
+    gov.limit = 2.0
+    peak = 0
+
+    async def one():
+        nonlocal peak
+        async with gov.slot():
+            peak = max(peak, gov.inflight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(one() for _ in range(6)))
+    asyncio.run(run())
+    assert peak == 2 and gov.inflight == 0
+
+def test_waiters_fail_fast_when_breaker_opens():
+    gov = DeliveryGovernor("http://mod2")
+    gov.limit = 1.0
+
+    async def run():
+        await gov.acquire()
+        waiters = [asyncio.ensure_future(gov.acquire()) for _ in range(3)]
+        await asyncio.sleep(0)
+        gov.record(10.0, 429, retry_after=5.0)
+        gov.release()
+        res = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(r, CircuitOpen) for r in res)
+    asyncio.run(run())
+    assert gov.state == g.OPEN and gov.inflight == 0
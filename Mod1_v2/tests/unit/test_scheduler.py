@@ -0,0 +1,53 @@
+import threading
+from app.services.scheduler import ASRScheduler
+
+def _blocked_scheduler(weights=None):
+    sched = ASRScheduler(workers=1, weights=weights or {"Basic": 1.0, "Premium": 4.0}, tier_priority={})
+    gate = threading.Event()
+    first = sched.submit(gate.wait, session_id="blocker")
+    return sched, gate, first
+
+def test_live_before_batch_and_wait_stats():
+    sched, gate, first = _blocked_scheduler()
+    order = []
+    futs = [
+        sched.submit(order.append, "batch", session_id="b", kind="batch"),
+        sched.submit(order.append, "live", session_id="l", kind="live"),
+    ]
+    gate.set()
+    for f in [first, *futs]:
+        f.result(timeout=5)
+    assert order == ["live", "batch"]
+    stats = sched.stats()
+    assert stats["queue_depth"] == 0
+    assert set(stats["wait_by_tier"]["Basic"]) == {"live", "batch"}
+
+def test_weighted_fair_share_across_sessions():
+    sched, gate, first = _blocked_scheduler()
+    order = []
+    futs = []
+    # Basic-сессия поставила 4 задачи раньше Premium — Premium всё равно не ждёт их все
+    for i in range(4):
+        futs.append(sched.submit(order.append, "basic", session_id="s-basic", tier="Basic"))
+    for i in range(4):
+        futs.append(sched.submit(order.append, "premium", session_id="s-prem", tier="Premium"))
+    gate.set()
+    for f in [first, *futs]:
+        f.result(timeout=5)
+    assert order.index("premium") < 2
+    assert order[-1] == "basic"
+
+def test_resize_changes_worker_threads():
+    sched = ASRScheduler(workers=1, weights={}, tier_priority={})
+    sched.resize(3)  # профиль автотюнинга пришёл после создания планировщика
+    barrier = threading.Barrier(3, timeout=5)
+    futs = [sched.submit(barrier.wait, session_id=f"s{i}") for i in range(3)]
+    for f in futs:
+        f.result(timeout=5)  # три задачи шли одновременно
+    assert sched.stats()["workers"] == 3
+
+    sched.resize(1)
+    for t in list(sched._threads):
+        t.join(timeout=0.2)  # лишние потоки выходят, оставшийся ждёт работу
+    assert len(sched._threads) == 1 and sched.workers == 1
+    assert sched.submit(lambda: "ok", session_id="s").result(timeout=5) == "ok"
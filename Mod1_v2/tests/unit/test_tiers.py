@@ -0,0 +1,14 @@
+import pytest
+from app.config import settings
+from app.services.tiers import UnknownKey, resolve_tier
+
+
+def test_tier_comes_from_api_key(monkeypatch):
+    monkeypatch.setattr(settings.app, "api_keys", {"k-prem": "Premium", "k-bad": "Gold"})
+    monkeypatch.setattr(settings.app, "tier", "Basic")
+    assert resolve_tier(None) == "Basic"
+    assert resolve_tier("k-prem") == "Premium"
+    with pytest.raises(UnknownKey):
+        resolve_tier("k-guess")
+    with pytest.raises(UnknownKey):
+        resolve_tier("k-bad")
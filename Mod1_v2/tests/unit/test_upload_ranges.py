@@ -0,0 +1,10 @@
+from app.services.uploads import merge_ranges, missing_ranges, parse_content_range
+
+def test_ranges_merge_and_missing():
+    ranges = merge_ranges([(10, 20), (0, 5), (5, 8), (18, 30)])
+    assert ranges == [(0, 8), (10, 30)]
+    assert missing_ranges(ranges, 40) == [(8, 10), (30, 40)]
+    assert missing_ranges([(0, 40)], 40) == []
+
+def test_parse_content_range():
+    assert parse_content_range("bytes 0-1023/4096") == (0, 1024, 4096)
@@ -0,0 +1,117 @@
+import asyncio
+from app.models import WebhookModel
+from app.services import webhooks
+from app.services.webhooks import WebhookFanout
+
+class _Registry:
+    def __init__(self, hooks):
+        self.hooks = hooks
+    def active(self):
+        return self.hooks
+
+def test_slow_subscriber_does_not_block_others(monkeypatch):
+    got = {"fast": [], "slow": []}
+    release = asyncio.Event()
+
+    async def fake_send(hook, payload, client=None):
+        if hook.name == "slow":
+            await release.wait()
+        got[hook.name].append(payload["seq"])
+    monkeypatch.setattr(webhooks, "send_chunk", fake_send)
+
+    reg = _Registry([WebhookModel(name="fast", url="http://a", secret="s"),
+                     WebhookModel(name="slow", url="http://b", secret="s")])
+    fan = WebhookFanout(reg, maxsize=2)
+
+    async def run():
+        for seq in range(1, 5):
+            fan.publish({"chunk_id": f"c{seq}", "seq": seq})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.05)
+        assert got["fast"] == [1, 2, 3, 4]
+        assert got["slow"] == []
+        # очередь медленного переполнилась: 1 в отправке, 2 в очереди, 1 отброшен
+        assert fan.stats()["slow"]["dropped"] == 1
+        release.set()
+        await fan.drain()
+        assert got["slow"] == [1, 2, 3]
+        # удалённая подписка останавливается
+        reg.hooks = reg.hooks[:1]
+        assert fan.publish({"chunk_id": "c5", "seq": 5}) == 1
+        await fan.drain()
+        assert "slow" not in fan.stats()
+    asyncio.run(run())
+
+def test_overflowed_chunks_are_backfilled_in_order(monkeypatch):
+    import uuid
+    from app.db import get_session, init_db
+    from app.models import ChunkModel, SessionModel
+    init_db()
+    sid = f"wh-{uuid.uuid4().hex[:8]}"
+    with get_session() as s:
+        s.add(SessionModel(id=sid))
+        for seq in range(1, 7):
+            s.add(ChunkModel(session_id=sid, chunk_id=f"{sid}-{seq}", seq=seq, text=f"t{seq}", policy_json="{}", hash="h"))
+        s.commit()
+
+    got = []
+    release = asyncio.Event()
+
+    async def fake_send(hook, payload, client=None):
+        await release.wait()
+        got.append(payload["seq"])
+    monkeypatch.setattr(webhooks, "send_chunk", fake_send)
+    fan = WebhookFanout(_Registry([WebhookModel(name="slow", url="http://b", secret="s")]), maxsize=2)
+
+    async def run():
+        for seq in range(1, 7):
+            fan.publish({"session_id": sid, "chunk_id": f"{sid}-{seq}", "seq": seq})
+            await asyncio.sleep(0)
+        st = fan.stats()["slow"]
+        assert st["dropped"] == 3 and st["lagging_sessions"] == 1  # 1 в отправке, 2-3 в очереди, с 4-го ждут в БД
+        release.set()
+        await fan.drain()
+    asyncio.run(run())
+    assert got == [1, 2, 3, 4, 5, 6]
+    assert fan.stats()["slow"]["backfilled"] == 3 and fan.stats()["slow"]["lagging_sessions"] == 0
+
+
+def test_registry_picks_up_changes_from_other_workers():
+    from app.db import get_session, init_db
+    init_db()
+    name = "ttl-hook"
+    reg = webhooks.WebhookRegistry(ttl_sec=0)
+    before = {h.name for h in reg.active()}
+    with get_session() as s:  # /v1/hook обработал другой воркер: этот процесс invalidate() не видел
+        s.add(WebhookModel(name=name, url="http://c", secret="s", active=True)); s.commit()
+    assert {h.name for h in reg.active()} == before | {name}
+    asyncio.run(webhooks.delete_webhook(name))
+
+
+def test_fanout_goes_through_delivery_governor(monkeypatch):
+    import httpx
+    from app.delivery import client as delivery
+    from app.delivery.governor import governor_for
+    monkeypatch.setattr(delivery, "RETRIES", 1)
+
+    async def no_sleep(sec):
+        pass
+    monkeypatch.setattr(delivery, "_sleep", no_sleep)
+    answers = [503, 200]
+    got = []
+
+    async def fake_post(hook, payload, client=None):
+        got.append(payload["seq"])
+        return httpx.Response(answers.pop(0))
+    monkeypatch.setattr(webhooks, "_post_chunk", fake_post)
+    url = "http://governed-subscriber"
+    fan = WebhookFanout(_Registry([WebhookModel(name="gov", url=url, secret="s")]), maxsize=4)
+
+    async def run():
+        fan.publish({"chunk_id": "c1", "seq": 1})
+        await fan.drain()
+    asyncio.run(run())
+    assert got == [1, 1]  # 503 повторён
+    st = governor_for(url).stats()
+    assert (st["errors"], st["ok"]) == (1, 1)
+    assert fan.stats()["gov"]["sent"] == 1 and fan.stats()["gov"]["failed"] == 0
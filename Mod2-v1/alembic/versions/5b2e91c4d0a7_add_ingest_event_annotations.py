@@ -0,0 +1,30 @@
+"""add ingest_events.annotations
+
+Revision ID: 5b2e91c4d0a7
+Revises: 16c5f8723768
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e91c4d0a7'
+down_revision: Union[str, Sequence[str], None] = '16c5f8723768'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ingest_events') as batch_op:
+        batch_op.add_column(sa.Column('annotations', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ingest_events') as batch_op:
+        batch_op.drop_column('annotations')
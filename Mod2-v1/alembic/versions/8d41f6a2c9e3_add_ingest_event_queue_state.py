@@ -0,0 +1,40 @@
+"""add ingest_events queue state
+
+Revision ID: 8d41f6a2c9e3
+Revises: 5b2e91c4d0a7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41f6a2c9e3'
+down_revision: Union[str, Sequence[str], None] = '5b2e91c4d0a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ingest_events') as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=16), nullable=False, server_default='pending'))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('claimed_at', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+    op.create_index('ix_ingest_status_session', 'ingest_events', ['status', 'session_id'])
+    # уже размеченные события не нужно прогонять через очередь ещё раз
+    op.execute("UPDATE ingest_events SET status = 'done' WHERE annotations IS NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ingest_status_session', table_name='ingest_events')
+    with op.batch_alter_table('ingest_events') as batch_op:
+        batch_op.drop_column('error')
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('status')
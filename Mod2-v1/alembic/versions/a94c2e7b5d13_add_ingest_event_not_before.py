@@ -0,0 +1,28 @@
+"""add ingest_events.not_before
+
+Revision ID: a94c2e7b5d13
+Revises: e2b7d4a91f36
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a94c2e7b5d13'
+down_revision: Union[str, Sequence[str], None] = 'e2b7d4a91f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingest_events', sa.Column('not_before', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingest_events', 'not_before')
@@ -0,0 +1,39 @@
+"""add session_aggregates
+
+Revision ID: c7a3e5f19b20
+Revises: 8d41f6a2c9e3
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a3e5f19b20'
+down_revision: Union[str, Sequence[str], None] = '8d41f6a2c9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # существующие сессии сворачиваются лениво при первом чтении (AGGREGATES._load)
+    op.create_table(
+        'session_aggregates',
+        sa.Column('session_id', sa.String(length=128), nullable=False),
+        sa.Column('entities', sa.JSON(), nullable=False),
+        sa.Column('keyphrases', sa.JSON(), nullable=False),
+        sa.Column('elements', sa.JSON(), nullable=False),
+        sa.Column('chunks', sa.Integer(), nullable=False),
+        sa.Column('last_event_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('session_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('session_aggregates')
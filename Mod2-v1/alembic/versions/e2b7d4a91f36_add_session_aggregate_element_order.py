@@ -0,0 +1,29 @@
+"""add session_aggregates.element_order
+
+Revision ID: e2b7d4a91f36
+Revises: c7a3e5f19b20
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7d4a91f36'
+down_revision: Union[str, Sequence[str], None] = 'c7a3e5f19b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # старые строки (NULL) сворачиваются заново при следующем событии сессии (AGGREGATES.apply)
+    op.add_column('session_aggregates', sa.Column('element_order', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('session_aggregates', 'element_order')
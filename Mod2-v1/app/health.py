@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from config.settings import settings
 import os
 from datetime import datetime
@@ -14,6 +15,7 @@ async def healthz():
     layout_provider = os.getenv("LAYOUT_PROVIDER", "external")
     mod3_url = os.getenv("MOD3_URL", "http://localhost:9001")
     nlp_debug = os.getenv("NLP_DEBUG", "false").lower() == "true"
+    from app.nlp.pipeline import READINESS
     
     return {
         "status": "ok",
@@ -21,8 +23,8 @@ async def healthz():
         "version": os.getenv("APP_VERSION", "1.0.0"),
         "host": host,
         "port": port,
-        "stanza_ready": True,     # TODO: реальная проверка Stanza модели
-        "model_warm": True,       # TODO: реальная проверка
+        "stanza_ready": READINESS.ready,  # модели загружены и прогреты; cold/loading — ещё нет
+        "model_warm": READINESS.ready,
         "layout_provider": layout_provider,
         "mod3_url": mod3_url,
         "nlp_debug": nlp_debug,
@@ -32,3 +34,35 @@ async def healthz():
         # Legacy settings for compatibility
         "stream_preview": settings.stream_preview,
     }
+
+
+@router.get("/readyz")
+async def readyz():
+    """Готовность принимать трафик: модели загружены из локального хранилища и прогреты (иначе 503)."""
+    from app.nlp.pipeline import READINESS
+    body = {"status": "ready" if READINESS.ready else "not_ready", "nlp": READINESS.stats()}
+    return JSONResponse(body, status_code=200 if READINESS.ready else 503)
+
+
+@router.get("/v2/metrics/ingest")
+async def ingest_metrics():
+    """Очередь обработки принятых событий и NLP-батчинг"""
+    from app.services.work_queue import WORK_QUEUE
+    from app.nlp.pipeline import BATCHER, POOL
+    from app.nlp.cache import CACHE
+    from app.nlp.lexicon import LEXICON
+    from app.services.aggregates import AGGREGATES
+    from app.services.mapping import VOCAB_INDEX
+    from app.prefork import worker_info
+    return {
+        "queue_depth": await WORK_QUEUE.depth(),
+        "queue_max": settings.ingest_queue_max,
+        **WORK_QUEUE.stats(),
+        "nlp_batcher": BATCHER.stats(),
+        "nlp_pool": POOL.stats() if POOL else None,
+        "nlp_cache": CACHE.stats(),
+        "nlp_lexicon": LEXICON.stats(),
+        "session_cache": AGGREGATES.stats(),
+        "vocab_index": VOCAB_INDEX.stats(),
+        "server": worker_info(),
+    }
@@ -1,5 +1,6 @@
 from .base import Base
 from .ingest_event import IngestEvent  # если файл есть
 from .webhook import Webhook          # если файл есть
+from .session_aggregate import SessionAggregate
 
-__all__ = ["Base", "IngestEvent", "Webhook"]
\ No newline at end of file
+__all__ = ["Base", "IngestEvent", "Webhook", "SessionAggregate"]
\ No newline at end of file
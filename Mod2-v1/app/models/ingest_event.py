@@ -1,4 +1,4 @@
-from sqlalchemy import String, JSON, Integer, UniqueConstraint
+from sqlalchemy import String, JSON, Integer, Float, Text, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from typing import Optional
 from .base import Base  # <— ВАЖНО
@@ -11,7 +11,17 @@ class IngestEvent(Base):
     kind: Mapped[str] = mapped_column(String(16), nullable=False)
     payload: Mapped[dict] = mapped_column(JSON, nullable=False)
     seq: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # результаты NLP, посчитанные один раз при приёме: {"mappings", "entities", "keyphrases"}
+    annotations: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # очередь обработки: pending -> processing -> done | failed
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending", server_default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    claimed_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # повтор после ошибки — не раньше этого времени (unix time)
+    not_before: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     __table_args__ = (
         UniqueConstraint("idempotency_key", name="uq_ingest_idem"),
+        Index("ix_ingest_status_session", "status", "session_id"),
     )
@@ -0,0 +1,19 @@
+from sqlalchemy import String, JSON, Integer, Float
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional
+from .base import Base
+
+
+class SessionAggregate(Base):
+    """Итог сессии, обновляемый по мере обработки событий: чтение /entities и /layout — одна строка."""
+    __tablename__ = "session_aggregates"
+    session_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    # нормализованные и без дублей, entities/keyphrases — в порядке первого появления
+    entities: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    keyphrases: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    elements: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    # [final, seq, позиция] первого появления каждого элемента — elements отсортированы по нему
+    element_order: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    chunks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_event_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.nlp.pipeline import PIPELINE_VERSION, Sentence
+from config.settings import settings
+
+_WS = re.compile(r"\s+")
+
+
+def normalize(sentence: str) -> str:
+    return _WS.sub(" ", sentence).strip()
+
+
+def sentence_key(sentence: str, version: str = PIPELINE_VERSION) -> str:
+    return hashlib.sha1(f"{version}\x00{normalize(sentence)}".encode("utf-8")).hexdigest()
+
+
+class AnnotationCache:
+    """
+    Ограниченный LRU аннотаций: ключ — хэш нормализованного фрагмента + версия пайплайна,
+    значение — предложения Stanza (токены, UPOS, леммы) этого фрагмента.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, List[Sentence]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[Sentence]]:
+        with self._lock:
+            val = self._data.get(key)
+            if val is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return val
+
+    def put(self, key: str, value: List[Sentence]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+CACHE = AnnotationCache(settings.nlp_cache_size)
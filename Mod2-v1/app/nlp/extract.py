@@ -1,6 +1,10 @@
+import re
 from typing import List, Tuple, Dict
-from app.nlp.pipeline import get_ru_pipeline
+from app.nlp.pipeline import Sentence, annotate_texts
+from app.nlp.cache import CACHE, normalize, sentence_key
+from app.nlp.lexicon import LEXICON
 from app.models.schemas import Keyphrase
+from config.settings import settings
 
 # Небольшой набор русских стоп-слов для MVP
 _STOP = {
@@ -11,17 +15,44 @@ _STOP = {
 }
 
 
+# Грубое предразбиение: конец предложения + пробел + заглавная/цифра/кавычка.
+# Stanza может разбить фрагмент дальше, но не склеит соседние — фрагмент и есть единица кэша.
+_FRAGMENT_SPLIT = re.compile(r"(?<=[.!?…])\s+(?=[А-ЯЁA-Z0-9«\"])")
+
+
+def annotate(text: str, lexicon: bool = False) -> List[Sentence]:
+    """
+    Аннотации Stanza для текста с кэшем по фрагментам: overlap_prefix, повтор текста
+    чанков в final и несколько разборов одного текста в /debug/parse берутся из LRU,
+    через пайплайн (одним батчем) идут только ещё не виденные фрагменты.
+    lexicon=True — фрагменты из однозначно известных токенов собираются из LEXICON без пайплайна
+    (в кэш не кладутся: там только выход Stanza). Выход пайплайна пополняет лексикон.
+    """
+    frags = [f for f in (normalize(x) for x in _FRAGMENT_SPLIT.split(text or "")) if f]
+    keys = [sentence_key(f) for f in frags]
+    found = {k: CACHE.get(k) for k in dict.fromkeys(keys)}
+    todo = {k: f for k, f in zip(keys, frags) if found[k] is None}
+    if lexicon and settings.nlp_lexicon:
+        for k in list(todo):
+            sents = LEXICON.lookup(todo[k])
+            if sents is not None:
+                found[k] = sents
+                del todo[k]
+    if todo:
+        for k, sents in zip(todo, annotate_texts(list(todo.values()))):
+            CACHE.put(k, sents)
+            LEXICON.learn(sents)
+            found[k] = sents
+    return [s for k in keys for s in found[k]]
+
+
 def split_sentences(text: str) -> List[str]:
-    nlp = get_ru_pipeline()
-    doc = nlp(text)
-    return [s.text for s in doc.sentences]
+    return [s.text for s in annotate(text)]
 
 
 def lemmatize_phrase(text: str) -> str:
-    nlp = get_ru_pipeline()
-    doc = nlp(text)
     lemmas: List[str] = []
-    for s in doc.sentences:
+    for s in annotate(text):
         for w in s.words:
             if w.upos == "PUNCT":
                 continue
@@ -34,11 +65,8 @@ def _extract_candidates_with_types(text: str) -> List[Tuple[str, str]]:
     Возвращает список (lemma_phrase, pattern_type),
     где pattern_type ∈ {"single", "adj_noun", "noun_noun"}.
     """
-    nlp = get_ru_pipeline()
-    doc = nlp(text)
-
     cands: List[Tuple[str, str]] = []
-    for s in doc.sentences:
+    for s in annotate(text, lexicon=True):
         words = [w for w in s.words if w.upos != "PUNCT"]
         n = len(words)
         for i, w in enumerate(words):
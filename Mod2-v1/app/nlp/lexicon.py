@@ -0,0 +1,125 @@
+"""
+Лексикон токенов, выученный на выходе Stanza: словоформа -> (лемма, UPOS) с флагом неоднозначности.
+
+Чанки в основном повторяют небольшой словарь UI-слов («кнопка», «форма», «каталог услуг»).
+Если каждый токен фрагмента встречался не меньше LEXICON_MIN_COUNT раз и всегда с одними
+и теми же леммой и UPOS, разбор фрагмента собирается из лексикона без нейросетевого пайплайна.
+Словоформа, увиденная с разными разборами (омонимия, контекстная лемма), помечается
+неоднозначной навсегда — фрагменты с ней всегда идут в Stanza.
+
+Учимся только на предложениях, где простая токенизация (_TOKEN) совпала с токенами Stanza:
+тогда собранный из лексикона разбор повторяет и токенизацию пайплайна.
+"""
+from __future__ import annotations
+import re
+import threading
+from typing import Dict, List, Optional
+
+from app.nlp.pipeline import Sentence, Word
+from config.settings import settings
+
+_TOKEN = re.compile(r"\w+(?:-\w+)*|[^\w\s]")
+# Конец предложения внутри фрагмента — Stanza может разбить иначе, фрагмент отдаём ей
+_TERMINATORS = {".", "!", "?", "…"}
+
+
+class _Entry:
+    __slots__ = ("lemma", "upos", "count", "ambiguous")
+
+    def __init__(self, lemma: str, upos: str) -> None:
+        self.lemma = lemma
+        self.upos = upos
+        self.count = 0
+        self.ambiguous = False
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text)
+
+
+class Lexicon:
+    def __init__(self, maxsize: int, min_count: int) -> None:
+        self.maxsize = maxsize
+        self.min_count = max(1, min_count)
+        self._data: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.unknown = 0
+        self.ambiguous = 0
+        self.learned = 0
+        self.skipped = 0
+
+    def learn(self, sents: List[Sentence]) -> None:
+        """Запомнить разборы предложений Stanza (только с совпавшей токенизацией)."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for s in sents:
+                if tokenize(s.text) != [w.text for w in s.words]:
+                    self.skipped += 1
+                    continue
+                self.learned += 1
+                for w in s.words:
+                    key = w.text.lower()
+                    e = self._data.get(key)
+                    if e is None:
+                        if len(self._data) >= self.maxsize:
+                            continue  # словарь UI-слов мал; при переполнении новые формы просто не учим
+                        e = self._data[key] = _Entry(w.lemma, w.upos)
+                    elif (e.lemma, e.upos) != (w.lemma, w.upos):
+                        e.ambiguous = True
+                    e.count += 1
+
+    def lookup(self, fragment: str) -> Optional[List[Sentence]]:
+        """Разбор фрагмента из лексикона или None, если хоть один токен неизвестен или неоднозначен."""
+        if not self._data:
+            self.misses += 1
+            return None
+        toks = tokenize(fragment)
+        words: List[Word] = []
+        for i, tok in enumerate(toks):
+            e = self._data.get(tok.lower())
+            if e is None or e.count < self.min_count:
+                self.unknown += 1
+                self.misses += 1
+                return None
+            if e.ambiguous:
+                self.ambiguous += 1
+                self.misses += 1
+                return None
+            if tok in _TERMINATORS and any(t not in _TERMINATORS for t in toks[i + 1:]):
+                self.misses += 1
+                return None
+            words.append(Word(tok, e.lemma, e.upos))
+        if not words:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [Sentence(fragment, tuple(words))]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.unknown = self.ambiguous = self.learned = self.skipped = 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:  # learn() в другом потоке меняет словарь — обходить его можно только под блокировкой
+            size = len(self._data)
+            ambiguous = sum(1 for e in self._data.values() if e.ambiguous)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ambiguous_forms": ambiguous,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "miss_unknown": self.unknown,
+            "miss_ambiguous": self.ambiguous,
+            "learned_sentences": self.learned,
+            "skipped_sentences": self.skipped,
+        }
+
+
+LEXICON = Lexicon(settings.nlp_lexicon_size, settings.nlp_lexicon_min_count)
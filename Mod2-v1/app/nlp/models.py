@@ -0,0 +1,78 @@
+"""
+Локальное хранилище моделей Stanza.
+
+Модели кладутся в STANZA_MODEL_DIR заранее (scripts/fetch_stanza_models.py, шаг сборки образа)
+вместе с manifest.json: язык, процессоры, версия stanza и размер/sha256 каждого файла.
+При старте процесса сеть не нужна: хранилище проверяется по манифесту, пайплайн
+создаётся с download_method=None. Скачивание при старте — только при STANZA_ALLOW_DOWNLOAD=true.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+MANIFEST = "manifest.json"
+
+
+class ModelStoreError(RuntimeError):
+    """Хранилище моделей отсутствует, неполное или не совпадает с манифестом."""
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_manifest(model_dir: Path, lang: str, processors: str, stanza_version: str) -> Dict[str, Any]:
+    files = {}
+    for p in sorted(model_dir.rglob("*")):
+        if p.is_file() and p.name != MANIFEST:
+            files[p.relative_to(model_dir).as_posix()] = {"size": p.stat().st_size, "sha256": _sha256(p)}
+    manifest = {"lang": lang, "processors": processors, "stanza_version": stanza_version, "files": files}
+    tmp = model_dir / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, model_dir / MANIFEST)
+    return manifest
+
+
+def verify_store(model_dir: Path, lang: str, processors: str, full: bool = False) -> Dict[str, Any]:
+    """
+    Проверить хранилище по манифесту: язык и процессоры, наличие и размер файлов;
+    full=True — ещё и sha256 (дольше: модели — сотни МБ).
+    """
+    try:
+        manifest = json.loads((model_dir / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise ModelStoreError(f"no model manifest in {model_dir}: {e}") from e
+    if manifest.get("lang") != lang:
+        raise ModelStoreError(f"model store is for {manifest.get('lang')!r}, need {lang!r}")
+    missing = set(processors.split(",")) - set(manifest.get("processors", "").split(","))
+    if missing:
+        raise ModelStoreError(f"model store has no processors: {', '.join(sorted(missing))}")
+    if not manifest.get("files"):
+        raise ModelStoreError(f"model manifest in {model_dir} lists no files")
+    for rel, meta in manifest["files"].items():
+        p = model_dir / rel
+        try:
+            size = p.stat().st_size
+        except OSError:
+            raise ModelStoreError(f"missing model file {rel}") from None
+        if size != meta["size"]:
+            raise ModelStoreError(f"model file {rel}: size {size}, expected {meta['size']}")
+        if full and _sha256(p) != meta["sha256"]:
+            raise ModelStoreError(f"model file {rel}: checksum mismatch")
+    return manifest
+
+
+def fetch_models(model_dir: Path, lang: str, processors: str) -> Dict[str, Any]:
+    """Скачать модели в хранилище и записать манифест (сборка образа, ручная подготовка)."""
+    import stanza
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    stanza.download(lang, model_dir=str(model_dir), processors=processors)
+    return write_manifest(model_dir, lang, processors, stanza.__version__)
@@ -1,27 +1,75 @@
+import os
+import queue
 import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from pathlib import Path
 import stanza
 
+from app.nlp.models import ModelStoreError, fetch_models, verify_store
+from config.settings import settings
+
 # Глобальный кэш пайплайна
 _NLP_RU = None
 _LOCK = threading.Lock()
 
+PROCESSORS = "tokenize,pos,lemma"
+# Версия входит в ключ кэша аннотаций: смена модели/процессоров инвалидирует кэш
+PIPELINE_VERSION = f"stanza-{stanza.__version__}:{settings.stanza_lang}:{PROCESSORS}"
+
+
+class Word(NamedTuple):
+    text: str
+    lemma: str
+    upos: str
+
+
+class Sentence(NamedTuple):
+    text: str
+    words: Tuple[Word, ...]
+
 
 def _init_ru_pipeline():
     """
-    Инициализация RU-пайплайна Stanza с загрузкой моделей из сети.
+    RU-пайплайн Stanza из локального хранилища моделей (app.nlp.models), без обращения к сети.
     Процессоры: tokenize, pos, lemma (включая разбиение на предложения).
     """
-    # Скачиваем модели русского один раз на запуск
-    stanza.download("ru")
-    # Создаём пайплайн
+    model_dir = Path(settings.stanza_model_dir)
+    try:
+        verify_store(model_dir, settings.stanza_lang, PROCESSORS, full=settings.stanza_verify_hashes)
+    except ModelStoreError:
+        if not settings.stanza_allow_download:
+            raise
+        fetch_models(model_dir, settings.stanza_lang, PROCESSORS)
     return stanza.Pipeline(
-        lang="ru",
-        processors="tokenize,pos,lemma",
+        lang=settings.stanza_lang,
+        dir=str(model_dir),
+        processors=PROCESSORS,
+        download_method=None,
         use_gpu=False,
         tokenize_no_ssplit=False,
     )
 
 
+def thread_budget(processes: int) -> int:
+    """Потоков torch/OpenMP на процесс: NLP_THREADS или поровну ядер на processes процессов."""
+    if settings.nlp_threads > 0:
+        return settings.nlp_threads
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+def set_thread_budget(n: int) -> None:
+    """
+    Ограничить потоки процесса: иначе каждый torch в каждом воркере берёт все ядра.
+    Переменные окружения — для библиотек, которые ещё не инициализированы, и для дочерних процессов.
+    """
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(n)
+    import torch
+    torch.set_num_threads(n)
+
+
 def get_ru_pipeline():
     """Ленивая и потокобезопасная инициализация кэшированного пайплайна."""
     global _NLP_RU
@@ -32,6 +80,191 @@ def get_ru_pipeline():
     return _NLP_RU
 
 
+WARMUP_TEXT = "Нужна форма обратной связи и каталог услуг."
+
+
+def warm_up() -> None:
+    """Реальный прогон на примере: подгружает веса в память и проверяет, что пайплайн отвечает."""
+    sents = _annotate_bulk([WARMUP_TEXT])[0]
+    if not sents or not any(s.words for s in sents):
+        raise RuntimeError("warm-up inference returned no tokens")
+
+
+class Readiness:
+    """Состояние NLP в процессе: cold -> loading -> ready | failed. Его отдаёт /readyz."""
+
+    def __init__(self) -> None:
+        self.state = "cold"
+        self.error: Optional[str] = None
+        self.load_ms: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def run(self, fn: Callable[[], None]) -> None:
+        self.state, self.error = "loading", None
+        t0 = time.monotonic()
+        try:
+            fn()
+        except Exception as e:
+            self.state, self.error = "failed", f"{type(e).__name__}: {e}"
+            return
+        self.load_ms = int((time.monotonic() - t0) * 1000)
+        self.state = "ready"
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "error": self.error, "load_ms": self.load_ms}
+
+
+READINESS = Readiness()
+
+
+def _preload() -> None:
+    if POOL is not None:
+        POOL.warm()  # модели грузятся и прогреваются в воркерах, основной процесс их не держит
+    else:
+        get_ru_pipeline()
+        warm_up()
+
+
 def preload_ru():
-    """Явная инициализация при старте приложения (скачает и прогреет модели)."""
-    get_ru_pipeline()
+    """Загрузка моделей из локального хранилища и прогрев при старте; итог — в READINESS."""
+    if READINESS.ready:
+        return  # уже загружено и прогрето (мастер prefork до fork)
+    READINESS.run(_preload)
+
+
+def _annotate_bulk(texts: List[str]) -> List[List[Sentence]]:
+    """
+    Прогон нескольких текстов одним вызовом пайплайна (список Document — один батч в Stanza).
+    Возвращает для каждого текста список предложений в виде простых кортежей.
+    """
+    if not texts:
+        return []
+    nlp = get_ru_pipeline()
+    if len(texts) == 1:
+        docs = [nlp(texts[0])]
+    else:
+        docs = nlp([stanza.Document([], text=t) for t in texts])
+    return [
+        [Sentence(s.text, tuple(Word(w.text, w.lemma or w.text, w.upos) for w in s.words)) for s in d.sentences]
+        for d in docs
+    ]
+
+
+class _Request(NamedTuple):
+    texts: List[str]
+    future: Future
+
+
+class NLPBatcher:
+    """
+    Микробатчинг между запросами: тексты от параллельных вызовов копятся
+    не дольше max_wait_ms (или до max_batch текстов) и идут в пайплайн одним вызовом,
+    результаты раздаются ожидающим. Один фоновый поток — пайплайн в процессе не делится
+    между потоками; с пулом процессов батчи уходят в воркеры параллельно.
+    """
+
+    def __init__(self, runner: Callable[[List[str]], Any], max_batch: int, max_wait_ms: int, max_inflight: int = 1) -> None:
+        # runner возвращает результат сразу или Future (пул процессов) — тогда в полёте до max_inflight батчей
+        self.runner = runner
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self._slots = threading.Semaphore(max(1, max_inflight))
+        self._q: "queue.Queue[_Request]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.texts = 0
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="nlp-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        fut: Future = Future()
+        if not texts:
+            fut.set_result([])
+            return fut
+        self._ensure_thread()
+        self._q.put(_Request(list(texts), fut))
+        return fut
+
+    def annotate(self, texts: List[str]) -> List[List[Sentence]]:
+        return self.submit(texts).result()
+
+    def _collect(self) -> List[_Request]:
+        batch = [self._q.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            left = deadline - time.monotonic()
+            try:
+                req = self._q.get(timeout=left) if left > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(req)
+            size += len(req.texts)
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            self._slots.acquire()
+            batch = self._collect()
+            texts = [t for r in batch for t in r.texts]
+            try:
+                res = self.runner(texts)
+            except BaseException as e:
+                self._finish(batch, None, e)
+                continue
+            if isinstance(res, Future):
+                res.add_done_callback(lambda f, batch=batch: self._finish(batch, *self._outcome(f)))
+            else:
+                self._finish(batch, res, None)
+
+    @staticmethod
+    def _outcome(f: Future) -> Tuple[Any, Optional[BaseException]]:
+        e = f.exception()
+        return (None, e) if e else (f.result(), None)
+
+    def _finish(self, batch: List[_Request], results: Any, error: Optional[BaseException]) -> None:
+        self._slots.release()
+        if error is not None:
+            for r in batch:
+                r.future.set_exception(error)
+            return
+        self.batches += 1
+        i = 0
+        for r in batch:
+            self.texts += len(r.texts)
+            r.future.set_result(results[i:i + len(r.texts)])
+            i += len(r.texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "queued": self._q.qsize(),
+        }
+
+
+# NLP_WORKERS > 0 — Stanza в отдельных процессах (app.nlp.workers), иначе в фоновом потоке
+POOL = None
+if settings.nlp_workers > 0:
+    from app.nlp.workers import NLPPool
+    POOL = NLPPool(settings.nlp_workers)
+
+BATCHER = NLPBatcher(POOL.submit if POOL else _annotate_bulk, settings.nlp_batch_max, settings.nlp_batch_wait_ms,
+                     max_inflight=settings.nlp_workers or 1)
+
+
+def annotate_texts(texts: List[str]) -> List[List[Sentence]]:
+    """Аннотации для списка текстов; при NLP_BATCH_MAX > 1 — через общий микробатчер."""
+    if settings.nlp_batch_max <= 1:
+        return POOL.submit(texts).result() if POOL and texts else _annotate_bulk(texts)
+    return BATCHER.annotate(texts)
@@ -0,0 +1,173 @@
+"""
+Пул процессов для Stanza: каждый воркер держит свой пайплайн, GIL и CPU основного
+процесса свободны для async-сервера.
+
+IPC компактный: туда — список строк, обратно — по одной строке на текст:
+предложения разделены \x1e, поля предложения (текст, токены, леммы, UPOS) — \x1d,
+слова внутри поля — \x1f. Вместо тысяч мелких объектов pickle гоняет несколько строк.
+
+Сломанный пул (воркер упал в initializer или по OOM) не переживает ни одной задачи —
+каждый submit получает BrokenProcessPool. Поэтому при поломке пул выбрасывается и
+пересобирается в фоне с экспоненциальной паузой, а READINESS на это время failed/loading.
+"""
+from __future__ import annotations
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+from app.nlp.pipeline import READINESS, Sentence, Word
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BACKOFF_SEC = 1.0
+REBUILD_BACKOFF_MAX_SEC = 60.0
+
+_SENT, _FIELD, _WORD = "\x1e", "\x1d", "\x1f"
+
+
+def encode(sents: List[Sentence]) -> str:
+    return _SENT.join(
+        _FIELD.join((
+            s.text,
+            _WORD.join(w.text for w in s.words),
+            _WORD.join(w.lemma for w in s.words),
+            _WORD.join(w.upos for w in s.words),
+        ))
+        for s in sents
+    )
+
+
+def decode(blob: str) -> List[Sentence]:
+    out: List[Sentence] = []
+    for part in blob.split(_SENT) if blob else []:
+        text, toks, lemmas, upos = part.split(_FIELD)
+        if not toks:
+            out.append(Sentence(text, ()))
+            continue
+        out.append(Sentence(text, tuple(Word(*w) for w in zip(toks.split(_WORD), lemmas.split(_WORD), upos.split(_WORD)))))
+    return out
+
+
+def _worker_init() -> None:
+    from app.nlp.pipeline import get_ru_pipeline, set_thread_budget, thread_budget, warm_up
+    from config.settings import settings
+    set_thread_budget(thread_budget(settings.nlp_workers))
+    get_ru_pipeline()
+    warm_up()
+
+
+def _worker_annotate(texts: List[str]) -> List[str]:
+    from app.nlp.pipeline import _annotate_bulk
+    return [encode(s) for s in _annotate_bulk(texts)]
+
+
+class NLPPool:
+    """Ленивый ProcessPoolExecutor (spawn — torch и потоки не наследуются через fork)."""
+
+    def __init__(self, size: int, initializer: Optional[Callable[[], None]] = _worker_init,
+                 backoff_sec: float = REBUILD_BACKOFF_SEC, backoff_max_sec: float = REBUILD_BACKOFF_MAX_SEC) -> None:
+        self.size = size
+        self.initializer = initializer
+        self.backoff_sec = backoff_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.rebuilds = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._rebuilding: Optional[threading.Thread] = None
+        self._closed = False
+
+    def _create(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self.initializer,
+        )
+
+    def _get(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._rebuilding is not None:
+                    raise BrokenProcessPool("NLP worker pool is being rebuilt")
+                if self._pool is None:
+                    self._pool = self._create()
+        return self._pool
+
+    def _on_broken(self, pool: ProcessPoolExecutor, error: BaseException) -> None:
+        """Пул сломан: выбрасываем его и запускаем фоновую пересборку (один раз на поломку)."""
+        with self._lock:
+            if self._pool is not pool or self._closed:
+                return  # поломку уже обработал другой поток
+            self._pool = None
+            self._rebuilding = threading.Thread(target=self._rebuild, name="nlp-pool-rebuild", daemon=True)
+            self._rebuilding.start()
+        pool.shutdown(wait=False, cancel_futures=True)
+        READINESS.state, READINESS.error = "failed", f"{type(error).__name__}: {error}"
+        logger.error("NLP worker pool is broken, rebuilding: %s", error)
+
+    def _warm(self, pool: ProcessPoolExecutor) -> None:
+        for f in [pool.submit(_worker_annotate, []) for _ in range(self.size)]:
+            f.result()
+
+    def _rebuild(self) -> None:
+        delay = self.backoff_sec
+        while True:
+            time.sleep(delay)
+            if self._closed:
+                return
+            pool = self._create()
+            READINESS.run(lambda: self._warm(pool))
+            with self._lock:
+                if READINESS.ready and not self._closed:
+                    self._pool, self._rebuilding = pool, None
+                    self.rebuilds += 1
+                    logger.info("NLP worker pool rebuilt")
+                    return
+            pool.shutdown(wait=False, cancel_futures=True)
+            if self._closed:
+                return
+            delay = min(self.backoff_max_sec, delay * 2)
+            logger.warning("NLP worker pool rebuild failed, next attempt in %.1fs: %s", delay, READINESS.error)
+
+    def submit(self, texts: List[str]) -> Future:
+        """Future со списком предложений на каждый текст (уже декодированным)."""
+        out: Future = Future()
+        pool = self._get()
+
+        def _done(f: Future) -> None:
+            try:
+                out.set_result([decode(b) for b in f.result()])
+            except BaseException as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._on_broken(pool, e)
+                out.set_exception(e)
+
+        try:
+            fut = pool.submit(_worker_annotate, list(texts))
+        except BrokenProcessPool as e:
+            self._on_broken(pool, e)
+            raise
+        fut.add_done_callback(_done)
+        return out
+
+    def warm(self) -> None:
+        """Поднять все воркеры (каждый загрузит и прогреет модели в initializer)."""
+        pool = self._get()
+        try:
+            self._warm(pool)
+        except BrokenProcessPool as e:
+            self._on_broken(pool, e)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "rebuilding": self._rebuilding is not None, "rebuilds": self.rebuilds}
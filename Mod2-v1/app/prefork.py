@@ -0,0 +1,195 @@
+"""
+Prefork-сервер: модели Stanza загружаются и прогреваются один раз в мастере, воркеры
+uvicorn порождаются через fork и делят веса с мастером copy-on-write.
+
+    SERVER_WORKERS=4 python -m app.prefork --host 0.0.0.0 --port 8000
+
+Мастер до fork:
+  - импортирует приложение, грузит пайплайн и прогревает его в один поток
+    (пул OpenMP не создаётся — дочерним процессам нечего наследовать в полусломанном виде);
+  - gc.freeze(): объекты мастера уходят из-под сборщика мусора, и его проходы
+    в воркерах не пишут в их заголовки — страницы остаются общими;
+  - открывает слушающий сокет, который наследуют все воркеры.
+Каждый воркер получает свой бюджет потоков torch/OpenMP (NLP_THREADS или ядра / SERVER_WORKERS),
+так что воркеры вместе не переподписывают ядра. Упавший воркер мастер порождает заново —
+fork от прогретого мастера дешёвый, модели не грузятся повторно.
+
+Режим только для NLP в процессе сервера (NLP_WORKERS=0): пул spawn-процессов держит
+свои копии моделей и смысл общего мастера теряется.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+GRACEFUL_SEC = 30.0
+RESPAWN_DELAY_SEC = 1.0
+
+
+def worker_info() -> Dict[str, Any]:
+    """Кто отвечает: номер воркера prefork (None — обычный uvicorn) и его бюджет потоков."""
+    import torch
+    index = os.environ.get("PREFORK_WORKER")
+    return {
+        "mode": "prefork" if index is not None else "single",
+        "worker": int(index) if index is not None else None,
+        "pid": os.getpid(),
+        "nlp_threads": torch.get_num_threads(),
+    }
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Master:
+    def __init__(self, app: Any, sock: socket.socket, workers: int, threads: int, log_level: str = "info") -> None:
+        self.app = app
+        self.sock = sock
+        self.workers = max(1, workers)
+        self.threads = threads
+        self.log_level = log_level
+        self.children: Dict[int, int] = {}  # pid -> номер воркера
+        self._stopping = False
+
+    def _serve(self, index: int) -> None:
+        """Тело воркера после fork: свои сигналы, свой бюджет потоков, uvicorn на общем сокете."""
+        import uvicorn
+        from app.nlp.pipeline import set_thread_budget
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)  # uvicorn ставит свои обработчики
+        os.environ["PREFORK_WORKER"] = str(index)
+        set_thread_budget(self.threads)
+        config = uvicorn.Config(self.app, lifespan="on", log_level=self.log_level)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve(index)
+            except BaseException:
+                logger.exception("prefork worker %d crashed", index)
+                code = 1
+            finally:
+                os._exit(code)  # не возвращаемся в код мастера
+        self.children[pid] = index
+        logger.info("prefork worker %d started, pid %d, %d threads", index, pid, self.threads)
+        return pid
+
+    def _on_signal(self, signum: int, frame: Optional[Any]) -> None:
+        self._stopping = True
+
+    def _reap(self) -> Optional[int]:
+        """Номер завершившегося воркера или None."""
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return None
+        if pid == 0 or pid not in self.children:
+            return None
+        index = self.children.pop(pid)
+        logger.log(logging.INFO if self._stopping else logging.WARNING,
+                   "prefork worker %d (pid %d) exited with status %d", index, pid, os.waitstatus_to_exitcode(status))
+        return index
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for i in range(self.workers):
+            self.spawn(i)
+        while not self._stopping:
+            index = self._reap()
+            if index is None:
+                time.sleep(0.2)
+            elif not self._stopping:
+                time.sleep(RESPAWN_DELAY_SEC)  # без горячего цикла, если воркер падает на старте
+                self.spawn(index)
+        self.stop()
+
+    def stop(self) -> None:
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+        deadline = time.monotonic() + GRACEFUL_SEC
+        while self.children and time.monotonic() < deadline:
+            if self._reap() is None:
+                time.sleep(0.1)
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.children.pop(pid, None)
+
+
+def configure(workers: int) -> None:
+    """
+    Настройки, зависящие от числа воркеров; до импорта приложения.
+    LRU агрегатов сессий у каждого воркера свой и устаревает, когда событие сессии
+    обработал другой воркер, — при нескольких воркерах он выключается.
+    """
+    if workers > 1 and settings.session_cache_size > 0:
+        logger.info("prefork: %d workers, session cache disabled (SESSION_CACHE_SIZE=0)", workers)
+        settings.session_cache_size = 0
+
+
+def prepare() -> Any:
+    """Загрузка приложения и моделей в мастере; возвращает ASGI-приложение."""
+    from app.nlp import pipeline
+
+    if settings.nlp_workers > 0:
+        raise SystemExit("prefork: NLP_WORKERS must be 0 (models are shared from the master process)")
+    pipeline.set_thread_budget(1)
+    from main import app
+
+    pipeline.preload_ru()
+    if not pipeline.READINESS.ready:
+        raise SystemExit(f"prefork: NLP preload failed: {pipeline.READINESS.error}")
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def main(argv: Optional[list] = None) -> None:
+    ap = argparse.ArgumentParser(description="Mod2 prefork server")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=settings.server_workers)
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from app.nlp.pipeline import thread_budget
+
+    workers = max(1, args.workers)
+    configure(workers)
+    app = prepare()
+    master = Master(app, _bind(args.host, args.port), workers, thread_budget(workers), args.log_level)
+    logger.info("prefork master pid %d: %d workers x %d threads", os.getpid(), workers, master.threads)
+    master.run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
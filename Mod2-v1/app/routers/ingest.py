@@ -10,6 +10,7 @@ from app.utils.security import verify_hmac_sha256
 
 from config.settings import settings  # type: ignore
 from app.services.ingest_service import process_chunk, process_final
+from app.services.work_queue import WORK_QUEUE
 from app.services.idempotency import seen_before
 from app.services.webhooks import upsert_webhook, get_secret_for_session
 from app.services.tracing import log_event 
@@ -17,6 +18,19 @@ from app.services.tracing import log_event
 router = APIRouter(prefix="/v2")
 
 
+async def _shed_load(kind: str, sid: Optional[str], request_id: Optional[str]) -> None:
+    """Очередь обработки переполнена — 429 + Retry-After, Mod1 повторит доставку позже."""
+    depth = await WORK_QUEUE.depth()
+    if depth >= settings.ingest_queue_max:
+        retry = WORK_QUEUE.retry_after(depth)
+        log_event(f"{kind}_received", service="module2", session_id=sid, status="shed", queue_depth=depth, request_id=request_id)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={"error": "queue_full", "queue_depth": depth, "retry_after": retry},
+            headers={"Retry-After": str(retry)},
+        )
+
+
 @router.post("/webhooks/register")
 async def register_webhook(payload: Dict[str, Any]):
     """
@@ -96,10 +110,12 @@ async def ingest_chunk(
         request_id=x_request_id,
     )
 
-    # обработка
+    await _shed_load("chunk", data.get("session_id"), x_request_id)
+
+    # сохранение; NLP — асинхронно в очереди обработки
     await process_chunk(data, idem_key)
 
-    return {"status": "ok"}
+    return {"status": "ok", "queued": True}
 
 
 @router.post("/ingest/full")
@@ -154,7 +170,9 @@ async def ingest_full(
         request_id=x_request_id,
     )
 
-    # обработка
+    await _shed_load("final", data.get("session_id"), x_request_id)
+
+    # сохранение; NLP — асинхронно в очереди обработки
     await process_final(data, idem_key)
 
-    return {"status": "ok"}
+    return {"status": "ok", "queued": True}
@@ -3,6 +3,8 @@ import json
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from app.models.schemas import VocabSchema
+from app.services.mapping import VOCAB_INDEX
+from app.services.vocab_index import publish_vocab
 
 router = APIRouter(prefix="/v2/vocab", tags=["vocab"])
 
@@ -41,9 +43,10 @@ def get_vocab():
 def sync_vocab(vocab: VocabSchema):
     # Валидация схемы происходит через Pydantic (критерий: валидация входов)
     try:
-        VOCAB_PATH.parent.mkdir(parents=True, exist_ok=True)
-        VOCAB_PATH.write_text(json.dumps(vocab.model_dump(), ensure_ascii=False, indent=2), encoding="utf-8")
-        return {"status": "ok"}
+        # атомарная подмена файла + штамп; остальные процессы подхватят через наблюдатель
+        stamp = publish_vocab(VOCAB_PATH, vocab.model_dump())
+        VOCAB_INDEX.refresh()  # в своём процессе — сразу
+        return {"status": "ok", "vocab_version": vocab.vocab_version, "stamp": stamp}
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -0,0 +1,207 @@
+"""
+Агрегаты сессий для /entities и /layout.
+
+Каждое обработанное событие вливается в итог своей сессии (упорядоченные без дублей
+entities / keyphrases, элементы в порядке seq, число чанков) в той же
+транзакции, что и status=done, поэтому повтор события при at-least-once не считается
+дважды. Чтение — одна строка session_aggregates или попадание в LRU, независимо от
+длины сессии; ни конкатенации всех чанков, ни повторного NLP.
+
+Порядок элементов не зависит от порядка обработки: для каждого элемента хранится ключ его
+первого появления [final, seq, позиция в mappings] (final — после чанков, как в очереди),
+и опоздавший чанк с меньшим seq ставит свои элементы раньше уже собранных.
+
+LRU заполняется только процессом, который сам обрабатывает очередь; при нескольких
+процессах с воркерами кэш стоит выключить (SESSION_CACHE_SIZE=0) — источник истины таблица.
+app.prefork при SERVER_WORKERS>1 выключает его сам.
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_session
+from app.models import SessionAggregate
+from app.services.nlp_normalization import normalize_text_to_lower
+from app.services.store import iter_session_annotations
+from config.settings import settings
+
+
+class Aggregate(NamedTuple):
+    entities: List[str]
+    keyphrases: List[str]
+    elements: List[str]
+    chunks: int
+    element_order: List[List[int]]  # ключ первого появления каждого элемента, параллельно elements
+
+
+EMPTY = Aggregate([], [], [], 0, [])
+
+
+def _merge(seen: List[str], items: List[str], normalize: bool) -> List[str]:
+    out = seen
+    known = None
+    for item in items:
+        if not item:
+            continue
+        val = normalize_text_to_lower(item) if normalize else item
+        if not val:
+            continue
+        if known is None:
+            known = set(seen)
+        if val not in known:
+            if out is seen:
+                out = list(seen)  # снимки в кэше не мутируем
+            known.add(val)
+            out.append(val)
+    return out
+
+
+def _place(elements: List[str], order: List[List[int]], items: List[Optional[str]],
+           seq: Optional[int]) -> Tuple[List[str], List[List[int]]]:
+    """Элементы события с ключом [final, seq, позиция]; у повторного элемента остаётся меньший ключ."""
+    pos = {e: i for i, e in enumerate(elements)}
+    out_e, out_o = list(elements), [list(k) for k in order]
+    for idx, item in enumerate(items):
+        if not item:
+            continue
+        key = [int(seq is None), seq or 0, idx]
+        i = pos.get(item)
+        if i is None:
+            pos[item] = len(out_e)
+            out_e.append(item)
+            out_o.append(key)
+        elif key < out_o[i]:
+            out_o[i] = key
+    if out_o != sorted(out_o):
+        pairs = sorted(zip(out_o, out_e), key=lambda p: p[0])
+        out_o, out_e = [k for k, _ in pairs], [e for _, e in pairs]
+    return out_e, out_o
+
+
+def fold(agg: Aggregate, annotations: Optional[Dict[str, Any]], seq: Optional[int] = None) -> Aggregate:
+    """Влить аннотации одного события (seq=None — final); события без mappings и keyphrases не считаются."""
+    ann = annotations or {}
+    mappings = ann.get("mappings") or []
+    if not (mappings or ann.get("keyphrases")):
+        return agg
+    elements, order = _place(agg.elements, agg.element_order, [m.get("element") for m in mappings], seq)
+    return Aggregate(
+        entities=_merge(agg.entities, ann.get("entities") or [], True),
+        keyphrases=_merge(agg.keyphrases, ann.get("keyphrases") or [], True),
+        elements=elements,
+        chunks=agg.chunks + 1,
+        element_order=order,
+    )
+
+
+def _from_row(row: SessionAggregate) -> Optional[Aggregate]:
+    """None — строка записана до появления element_order, её нужно свернуть заново."""
+    elements, order = list(row.elements or []), list(row.element_order or [])
+    if len(order) != len(elements):
+        return None
+    return Aggregate(list(row.entities or []), list(row.keyphrases or []), elements, row.chunks, order)
+
+
+def _to_row(row: SessionAggregate, agg: Aggregate) -> None:
+    row.entities, row.keyphrases, row.elements, row.chunks, row.element_order = agg
+    row.updated_at = time.time()
+
+
+class SessionAggregates:
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Aggregate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # --- LRU ---
+
+    def _cached(self, sid: str) -> Optional[Aggregate]:
+        with self._lock:
+            agg = self._data.get(sid)
+            if agg is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(sid)
+            self.hits += 1
+            return agg
+
+    def remember(self, sid: str, agg: Aggregate) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[sid] = agg
+            self._data.move_to_end(sid)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    # --- таблица ---
+
+    @staticmethod
+    async def _rebuild(s: AsyncSession, sid: str) -> Aggregate:
+        """Свернуть уже обработанные события (сессии до появления агрегатов) потоком, без списка в памяти."""
+        agg = EMPTY
+        async for rec in iter_session_annotations(sid, s):
+            agg = fold(agg, rec, rec["seq"])
+        return agg
+
+    async def apply(self, s: AsyncSession, sid: str, event_id: int, annotations: Optional[Dict[str, Any]],
+                    seq: Optional[int] = None) -> Aggregate:
+        """
+        Влить событие в агрегат внутри транзакции вызывающего (до того, как событие
+        помечено done). После commit вызывающий кладёт результат в remember().
+        """
+        row = await s.get(SessionAggregate, sid)
+        base = _from_row(row) if row is not None else None
+        if base is None:
+            base = await self._rebuild(s, sid)
+        if row is None:
+            row = SessionAggregate(session_id=sid)
+            s.add(row)
+        agg = fold(base, annotations, seq)
+        _to_row(row, agg)
+        row.last_event_id = event_id
+        return agg
+
+    async def get(self, sid: str) -> Aggregate:
+        agg = self._cached(sid)
+        return agg if agg is not None else await self._load(sid)
+
+    async def _load(self, sid: str) -> Aggregate:
+        async with async_session() as s:
+            row = await s.get(SessionAggregate, sid)
+            agg = _from_row(row) if row is not None else None
+            if agg is None:
+                agg = await self._rebuild(s, sid)
+                if row is not None:
+                    return agg  # строку старого формата перепишет следующий apply() воркера, не гонимся с ним
+                if agg.chunks:
+                    row = SessionAggregate(session_id=sid)
+                    _to_row(row, agg)
+                    s.add(row)
+                    try:
+                        await s.commit()
+                    except IntegrityError:
+                        # воркер успел создать строку сам — его версия свежее
+                        await s.rollback()
+                        return agg
+        if agg.chunks:
+            self.remember(sid, agg)
+        return agg
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+AGGREGATES = SessionAggregates(settings.session_cache_size)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Dict, List, Any
 from config.settings import settings
-from app.services.store import get_session_results
+from app.services.aggregates import AGGREGATES
 from app.services.tracing import log_event
 
 
@@ -19,28 +19,18 @@ SECTION_RULES = {
 }
 
 
-def build_layout_for_session(session_id: str) -> Dict[str, Any]:
+async def build_layout_for_session(session_id: str) -> Dict[str, Any]:
     """
-    Собираем layout из накопленных mappings в порядке seq, без дублей,
+    Собираем layout из элементов агрегата сессии (по seq первого появления, без дублей),
     ограничиваем MAX_COMPONENTS_PER_PAGE, укладываем по секциям шаблона.
     
     Теперь Mod2 НЕ вызывает Mod3 напрямую. Mod2 только извлекает entities/keyphrases,
     а веб-приложение должно получить их через /v2/session/{id}/entities 
     и передать в Mod3 для получения layout.
     """
-    results = sorted(get_session_results(session_id), key=lambda r: r["seq"] or 0)
-    seen = set()
-    elements: List[str] = []
-    
-    # Собираем все элементы из mappings для простого fallback layout
-    for rec in results:
-        for m in rec.get("mappings", []):
-            elem = m.get("element")
-            if not elem:
-                continue
-            if elem not in seen:
-                seen.add(elem)
-                elements.append(elem)
+    # элементы уже без дублей и по seq первого появления, даже если чанки обработаны не по порядку —
+    # их ведёт агрегат сессии (app.services.aggregates)
+    elements: List[str] = (await AGGREGATES.get(session_id)).elements
 
     # Ограничение количества компонентов на страницу
     elements = elements[: settings.max_components_per_page]
@@ -2,9 +2,9 @@ from __future__ import annotations
 from pathlib import Path
 import json
 from typing import List, Dict, Any
-from rapidfuzz import fuzz
 
 from app.models.schemas import Keyphrase, MappingResult
+from app.services.vocab_index import VocabIndexCache, prepare
 from config.settings import settings
 
 BASE_DIR = Path(__file__).resolve().parents[2]
@@ -39,49 +39,38 @@ def load_vocab() -> Dict[str, Any]:
         return _default_vocab()
 
 
-def map_keyphrases_to_elements(keyphrases: List[Keyphrase], fuzzy_threshold: float | None = None) -> List[MappingResult]:
-    vocab = load_vocab()
-    terms = vocab.get("terms", [])
-    out: List[MappingResult] = []
+# скомпилированный индекс словаря: файл не читается и не разбирается на каждый вызов
+VOCAB_INDEX = VocabIndexCache(
+    VOCAB_PATH, _default_vocab,
+    snapshot_path=Path(settings.vocab_snapshot_path) if settings.vocab_snapshot_path else None,
+)
 
-    threshold = settings.fuzzy_threshold if fuzzy_threshold is None else fuzzy_threshold
 
-    # Готовим варианты сопоставлений
-    term_variants: List[Dict[str, Any]] = []
-    for t in terms:
-        lemma = (t.get("lemma") or "").lower().strip()
-        aliases = [(a or "").lower().strip() for a in t.get("aliases", [])]
-        element = t.get("element")
-        strings = [s for s in [lemma, *aliases] if s]
-        if not element or not strings:
-            continue
-        term_variants.append({"element": element, "strings": strings})
+def map_keyphrases_to_elements(keyphrases: List[Keyphrase], fuzzy_threshold: float | None = None) -> List[MappingResult]:
+    threshold = settings.fuzzy_threshold if fuzzy_threshold is None else fuzzy_threshold
+    # 1) точное совпадение по хэш-таблице, 2) fuzzy — одной матрицей cdist на все keyphrases
+    hits = VOCAB_INDEX.get().match([prepare(kp.lemma) for kp in keyphrases], threshold)
+    return [
+        MappingResult(keyphrase=kp, element=hit[0], score=hit[1])
+        for kp, hit in zip(keyphrases, hits)
+        if hit is not None
+    ]
 
-    for kp in keyphrases:
-        k = kp.lemma.lower().strip()
-        # 1) Точное совпадение
-        exact_hit = None
-        for tv in term_variants:
-            if k in tv["strings"]:
-                exact_hit = MappingResult(keyphrase=kp, element=tv["element"], score=1.0)
-                out.append(exact_hit)
-                break
-        if exact_hit:
-            continue
 
-        # 2) Fuzzy
-        best_score = 0.0
-        best_element = None
-        for tv in term_variants:
-            for s in tv["strings"]:
-                score = fuzz.ratio(k, s) / 100.0
-                if score > best_score:
-                    best_score = score
-                    best_element = tv["element"]
-        if best_element and best_score >= threshold:
-            out.append(MappingResult(keyphrase=kp, element=best_element, score=best_score))
+def annotate_text(text: str) -> Dict[str, Any]:
+    """
+    Один проход NLP по тексту: keyphrases + маппинги в сериализуемом виде.
+    Результат хранится в IngestEvent.annotations и отдаётся read-эндпоинтам без пересчёта.
+    """
+    from app.nlp.extract import extract_keyphrases
 
-    return out
+    keyphrases = extract_keyphrases(text) if text.strip() else []
+    mappings = map_keyphrases_to_elements(keyphrases)
+    return {
+        "mappings": [{"element": m.element, "confidence": m.score} for m in mappings],
+        "entities": [kp.lemma for kp in keyphrases],
+        "keyphrases": [kp.text for kp in keyphrases],
+    }
 
 
 def process_text_mapping(text: str) -> List[MappingResult]:
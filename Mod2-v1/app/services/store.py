@@ -1,8 +1,9 @@
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import async_session
 from app.models import IngestEvent
 from sqlalchemy.exc import IntegrityError
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional
 
 async def save_chunk(data, idem_key):
     async with async_session() as s:
@@ -34,58 +35,40 @@ async def save_final(data, idem_key):
         except IntegrityError:
             await s.rollback()
 
-def get_session_results(session_id: str) -> List[Dict[str, Any]]:
+def _results_query(session_id: str):
+    # final — после чанков, чанки — по seq (так же их обрабатывает очередь)
+    return (
+        select(IngestEvent.kind, IngestEvent.seq, IngestEvent.annotations)
+        .where(IngestEvent.session_id == session_id, IngestEvent.status == "done")
+        .order_by(IngestEvent.seq.is_(None), IngestEvent.seq, IngestEvent.id)
+        .execution_options(yield_per=200)
+    )
+
+
+async def iter_session_annotations(session_id: str, s: Optional[AsyncSession] = None) -> AsyncIterator[Dict[str, Any]]:
     """
-    Синхронная функция для получения результатов сессии.
-    Возвращает список записей с полями seq, mappings, entities и keyphrases.
+    Обработанные события сессии по одному, без материализации всего списка:
+    {"seq", "mappings", "entities", "keyphrases"}. Пустые (без mappings и keyphrases) пропускаются.
+    Можно передать открытую сессию, чтобы читать в её транзакции.
     """
-    import asyncio
-    from app.services.mapping import process_text_mapping
-    from app.nlp.extract import extract_keyphrases
-    
-    async def _get_results():
-        async with async_session() as s:
-            # Получаем все события для сессии
-            result = await s.execute(select(IngestEvent).where(IngestEvent.session_id == session_id))
-            events = result.scalars().all()
-            
-            results = []
-            for event in events:
-                if event.kind == "chunk":
-                    text = event.payload.get("text", "")
-                    mappings = process_text_mapping(text)
-                    keyphrases = extract_keyphrases(text)
-                    
-                    if mappings or keyphrases:
-                        results.append({
-                            "seq": event.seq,
-                            "mappings": [
-                                {"element": m.element, "confidence": m.score} 
-                                for m in mappings
-                            ],
-                            "entities": [kp.lemma for kp in keyphrases],
-                            "keyphrases": [kp.text for kp in keyphrases]
-                        })
-                elif event.kind == "final":
-                    text = event.payload.get("text_full", "")
-                    mappings = process_text_mapping(text)
-                    keyphrases = extract_keyphrases(text)
-                    
-                    if mappings or keyphrases:
-                        results.append({
-                            "seq": None,
-                            "mappings": [
-                                {"element": m.element, "confidence": m.score} 
-                                for m in mappings
-                            ],
-                            "entities": [kp.lemma for kp in keyphrases],
-                            "keyphrases": [kp.text for kp in keyphrases]
-                        })
-            
-            return results
-    
-    try:
-        return asyncio.run(_get_results())
-    except Exception as e:
-        print(f"Error getting session results for {session_id}: {e}")
-        return []
+    if s is None:
+        async with async_session() as own:
+            async for rec in iter_session_annotations(session_id, own):
+                yield rec
+        return
+    result = await s.stream(_results_query(session_id))
+    async for r in result:
+        ann = r.annotations
+        if not ann or not (ann.get("mappings") or ann.get("keyphrases")):
+            continue
+        yield {
+            "seq": r.seq if r.kind == "chunk" else None,
+            "mappings": ann.get("mappings", []),
+            "entities": ann.get("entities", []),
+            "keyphrases": ann.get("keyphrases", []),
+        }
+
+
+async def get_session_results_async(session_id: str) -> List[Dict[str, Any]]:
+    """Все результаты сессии списком — только для небольших выборок (скрипты, отладка)."""
+    return [rec async for rec in iter_session_annotations(session_id)]
@@ -0,0 +1,210 @@
+"""
+Скомпилированный словарь для маппинга keyphrase -> элемент.
+
+Строится один раз из config/vocab.json: хэш-таблица точных совпадений (лемма и алиасы)
+и массив подготовленных строк для fuzzy-поиска. Публикация нового словаря
+(POST /v2/vocab/sync) — атомарная подмена файла и штамп версии; каждый процесс
+подхватывает её своим фоновым наблюдателем (VOCAB_WATCH_SEC).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from app.services.vocab_snapshot import SnapshotIndex, VocabSnapshot
+
+
+def prepare(s: Optional[str]) -> str:
+    return (s or "").lower().strip()
+
+
+class VocabIndex:
+    def __init__(self, vocab: Dict[str, Any]) -> None:
+        self.version = str(vocab.get("vocab_version", ""))
+        self.exact: Dict[str, str] = {}
+        choices: List[str] = []
+        elements: List[str] = []
+        for t in vocab.get("terms", []):
+            element = t.get("element")
+            strings = [s for s in (prepare(t.get("lemma")), *map(prepare, t.get("aliases", []))) if s]
+            if not element or not strings:
+                continue
+            for s in strings:
+                # при совпадении строк у разных терминов выигрывает первый, как при линейном проходе
+                self.exact.setdefault(s, element)
+                choices.append(s)
+                elements.append(element)
+        self.choices = choices
+        self.elements = elements
+
+    def __len__(self) -> int:
+        return len(self.choices)
+
+    def match(self, queries: Sequence[str], threshold: float) -> List[Optional[Tuple[str, float]]]:
+        """
+        (element, score) для каждого запроса или None. Сначала точное совпадение (score=1.0),
+        остальные запросы — одним вызовом rapidfuzz.process.cdist с отсечкой по порогу.
+        """
+        out: List[Optional[Tuple[str, float]]] = [None] * len(queries)
+        fuzzy_idx: List[int] = []
+        for i, q in enumerate(queries):
+            hit = self.exact.get(q)
+            if hit is not None:
+                out[i] = (hit, 1.0)
+            elif self.choices:
+                fuzzy_idx.append(i)
+        if not fuzzy_idx:
+            return out
+        scores = process.cdist(
+            [queries[i] for i in fuzzy_idx], self.choices,
+            scorer=fuzz.ratio, processor=None, score_cutoff=threshold * 100.0, dtype=np.float32,
+        )
+        best = scores.argmax(axis=1)  # первый максимум — как строгое «>» в линейном проходе
+        for row, i in enumerate(fuzzy_idx):
+            j = int(best[row])
+            score = float(scores[row, j])
+            if score > 0.0:
+                out[i] = (self.elements[j], score / 100.0)
+        return out
+
+
+def stamp_path(path: Path) -> Path:
+    return path.with_name(path.name + ".stamp")
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)  # читатель видит либо старый файл целиком, либо новый
+
+
+def publish_vocab(path: Path, vocab: Dict[str, Any]) -> str:
+    """
+    Опубликовать словарь для всех процессов: атомарная подмена файла, затем штамп
+    «<vocab_version> <sha256>» рядом с ним. Возвращает штамп.
+    """
+    data = json.dumps(vocab, ensure_ascii=False, indent=2).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(path, data)
+    stamp = f"{vocab.get('vocab_version', '')} {hashlib.sha256(data).hexdigest()}"
+    _atomic_write(stamp_path(path), stamp.encode("utf-8"))
+    return stamp
+
+
+class VocabIndexCache:
+    """
+    Держит текущий индекс словаря: из mmap-снимка Mod3 (snapshot_path), если он задан
+    и читается, иначе из vocab.json; fallback — словарь по умолчанию.
+
+    Запросы только читают ссылку на готовый индекс (без stat, чтения файла и блокировок).
+    Фоновый поток каждого процесса следит за штампом и файлом (inode/mtime/размер),
+    собирает новый индекс у себя и подменяет ссылку одним присваиванием —
+    полусобранный индекс никто не видит, перезагрузка не задерживает запросы.
+    """
+
+    def __init__(self, path: Path, default: Callable[[], Dict[str, Any]], snapshot_path: Optional[Path] = None) -> None:
+        self.path = path
+        self.default = default
+        self.snapshot_path = snapshot_path
+        self._index: Optional[VocabIndex] = None
+        self._digest: Optional[str] = None
+        self._signature: Optional[Tuple[Any, ...]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.builds = 0
+        self.errors = 0
+
+    def _current_signature(self) -> Tuple[Any, ...]:
+        # снимок тоже подменяется атомарно (новый inode) — достаточно stat
+        sig: List[Any] = []
+        for p in (stamp_path(self.path), self.path, self.snapshot_path):
+            if p is None:
+                continue
+            try:
+                st = os.stat(p)
+                sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _read(self) -> Tuple[Any, str]:
+        # снимок Mod3 (mmap, общий для всех воркеров) важнее локального vocab.json
+        if self.snapshot_path is not None:
+            try:
+                snap = VocabSnapshot(self.snapshot_path)
+                return snap, "snap:" + snap.digest
+            except (OSError, ValueError):
+                pass
+        try:
+            data = self.path.read_bytes()
+            return json.loads(data.decode("utf-8")), hashlib.sha256(data).hexdigest()
+        except Exception:
+            return self.default(), ""
+
+    def refresh(self) -> bool:
+        """Проверить файлы и при изменении собрать и подменить индекс; True — индекс сменился."""
+        with self._lock:
+            signature = self._current_signature()
+            if self._index is not None and signature == self._signature:
+                return False
+            source, digest = self._read()
+            self._signature = signature
+            # файл тронут, но содержимое то же (touch, повторный sync той же версии) — индекс не трогаем
+            if self._index is not None and digest and digest == self._digest:
+                return False
+            self._index = SnapshotIndex(source) if isinstance(source, VocabSnapshot) else VocabIndex(source)
+            self._digest = digest
+            self.builds += 1
+            return True
+
+    def get(self) -> VocabIndex:
+        index = self._index
+        if index is None:
+            self.refresh()  # первый вызов до старта наблюдателя
+            index = self._index
+        return index
+
+    # --- наблюдатель ---
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                self.errors += 1  # битый промежуточный файл и т.п. — текущий индекс остаётся
+
+    def start(self, interval: float) -> None:
+        if self._thread is not None or interval <= 0:
+            return
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), name="vocab-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "version": index.version if index else None,
+            "source": "snapshot" if isinstance(index, SnapshotIndex) else "json",
+            "digest": self._digest[:17] if self._digest else None,
+            "strings": len(index) if index else 0,
+            "builds": self.builds,
+            "errors": self.errors,
+            "watching": self._thread is not None,
+        }
@@ -0,0 +1,171 @@
+"""
+Чтение бинарного снимка словаря Mod3 (terms / synonyms / components / mappings) через mmap.
+
+Формат и экспорт — Mod3-v1/app/services/vocab_snapshot.py (scripts/export_vocab_snapshot.py,
+/v1/vocab/sync). Все воркеры Mod2 отображают один файл: страницы общие, точные совпадения
+ищутся по хэш-таблицам прямо в файле; в память процесса декодируются только строки для fuzzy.
+"""
+from __future__ import annotations
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+MAGIC = b"M3VOCAB1"
+NONE = 0xFFFFFFFF
+HEADER = struct.Struct("<8sIIIIIIII32s8Q")
+TERM = struct.Struct("<IIiI")
+SYN = struct.Struct("<IIII")
+COMP = struct.Struct("<IIII")
+MAP = struct.Struct("<IIId")
+SLOT = struct.Struct("<I")
+
+
+def fnv1a(data: bytes) -> int:
+    h = 0x811C9DC5
+    for b in data:
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+class VocabSnapshot:
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mv = memoryview(self._mm)
+        if len(mv) < HEADER.size:
+            raise ValueError(f"{path}: truncated vocabulary snapshot")
+        (magic, self.n_strings, self.n_terms, self.n_synonyms, self.n_components, self.n_mappings,
+         self._term_slots, self._syn_slots, version_idx, digest, *sections) = HEADER.unpack_from(mv, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a vocabulary snapshot")
+        self.digest = digest.hex()
+        self._mv = mv
+        s_str, self._terms, self._syns, self._comps, self._maps, self._th, self._sh, _ = sections
+        self._check_sections(path, sections)
+        self._offsets = mv[s_str:s_str + 4 * (self.n_strings + 1)].cast("I")
+        self._blob = s_str + 4 * (self.n_strings + 1)
+        if self._offsets[-1] > self._terms - self._blob:
+            raise ValueError(f"{path}: corrupted vocabulary snapshot (strings)")
+        if version_idx != NONE and version_idx >= self.n_strings:
+            raise ValueError(f"{path}: corrupted vocabulary snapshot (version)")
+        self.version = self.string(version_idx)
+
+    def _check_sections(self, path: Path, sections: List[int]) -> None:
+        """Секции лежат по порядку внутри файла и вмещают свои записи: обрезанный файл — ValueError, а не struct.error."""
+        need = [4 * (self.n_strings + 1), TERM.size * self.n_terms, SYN.size * self.n_synonyms,
+                COMP.size * self.n_components, MAP.size * self.n_mappings, 4 * self._term_slots, 4 * self._syn_slots]
+        if sections[-1] != len(self._mv) or sections[0] < HEADER.size:
+            raise ValueError(f"{path}: truncated vocabulary snapshot")
+        for start, size, end in zip(sections, need, sections[1:]):
+            if start + size > end:
+                raise ValueError(f"{path}: corrupted vocabulary snapshot (section at {start})")
+        for slots in (self._term_slots, self._syn_slots):
+            if slots < 1 or slots & (slots - 1):
+                raise ValueError(f"{path}: corrupted vocabulary snapshot (hash table)")
+
+    def string(self, i: int) -> Optional[str]:
+        if i == NONE:
+            return None
+        return bytes(self._mv[self._blob + self._offsets[i]:self._blob + self._offsets[i + 1]]).decode("utf-8")
+
+    def _string_eq(self, i: int, key: bytes) -> bool:
+        lo, hi = self._offsets[i], self._offsets[i + 1]
+        return hi - lo == len(key) and self._mv[self._blob + lo:self._blob + hi] == key
+
+    def term(self, i: int) -> Tuple[int, int, int, int]:
+        return TERM.unpack_from(self._mv, self._terms + i * TERM.size)
+
+    def synonym(self, i: int) -> Tuple[int, int, int, int]:
+        return SYN.unpack_from(self._mv, self._syns + i * SYN.size)
+
+    def component(self, i: int) -> Tuple[int, int, int, int]:
+        return COMP.unpack_from(self._mv, self._comps + i * COMP.size)
+
+    def mapping(self, i: int) -> Tuple[int, int, int, float]:
+        return MAP.unpack_from(self._mv, self._maps + i * MAP.size)
+
+    def _probe(self, table: int, slots: int, record, key: str) -> Iterator[int]:
+        raw = key.encode("utf-8")
+        pos = fnv1a(raw) & (slots - 1)
+        while True:
+            (slot,) = SLOT.unpack_from(self._mv, table + pos * 4)
+            if not slot:
+                return
+            if self._string_eq(record(slot - 1)[1], raw):
+                yield slot - 1
+            pos = (pos + 1) & (slots - 1)
+
+    def find_terms(self, norm: str) -> Iterator[int]:
+        return self._probe(self._th, self._term_slots, self.term, norm)
+
+    def find_synonyms(self, norm: str) -> Iterator[int]:
+        return self._probe(self._sh, self._syn_slots, self.synonym, norm)
+
+    def element(self, term_i: int) -> Optional[str]:
+        """Компонент первой активной привязки активного термина."""
+        _, _, map_i, flags = self.term(term_i)
+        if not flags & 1 or map_i < 0:
+            return None
+        return self.string(self.component(self.mapping(map_i)[2])[0])
+
+
+class SnapshotIndex:
+    """Тот же интерфейс, что у VocabIndex, поверх снимка: термины, затем синонимы."""
+
+    def __init__(self, snap: VocabSnapshot) -> None:
+        self.snap = snap
+        self.version = snap.version or ""
+        choices: List[str] = []
+        terms: List[int] = []
+        for i in range(snap.n_terms):
+            if snap.element(i) is not None:
+                choices.append(snap.string(snap.term(i)[1]))
+                terms.append(i)
+        for i in range(snap.n_synonyms):
+            _, norm, term_i, _ = snap.synonym(i)
+            if snap.element(term_i) is not None:
+                choices.append(snap.string(norm))
+                terms.append(term_i)
+        self.choices = choices
+        self._terms = terms
+
+    def __len__(self) -> int:
+        return len(self.choices)
+
+    def _exact(self, q: str) -> Optional[str]:
+        for i in self.snap.find_terms(q):
+            el = self.snap.element(i)
+            if el is not None:
+                return el
+        for i in self.snap.find_synonyms(q):
+            el = self.snap.element(self.snap.synonym(i)[2])
+            if el is not None:
+                return el
+        return None
+
+    def match(self, queries: Sequence[str], threshold: float) -> List[Optional[Tuple[str, float]]]:
+        out: List[Optional[Tuple[str, float]]] = [None] * len(queries)
+        fuzzy_idx: List[int] = []
+        for i, q in enumerate(queries):
+            hit = self._exact(q) if q else None
+            if hit is not None:
+                out[i] = (hit, 1.0)
+            elif self.choices:
+                fuzzy_idx.append(i)
+        if not fuzzy_idx:
+            return out
+        scores = process.cdist(
+            [queries[i] for i in fuzzy_idx], self.choices,
+            scorer=fuzz.ratio, processor=None, score_cutoff=threshold * 100.0, dtype=np.float32,
+        )
+        best = scores.argmax(axis=1)
+        for row, i in enumerate(fuzzy_idx):
+            j = int(best[row])
+            score = float(scores[row, j])
+            if score > 0.0:
+                out[i] = (self.snap.element(self._terms[j]), score / 100.0)
+        return out
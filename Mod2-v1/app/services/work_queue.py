@@ -0,0 +1,256 @@
+"""
+Надёжная очередь обработки поверх таблицы ingest_events.
+
+Приём (/v2/ingest/*) только сохраняет событие со status=pending и сразу отвечает.
+Пул воркеров забирает события (CAS-обновление status -> processing с арендой claimed_at),
+прогоняет NLP и пишет annotations + status=done. Доставка at-least-once: событие,
+чья аренда истекла (воркер упал), забирается снова; обработка детерминирована,
+повтор безопасен. Внутри сессии события идут строго по seq (final — после чанков),
+одновременно в работе не больше одного события сессии — во всех процессах: условие входит
+в UPDATE захвата. Упавшее событие возвращается в pending с паузой not_before
+(INGEST_RETRY_BACKOFF_SEC, ×2 на попытку) и до повтора держит свою сессию.
+"""
+from __future__ import annotations
+import asyncio
+import math
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.db import async_session
+from app.models import IngestEvent
+from app.services.aggregates import AGGREGATES
+from app.services.tracing import log_event
+from config.settings import settings
+
+PENDING, PROCESSING, DONE, FAILED = "pending", "processing", "done", "failed"
+
+
+def _order_key(ev: IngestEvent):
+    return (ev.seq is None, ev.seq or 0, ev.id)
+
+
+def _claimable(expired: float):
+    # pending (в том числе ждущие повтора — они держат очередь своей сессии) или брошенные с истёкшей арендой
+    return or_(
+        IngestEvent.status == PENDING,
+        and_(IngestEvent.status == PROCESSING, IngestEvent.claimed_at < expired),
+    )
+
+
+def retry_delay(attempt: int) -> float:
+    """Пауза перед повтором после неудачной попытки attempt: экспоненциально, с потолком."""
+    return min(settings.ingest_retry_backoff_max_sec, settings.ingest_retry_backoff_sec * 2 ** max(0, attempt - 1))
+
+
+def _annotate_event(ev: IngestEvent) -> Dict[str, Any]:
+    from app.services.mapping import annotate_text
+    text = ev.payload.get("text" if ev.kind == "chunk" else "text_full", "")
+    return annotate_text(text)
+
+
+class IngestWorkQueue:
+    def __init__(self) -> None:
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._active: Set[str] = set()
+        self._proc_sec = 0.0
+        self.processed = 0
+        self.failed = 0
+
+    # --- приём ---
+
+    async def depth(self) -> int:
+        async with async_session() as s:
+            return (await s.execute(
+                select(func.count(IngestEvent.id)).where(IngestEvent.status.in_((PENDING, PROCESSING)))
+            )).scalar_one()
+
+    def retry_after(self, depth: int) -> int:
+        """Оценка времени разбора очереди: глубина / воркеры × среднее время события."""
+        per_event = self._proc_sec or 0.5
+        return max(1, math.ceil(depth / max(1, settings.ingest_workers) * per_event))
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # --- обработка ---
+
+    async def _claim(self) -> Optional[IngestEvent]:
+        now = time.time()
+        expired = now - settings.ingest_lease_sec
+        async with async_session() as s:
+            # предварительный отбор сессий; исключение «сессия уже в работе» гарантирует _claim_head
+            busy = select(IngestEvent.session_id).where(
+                IngestEvent.status == PROCESSING, IngestEvent.claimed_at >= expired
+            )
+            sids = (await s.execute(
+                select(IngestEvent.session_id)
+                .where(_claimable(expired), IngestEvent.session_id.not_in(busy))
+                .group_by(IngestEvent.session_id)
+                .order_by(func.min(IngestEvent.id))
+                .limit(50)
+            )).scalars().all()
+            for sid in sids:
+                if sid in self._active:
+                    continue
+                ev = await self._claim_head(s, sid, now)
+                if ev is not None:
+                    self._active.add(sid)
+                    return ev
+        return None
+
+    @staticmethod
+    async def _claim_head(s: AsyncSession, sid: str, now: float) -> Optional[IngestEvent]:
+        """
+        Забрать первое по seq событие сессии. Условие «у сессии нет события в работе под живой
+        арендой» входит в сам UPDATE: другой процесс мог забрать seq N между выборками, и тогда
+        seq N+1 не забирается, пока N не завершён.
+        """
+        expired = now - settings.ingest_lease_sec
+        evs = (await s.execute(
+            select(IngestEvent).where(IngestEvent.session_id == sid, _claimable(expired))
+        )).scalars().all()
+        if not evs:
+            return None
+        ev = min(evs, key=_order_key)
+        if ev.status == PENDING and ev.not_before and ev.not_before > now:
+            return None  # голова сессии ждёт повтора — следующие seq ждут вместе с ней
+        other = aliased(IngestEvent)
+        in_lease = exists().where(
+            other.session_id == sid, other.id != ev.id,
+            other.status == PROCESSING, other.claimed_at >= expired,
+        )
+        res = await s.execute(
+            update(IngestEvent)
+            .where(IngestEvent.id == ev.id, IngestEvent.status == ev.status, IngestEvent.attempts == ev.attempts,
+                   ~in_lease)
+            .values(status=PROCESSING, claimed_at=now, attempts=ev.attempts + 1, not_before=None)
+            .execution_options(synchronize_session=False)
+        )
+        await s.commit()
+        if res.rowcount != 1:
+            return None
+        ev.attempts += 1  # дальше ev.attempts — номер текущей попытки
+        return ev
+
+    async def _finish(self, ev: IngestEvent, annotations: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        if error is not None:
+            gave_up = ev.attempts >= settings.ingest_max_attempts
+            values = {"status": FAILED if gave_up else PENDING, "error": error[:2000], "claimed_at": None,
+                      "not_before": None if gave_up else time.time() + retry_delay(ev.attempts)}
+            async with async_session() as s:
+                await s.execute(update(IngestEvent).where(IngestEvent.id == ev.id).values(**values))
+                await s.commit()
+            return
+        for retry in (True, False):
+            async with async_session() as s:
+                # агрегат сессии и status=done — одной транзакцией
+                agg = await AGGREGATES.apply(s, ev.session_id, ev.id, annotations, ev.seq if ev.kind == "chunk" else None)
+                res = await s.execute(
+                    update(IngestEvent)
+                    .where(IngestEvent.id == ev.id, IngestEvent.status == PROCESSING, IngestEvent.attempts == ev.attempts)
+                    .values(status=DONE, annotations=annotations, error=None, claimed_at=None)
+                )
+                if res.rowcount != 1:
+                    # аренда истекла и событие уже забрал другой воркер — его результат и засчитаем
+                    await s.rollback()
+                    return
+                try:
+                    await s.commit()
+                except IntegrityError:
+                    # строку агрегата параллельно создало чтение (_load) — перечитываем
+                    await s.rollback()
+                    if retry:
+                        continue
+                    raise
+            AGGREGATES.remember(ev.session_id, agg)
+            return
+
+    async def _release(self, ev: IngestEvent) -> None:
+        async with async_session() as s:
+            await s.execute(
+                update(IngestEvent).where(IngestEvent.id == ev.id, IngestEvent.status == PROCESSING)
+                .values(status=PENDING, claimed_at=None, attempts=ev.attempts - 1)
+            )
+            await s.commit()
+
+    async def process_one(self) -> bool:
+        """Забрать и обработать одно событие; False — работы нет."""
+        ev = await self._claim()
+        if ev is None:
+            return False
+        t0 = time.time()
+        try:
+            annotations = await asyncio.to_thread(_annotate_event, ev)
+        except asyncio.CancelledError:
+            # остановка сервиса: возвращаем событие в очередь, не дожидаясь истечения аренды
+            await self._release(ev)
+            raise
+        except Exception as e:
+            self.failed += 1
+            await self._finish(ev, None, str(e))
+            log_event("event_failed", session_id=ev.session_id, seq=ev.seq, status="error", error=str(e), attempts=ev.attempts)
+            return True
+        finally:
+            self._active.discard(ev.session_id)
+        await self._finish(ev, annotations, None)
+        dt = time.time() - t0
+        self._proc_sec = dt if not self._proc_sec else 0.8 * self._proc_sec + 0.2 * dt
+        self.processed += 1
+        log_event(f"{ev.kind}_processed", session_id=ev.session_id, seq=ev.seq,
+                  mappings_count=len(annotations["mappings"]), latency_ms=int(dt * 1000))
+        return True
+
+    async def drain(self) -> None:
+        """Дождаться разбора всей очереди, включая события в работе у других воркеров (скрипты, тесты)."""
+        while True:
+            if await self.process_one():
+                continue
+            if not await self.depth():
+                return
+            await asyncio.sleep(0.01)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                if await self.process_one():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_event("work_queue_error", status="error", error=str(e))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.ingest_poll_ms / 1000.0)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(max(1, settings.ingest_workers))]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_event_ms": int(self._proc_sec * 1000),
+        }
+
+
+WORK_QUEUE = IngestWorkQueue()
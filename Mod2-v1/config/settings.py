@@ -59,8 +59,31 @@ class Settings(BaseSettings):
 
     # — NLP / Mapping —
     stanza_lang: str = Field(default="ru", alias="STANZA_LANG")
+    stanza_model_dir: str = Field(default="./data/stanza", alias="STANZA_MODEL_DIR")  # scripts/fetch_stanza_models.py
+    stanza_allow_download: bool = Field(default=False, alias="STANZA_ALLOW_DOWNLOAD")  # докачать при старте, если хранилища нет
+    stanza_verify_hashes: bool = Field(default=False, alias="STANZA_VERIFY_HASHES")  # sha256 файлов при старте, не только размеры
     fuzzy_threshold: float = Field(default=0.80, alias="FUZZY_THRESHOLD")
     stream_preview: bool = Field(default=True, alias="STREAM_PREVIEW")
+    nlp_cache_size: int = Field(default=20000, alias="NLP_CACHE_SIZE")  # предложений в LRU аннотаций
+    nlp_lexicon: bool = Field(default=True, alias="NLP_LEXICON")  # извлечение кандидатов без Stanza для известных токенов
+    nlp_lexicon_size: int = Field(default=50000, alias="NLP_LEXICON_SIZE")  # словоформ в лексиконе
+    nlp_lexicon_min_count: int = Field(default=2, alias="NLP_LEXICON_MIN_COUNT")  # сколько раз форма должна встретиться
+    nlp_batch_max: int = Field(default=16, alias="NLP_BATCH_MAX")  # текстов в одном вызове Stanza; 1 — без батчинга
+    nlp_batch_wait_ms: int = Field(default=10, alias="NLP_BATCH_WAIT_MS")  # сколько ждать попутчиков
+    nlp_workers: int = Field(default=0, alias="NLP_WORKERS")  # процессов Stanza; 0 — в процессе сервера
+    nlp_threads: int = Field(default=0, alias="NLP_THREADS")  # потоков torch/OpenMP на процесс; 0 — ядра / число процессов
+
+    # — Ingest queue —
+    ingest_workers: int = Field(default=2, alias="INGEST_WORKERS")
+    ingest_queue_max: int = Field(default=1000, alias="INGEST_QUEUE_MAX")  # выше — 429 + Retry-After
+    ingest_max_attempts: int = Field(default=5, alias="INGEST_MAX_ATTEMPTS")
+    ingest_lease_sec: int = Field(default=120, alias="INGEST_LEASE_SEC")  # аренда события воркером
+    ingest_poll_ms: int = Field(default=500, alias="INGEST_POLL_MS")
+    ingest_retry_backoff_sec: float = Field(default=2.0, alias="INGEST_RETRY_BACKOFF_SEC")  # пауза перед повтором, ×2 на попытку
+    ingest_retry_backoff_max_sec: float = Field(default=300.0, alias="INGEST_RETRY_BACKOFF_MAX_SEC")
+    vocab_watch_sec: float = Field(default=1.0, alias="VOCAB_WATCH_SEC")  # опрос штампа словаря; 0 — без наблюдателя
+    vocab_snapshot_path: str = Field(default="", alias="VOCAB_SNAPSHOT_PATH")  # mmap-снимок словаря Mod3; пусто — vocab.json
+    session_cache_size: int = Field(default=1024, alias="SESSION_CACHE_SIZE")  # агрегатов сессий в памяти
 
     # — Layout —
     page_template: str = Field(default="hero-main-footer", alias="PAGE_TEMPLATE")
@@ -81,6 +104,7 @@ class Settings(BaseSettings):
     environment: str = Field(default="dev")
     host: str = Field(default="0.0.0.0")
     port: int = Field(default=8080)
+    server_workers: int = Field(default=1, alias="SERVER_WORKERS")  # воркеров prefork-сервера (python -m app.prefork)
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -12,6 +12,8 @@ from app.nlp.pipeline import preload_ru
 from app.routers import ingest
 from app.health import router as health_router
 from app.db import init_db
+from app.services.work_queue import WORK_QUEUE
+from app.services.mapping import VOCAB_INDEX
 
 app = FastAPI(title=settings.app_name)
 
@@ -32,8 +34,8 @@ app.include_router(debug_router)
 
 @app.on_event("startup")
 async def _startup():
-    # Не блокируем старт приложения на загрузке моделей Stanza.
-    # Попробуем прогреть в фоне, а если не получится — просто продолжим.
+    # Не блокируем старт приложения на загрузке моделей Stanza: грузим из локального
+    # хранилища и прогреваем в фоне, пока /readyz отвечает 503.
     try:
         import threading
         threading.Thread(target=preload_ru, daemon=True).start()
@@ -46,6 +48,15 @@ async def _startup():
     except Exception:
         # Не валим приложение, если таблицы уже есть или окружение без БД
         pass
+    # Пул обработки принятых событий (NLP вне пути запроса)
+    WORK_QUEUE.start()
+    # словарь собирается до первых запросов, дальше — фоновая подмена при публикации
+    VOCAB_INDEX.start(settings.vocab_watch_sec)
+
+@app.on_event("shutdown")
+async def _shutdown():
+    VOCAB_INDEX.stop()
+    await WORK_QUEUE.stop()
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Подготовка локального хранилища моделей Stanza (шаг сборки образа; сервис при старте в сеть не ходит).
+
+    python scripts/fetch_stanza_models.py            # скачать в STANZA_MODEL_DIR и записать manifest.json
+    python scripts/fetch_stanza_models.py --verify   # проверить хранилище, включая sha256
+"""
+import os
+import sys
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.nlp.models import ModelStoreError, fetch_models, verify_store
+from app.nlp.pipeline import PROCESSORS
+from config.settings import settings
+
+
+def main():
+    model_dir = Path(settings.stanza_model_dir)
+    if "--verify" in sys.argv[1:]:
+        try:
+            manifest = verify_store(model_dir, settings.stanza_lang, PROCESSORS, full=True)
+        except ModelStoreError as e:
+            print(f"Model store invalid: {e}")
+            sys.exit(1)
+        print(f"Model store OK: {model_dir} ({len(manifest['files'])} files, stanza {manifest['stanza_version']})")
+        return
+    manifest = fetch_models(model_dir, settings.stanza_lang, PROCESSORS)
+    print(f"Fetched {len(manifest['files'])} files into {model_dir}")
+
+
+if __name__ == "__main__":
+    main()
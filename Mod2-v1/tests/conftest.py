@@ -0,0 +1,50 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.nlp import pipeline
+from app.nlp.cache import CACHE
+from app.nlp.lexicon import LEXICON
+
+# Мини-словарь вместо моделей Stanza: слово -> (лемма, часть речи)
+_LEX = {
+    "нужна": ("нужный", "ADJ"),
+    "форма": ("форма", "NOUN"),
+    "обратной": ("обратный", "ADJ"),
+    "связи": ("связь", "NOUN"),
+    "каталог": ("каталог", "NOUN"),
+    "услуг": ("услуга", "NOUN"),
+}
+
+
+class FakeNLP:
+    """Заменяет stanza.Pipeline: str -> Document, список Document -> список Document."""
+
+    def __init__(self):
+        self.calls = []
+
+    def _doc(self, text):
+        words = []
+        for tok in re.findall(r"\w+|[^\w\s]", text):
+            lemma, upos = _LEX.get(tok.lower(), (tok.lower(), "X" if tok[0].isalnum() else "PUNCT"))
+            words.append(SimpleNamespace(text=tok, lemma=lemma, upos=upos))
+        return SimpleNamespace(text=text, sentences=[SimpleNamespace(text=text, words=words)])
+
+    def __call__(self, docs):
+        if isinstance(docs, str):
+            self.calls.append([docs])
+            return self._doc(docs)
+        self.calls.append([d.text for d in docs])
+        return [self._doc(d.text) for d in docs]
+
+
+@pytest.fixture
+def fake_nlp(monkeypatch):
+    nlp = FakeNLP()
+    monkeypatch.setattr(pipeline, "_NLP_RU", nlp)
+    CACHE.clear()
+    LEXICON.clear()
+    yield nlp
+    CACHE.clear()
+    LEXICON.clear()
@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+
+from app.services import mapping
+from app.services.work_queue import WORK_QUEUE
+from config.settings import settings
+from main import app
+
+
+def _chunk(sid, seq, text):
+    return {"session_id": sid, "chunk_id": f"{sid}-c{seq}", "seq": seq, "text": text, "lang": "ru-RU"}
+
+
+def test_annotations_computed_once_by_queue(monkeypatch, fake_nlp):
+    with TestClient(app) as client:
+        r = client.post("/v2/ingest/chunk", json={
+            "session_id": "ann1",
+            "chunk_id": "ann1-c1",
+            "seq": 1,
+            "text": "Нужна форма обратной связи и каталог услуг",
+            "lang": "ru-RU",
+        })
+        assert r.status_code == 200 and r.json()["queued"]
+        client.portal.call(WORK_QUEUE.drain)
+
+        # чтения не должны запускать NLP повторно
+        def _boom(text):
+            raise AssertionError("NLP recomputed on read")
+        monkeypatch.setattr(mapping, "annotate_text", _boom)
+
+        ents = client.get("/v2/session/ann1/entities").json()
+        assert "форма обратный" in ents["entities"] or "обратный связь" in ents["entities"]
+        layout = client.get("/v2/session/ann1/layout").json()["layout"]
+        assert "ContactForm" in [c["component"] for c in layout["sections"]["footer"]]
+
+
+def test_queue_full_sheds_load(monkeypatch, fake_nlp):
+    with TestClient(app) as client:
+        client.portal.call(WORK_QUEUE.stop)  # воркеры стоят — очередь только растёт
+        monkeypatch.setattr(settings, "ingest_queue_max", 2)
+        codes = [client.post("/v2/ingest/chunk", json=_chunk("shed1", i, f"шаг {i}")).status_code for i in (2, 1, 3)]
+        assert codes == [200, 200, 429]
+        r = client.post("/v2/ingest/chunk", json=_chunk("shed1", 3, "Каталог услуг"))
+        assert r.status_code == 429 and int(r.headers["Retry-After"]) >= 1
+
+        order = []
+        monkeypatch.setattr(mapping, "annotate_text", lambda text: order.append(text) or
+                            {"mappings": [], "entities": [], "keyphrases": [text]})
+        client.portal.call(WORK_QUEUE.drain)
+        assert order == ["шаг 1", "шаг 2"]  # внутри сессии — по seq, а не по порядку прихода
+        ents = client.get("/v2/session/shed1/entities").json()
+        assert ents["chunks_processed"] == 2
@@ -0,0 +1,45 @@
+import threading
+
+from app.nlp.pipeline import NLPBatcher
+
+
+def test_concurrent_requests_share_one_call():
+    calls = []
+    gate = threading.Event()
+
+    def runner(texts):
+        gate.wait(1)
+        calls.append(list(texts))
+        return [[t.upper()] for t in texts]
+
+    b = NLPBatcher(runner, max_batch=8, max_wait_ms=200)
+    results = {}
+
+    def worker(i):
+        results[i] = b.annotate([f"t{i}a", f"t{i}b"])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+    # каждый получил свои аннотации в своём порядке
+    assert results == {i: [[f"T{i}A"], [f"T{i}B"]] for i in range(3)}
+    assert sum(len(c) for c in calls) == 6 and len(calls) < 3
+    assert all(len(c) <= 8 for c in calls)
+
+
+def test_runner_error_reaches_every_waiter():
+    def runner(texts):
+        raise RuntimeError("pipeline down")
+
+    b = NLPBatcher(runner, max_batch=4, max_wait_ms=0)
+    fut = b.submit(["x"])
+    try:
+        fut.result(5)
+    except RuntimeError as e:
+        assert "pipeline down" in str(e)
+    else:
+        raise AssertionError("expected error")
@@ -0,0 +1,34 @@
+from app.nlp.cache import AnnotationCache, CACHE
+from app.nlp.extract import annotate, split_sentences, lemmatize_phrase, extract_np_candidates
+
+
+def test_only_unseen_sentences_hit_pipeline(fake_nlp):
+    annotate("Нужна форма обратной связи. Каталог услуг.")
+    assert fake_nlp.calls == [["Нужна форма обратной связи.", "Каталог услуг."]]
+
+    # overlap с предыдущим чанком + новое предложение
+    sents = annotate("Каталог услуг. Новый блок.")
+    assert fake_nlp.calls[-1] == ["Новый блок."]
+    assert [s.text for s in sents] == ["Каталог услуг.", "Новый блок."]
+
+    # final повторяет весь текст — пайплайн не нужен
+    n = len(fake_nlp.calls)
+    annotate("Нужна форма обратной связи.  Каталог услуг. Новый блок.")
+    assert len(fake_nlp.calls) == n
+    assert CACHE.stats()["hits"] >= 4
+
+
+def test_debug_parse_runs_pipeline_once(fake_nlp):
+    text = "Нужна форма обратной связи."
+    split_sentences(text)
+    lemmatize_phrase(text)
+    extract_np_candidates(text)
+    assert len(fake_nlp.calls) == 1
+
+
+def test_lru_bound():
+    c = AnnotationCache(2)
+    c.put("a", []); c.put("b", [])
+    c.get("a")
+    c.put("c", [])
+    assert c.get("b") is None and c.get("a") == [] and c.stats()["size"] == 2
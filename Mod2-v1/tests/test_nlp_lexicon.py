@@ -0,0 +1,54 @@
+from app.nlp import extract
+from app.nlp.cache import CACHE
+from app.nlp.extract import extract_np_candidates
+from app.nlp.lexicon import LEXICON, Lexicon, _Entry
+from app.nlp.pipeline import Sentence, Word
+
+
+def test_known_tokens_skip_pipeline(fake_nlp, monkeypatch):
+    extract_np_candidates("Нужна форма обратной связи. Каталог услуг.")
+    extract_np_candidates("Каталог услуг, форма обратной связи.")  # «,» ещё не встречалась
+    assert len(fake_nlp.calls) == 2
+
+    fast = extract_np_candidates("Форма обратной связи.")
+    assert len(fake_nlp.calls) == 2  # всё собрано из лексикона
+    assert LEXICON.stats()["hits"] == 1 and LEXICON.stats()["hit_rate"] > 0
+
+    monkeypatch.setattr(extract.settings, "nlp_lexicon", False)
+    CACHE.clear()
+    assert extract_np_candidates("Форма обратной связи.") == fast  # тот же результат, что у пайплайна
+    assert len(fake_nlp.calls) == 3
+
+
+def test_ambiguous_and_unsafe_fragments_go_to_pipeline():
+    lex = Lexicon(100, min_count=1)
+    w = lambda t, l, u: Word(t, l, u)  # noqa: E731
+    lex.learn([
+        Sentence("Стали нужны формы.", (w("Стали", "стать", "VERB"), w("нужны", "нужный", "ADJ"),
+                                        w("формы", "форма", "NOUN"), w(".", ".", "PUNCT"))),
+        Sentence("Формы из стали.", (w("Формы", "форма", "NOUN"), w("из", "из", "ADP"),
+                                     w("стали", "сталь", "NOUN"), w(".", ".", "PUNCT"))),
+        Sentence("т.е. формы", (w("т.е.", "т.е.", "X"), w("формы", "форма", "NOUN"))),  # токенизация не совпала
+    ])
+    assert lex.lookup("Нужны формы.") == [Sentence("Нужны формы.", (w("Нужны", "нужный", "ADJ"),
+                                                                    w("формы", "форма", "NOUN"), w(".", ".", "PUNCT")))]
+    assert lex.lookup("Формы из стали.") is None  # «стали»: два разбора
+    assert lex.lookup("Формы. Формы") is None  # конец предложения внутри фрагмента
+    assert lex.lookup("Кнопка формы.") is None
+    st = lex.stats()
+    assert st["ambiguous_forms"] == 1 and st["skipped_sentences"] == 1
+    assert (st["hits"], st["miss_ambiguous"], st["miss_unknown"]) == (1, 1, 1)
+
+
+
+def test_stats_waits_for_learn():
+    import threading
+    lex = Lexicon(100, min_count=1)
+    done = threading.Event()
+    with lex._lock:  # learn() в другом потоке посреди обновления словаря
+        t = threading.Thread(target=lambda: (lex.stats(), done.set()))
+        t.start()
+        assert not done.wait(0.2)  # stats() не обходит словарь, пока его меняют
+        lex._data["форма"] = _Entry("форма", "NOUN")
+    t.join(5)
+    assert done.is_set() and lex.stats()["size"] == 1
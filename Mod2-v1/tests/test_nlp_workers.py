@@ -0,0 +1,70 @@
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.nlp import pipeline
+from app.nlp.pipeline import NLPBatcher, Sentence, Word
+from app.nlp.workers import NLPPool, encode, decode
+
+
+def test_ipc_roundtrip():
+    sents = [
+        Sentence("Нужна форма связи.", (Word("Нужна", "нужный", "ADJ"), Word("форма", "форма", "NOUN"),
+                                         Word("связи", "связь", "NOUN"), Word(".", ".", "PUNCT"))),
+        Sentence("", ()),
+        Sentence("Каталог услуг", (Word("Каталог", "каталог", "NOUN"), Word("услуг", "услуга", "NOUN"))),
+    ]
+    blob = encode(sents)
+    assert isinstance(blob, str)
+    assert decode(blob) == sents
+    assert decode(encode([])) == []
+
+
+def test_batcher_keeps_several_batches_in_flight():
+    pool = ThreadPoolExecutor(4)
+    running, peak = 0, 0
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def work(texts):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        release.wait(2)
+        with lock:
+            running -= 1
+        return [[t] for t in texts]
+
+    def runner(texts) -> Future:
+        return pool.submit(work, texts)
+
+    b = NLPBatcher(runner, max_batch=1, max_wait_ms=0, max_inflight=3)
+    futs = [b.submit([f"t{i}"]) for i in range(6)]
+    threading.Timer(0.2, release.set).start()
+    assert [f.result(5) for f in futs] == [[[f"t{i}"]] for i in range(6)]
+    assert peak == 3
+
+
+def test_broken_pool_is_rebuilt(monkeypatch):
+    monkeypatch.setattr(pipeline.READINESS, "state", "ready")
+    pool = NLPPool(1, initializer=sys.exit, backoff_sec=0.05)  # initializer падает в каждом воркере
+    try:
+        with pytest.raises(BrokenProcessPool):
+            pool.submit(["Форма"]).result(60)
+        assert pipeline.READINESS.state in ("failed", "loading")
+        with pytest.raises(BrokenProcessPool):
+            pool.submit(["Форма"])  # пока идёт пересборка — быстрый отказ, без нового пула
+
+        pool.initializer = None  # причина устранена — следующая попытка пересборки удаётся
+        deadline = time.monotonic() + 60
+        while not pipeline.READINESS.ready and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pipeline.READINESS.ready and pool.stats()["rebuilds"] == 1
+        assert pool.submit([]).result(60) == []
+    finally:
+        pool.shutdown()
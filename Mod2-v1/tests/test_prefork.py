@@ -0,0 +1,69 @@
+import json
+import os
+import time
+import urllib.request
+
+import pytest
+
+from app.nlp import pipeline
+from app import prefork
+from app.prefork import Master, _bind, configure, worker_info
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork needs os.fork")
+
+
+async def _app(scope, receive, send):
+    """Мини-ASGI: кто ответил и видит ли он пайплайн, загруженный мастером до fork."""
+    if scope["type"] == "lifespan":
+        while (await receive())["type"] != "lifespan.shutdown":
+            await send({"type": "lifespan.startup.complete"})
+        await send({"type": "lifespan.shutdown.complete"})
+        return
+    body = json.dumps({**worker_info(), "nlp": id(pipeline._NLP_RU)}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _get(port):
+    deadline = time.monotonic() + 20
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2) as r:
+                return json.loads(r.read())
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def test_thread_budget_splits_cores(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "nlp_threads", 0)
+    monkeypatch.setattr(pipeline.os, "cpu_count", lambda: 8)
+    assert pipeline.thread_budget(4) == 2
+    assert pipeline.thread_budget(16) == 1
+    monkeypatch.setattr(pipeline.settings, "nlp_threads", 3)
+    assert pipeline.thread_budget(4) == 3
+
+
+def test_session_cache_off_with_several_workers(monkeypatch):
+    monkeypatch.setattr(prefork.settings, "session_cache_size", 1024)
+    configure(1)
+    assert prefork.settings.session_cache_size == 1024
+    configure(4)  # у каждого воркера свой LRU, он устаревал бы от чужих событий
+    assert prefork.settings.session_cache_size == 0
+
+
+def test_workers_share_master_pipeline(fake_nlp):
+    sock = _bind("127.0.0.1", 0)
+    master = Master(_app, sock, workers=2, threads=1, log_level="warning")
+    try:
+        pids = {master.spawn(i) for i in range(2)}
+        seen = [_get(sock.getsockname()[1]) for _ in range(6)]
+    finally:
+        master.stop()
+        sock.close()
+    assert not master.children
+    for info in seen:
+        assert info["mode"] == "prefork" and info["pid"] in pids
+        assert info["nlp_threads"] == 1
+        assert info["nlp"] == id(fake_nlp)  # объект мастера, унаследованный через fork
@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.nlp import pipeline
+from app.nlp.models import ModelStoreError, verify_store, write_manifest
+from main import app
+
+
+def test_model_store_verification(tmp_path):
+    (tmp_path / "ru" / "pos").mkdir(parents=True)
+    (tmp_path / "ru" / "pos" / "model.pt").write_bytes(b"weights")
+    (tmp_path / "resources.json").write_text("{}", encoding="utf-8")
+    write_manifest(tmp_path, "ru", "tokenize,pos,lemma", "1.10.1")
+
+    manifest = verify_store(tmp_path, "ru", "tokenize,pos", full=True)
+    assert set(manifest["files"]) == {"ru/pos/model.pt", "resources.json"}
+
+    with pytest.raises(ModelStoreError):
+        verify_store(tmp_path, "en", "tokenize")
+    with pytest.raises(ModelStoreError):
+        verify_store(tmp_path, "ru", "tokenize,ner")
+
+    (tmp_path / "ru" / "pos" / "model.pt").write_bytes(b"weightz")  # тот же размер
+    verify_store(tmp_path, "ru", "tokenize")
+    with pytest.raises(ModelStoreError, match="checksum"):
+        verify_store(tmp_path, "ru", "tokenize", full=True)
+
+    (tmp_path / "ru" / "pos" / "model.pt").unlink()
+    with pytest.raises(ModelStoreError, match="missing"):
+        verify_store(tmp_path, "ru", "tokenize")
+
+
+def test_no_download_without_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "stanza_model_dir", str(tmp_path / "empty"))
+    monkeypatch.setattr(pipeline.settings, "stanza_allow_download", False)
+    monkeypatch.setattr(pipeline, "fetch_models", lambda *a: pytest.fail("network download at startup"))
+    with pytest.raises(ModelStoreError):
+        pipeline._init_ru_pipeline()
+
+
+def test_readyz_reports_warm_pipeline(monkeypatch, fake_nlp):
+    monkeypatch.setattr(pipeline, "READINESS", pipeline.Readiness())
+    client = TestClient(app)  # без старта приложения: прогрев запускаем сами
+
+    r = client.get("/readyz")
+    assert r.status_code == 503 and r.json()["nlp"]["state"] == "cold"
+    health = client.get("/healthz").json()
+    assert not health["model_warm"] and not health["stanza_ready"]  # cold — ещё не готов
+
+    pipeline.preload_ru()
+    assert fake_nlp.calls == [[pipeline.WARMUP_TEXT]]  # прогрев — реальный вызов пайплайна
+    r = client.get("/readyz")
+    assert r.status_code == 200 and r.json()["status"] == "ready"
+    h = client.get("/healthz").json()
+    assert h["stanza_ready"] and h["model_warm"]
+
+
+def test_readyz_reports_failure(monkeypatch):
+    monkeypatch.setattr(pipeline, "READINESS", pipeline.Readiness())
+    monkeypatch.setattr(pipeline, "_NLP_RU", None)
+    monkeypatch.setattr(pipeline, "_init_ru_pipeline", lambda: (_ for _ in ()).throw(ModelStoreError("no model manifest")))
+    pipeline.preload_ru()
+    r = TestClient(app).get("/readyz")
+    assert r.status_code == 503
+    assert r.json()["nlp"]["state"] == "failed" and "no model manifest" in r.json()["nlp"]["error"]
@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+
+from app.services import mapping
+from app.services.aggregates import AGGREGATES, EMPTY, fold
+from app.services.work_queue import WORK_QUEUE
+from main import app
+
+
+def _ann(elements, entities, keyphrases):
+    return {"mappings": [{"element": e} for e in elements], "entities": entities, "keyphrases": keyphrases}
+
+
+def test_fold_dedupes_in_first_seen_order():
+    agg = fold(EMPTY, _ann(["ContactForm"], ["Форма"], ["форма обратный"]))
+    agg = fold(agg, _ann(["ServicesGrid", "ContactForm"], ["форма ", "услуга"], ["форма обратный"]))
+    agg = fold(agg, {"mappings": [], "entities": ["шум"], "keyphrases": []})  # пустое событие не считается
+    assert agg.elements == ["ContactForm", "ServicesGrid"]
+    assert agg.entities == ["форма", "услуга"]
+    assert agg.keyphrases == ["форма обратный"]
+    assert agg.chunks == 2
+    assert EMPTY.entities == []  # снимки не мутируются
+
+
+def test_fold_orders_elements_by_seq_not_arrival():
+    agg = fold(EMPTY, _ann(["Footer"], [], ["подвал"]), None)  # final обработан раньше чанков
+    agg = fold(agg, _ann(["ServicesGrid", "ContactForm"], [], ["каталог"]), 3)
+    agg = fold(agg, _ann(["ContactForm", "Hero"], [], ["форма"]), 1)  # опоздавший чанк
+    assert agg.elements == ["ContactForm", "Hero", "ServicesGrid", "Footer"]
+    in_order = EMPTY
+    for seq, ann in ((1, _ann(["ContactForm", "Hero"], [], ["форма"])),
+                     (3, _ann(["ServicesGrid", "ContactForm"], [], ["каталог"])),
+                     (None, _ann(["Footer"], [], ["подвал"]))):
+        in_order = fold(in_order, ann, seq)
+    assert in_order.elements == agg.elements
+
+
+def test_aggregate_served_without_scanning_events(monkeypatch):
+    texts = {
+        "одна форма обратной связи": _ann(["ContactForm"], ["форма"], ["форма обратный"]),
+        "ещё каталог услуг": _ann(["ServicesGrid"], ["каталог", "форма"], ["каталог услуга"]),
+    }
+    monkeypatch.setattr(mapping, "annotate_text", lambda text: texts[text])
+    with TestClient(app) as client:
+        for seq, text in enumerate(texts, 1):
+            client.post("/v2/ingest/chunk", json={
+                "session_id": "agg1", "chunk_id": f"agg1-c{seq}", "seq": seq, "text": text, "lang": "ru-RU",
+            })
+        client.portal.call(WORK_QUEUE.drain)
+
+        async def _no_rebuild(*a, **kw):
+            raise AssertionError("events rescanned on read")
+        monkeypatch.setattr(AGGREGATES, "_rebuild", _no_rebuild)
+
+        ents = client.get("/v2/session/agg1/entities").json()
+        assert ents["entities"] == ["форма", "каталог"]
+        assert ents["keyphrases"] == ["форма обратный", "каталог услуга"]
+        assert ents["chunks_processed"] == 2
+
+        # после сброса кэша — одна строка session_aggregates, не события
+        AGGREGATES.clear()
+        sections = client.get("/v2/session/agg1/layout").json()["layout"]["sections"]
+        assert [c["component"] for c in sections["main"]] == ["ServicesGrid"]
+        assert [c["component"] for c in sections["footer"]] == ["ContactForm"]
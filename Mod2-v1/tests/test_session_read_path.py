@@ -0,0 +1,31 @@
+import inspect
+
+from fastapi.testclient import TestClient
+
+from app.routers import session as session_router
+from app.services import mapping
+from app.services.store import iter_session_annotations
+from app.services.work_queue import WORK_QUEUE
+from main import app
+
+
+def test_session_routes_are_async():
+    assert inspect.iscoroutinefunction(session_router.get_session_layout)
+    assert inspect.iscoroutinefunction(session_router.get_session_entities)
+
+
+def test_annotations_streamed_in_seq_order(monkeypatch):
+    monkeypatch.setattr(mapping, "annotate_text", lambda text: {"mappings": [], "entities": [], "keyphrases": [text]})
+    with TestClient(app) as client:
+        for seq in (3, 1, 2):
+            client.post("/v2/ingest/chunk", json={
+                "session_id": "rp1", "chunk_id": f"rp1-c{seq}", "seq": seq, "text": f"часть {seq}", "lang": "ru-RU",
+            })
+        client.post("/v2/ingest/full", json={"session_id": "rp1", "text_full": "целиком", "lang": "ru-RU"})
+        client.portal.call(WORK_QUEUE.drain)
+
+        async def _collect():
+            return [(rec["seq"], rec["keyphrases"][0]) async for rec in iter_session_annotations("rp1")]
+
+        # тот же движок и цикл, что у приложения — без asyncio.run на каждый запрос
+        assert client.portal.call(_collect) == [(1, "часть 1"), (2, "часть 2"), (3, "часть 3"), (None, "целиком")]
@@ -0,0 +1,73 @@
+import os
+import time
+
+from rapidfuzz import fuzz
+
+from app.services.mapping import _default_vocab
+from app.services.vocab_index import VocabIndex, VocabIndexCache, prepare, publish_vocab
+
+
+def _linear(vocab, query, threshold):
+    """Прежний линейный проход — эталон для индекса."""
+    variants = [(t["element"], [s for s in [prepare(t["lemma"]), *map(prepare, t["aliases"])] if s]) for t in vocab["terms"]]
+    for element, strings in variants:
+        if query in strings:
+            return element, 1.0
+    best, best_el = 0.0, None
+    for element, strings in variants:
+        for s in strings:
+            score = fuzz.ratio(query, s) / 100.0
+            if score > best:
+                best, best_el = score, element
+    return (best_el, best) if best_el and best >= threshold else None
+
+
+def test_index_matches_linear_scan():
+    vocab = _default_vocab()
+    queries = ["форма", "обратный связь", "каталог услуга", "каталог услуг", "contact forms", "погода", ""]
+    got = VocabIndex(vocab).match(queries, 0.8)
+    for q, hit in zip(queries, got):
+        want = _linear(vocab, q, 0.8)
+        if want is None:
+            assert hit is None, q
+        else:
+            assert hit[0] == want[0] and abs(hit[1] - want[1]) < 1e-4, q
+
+
+def test_cache_rebuilds_only_on_change(tmp_path):
+    path = tmp_path / "vocab.json"
+    vocab = _default_vocab()
+    publish_vocab(path, vocab)
+    cache = VocabIndexCache(path, _default_vocab)
+
+    first = cache.get()
+    assert not cache.refresh() and cache.get() is first and cache.builds == 1
+
+    # touch без изменений — файл перечитан, индекс тот же
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert not cache.refresh() and cache.get() is first
+
+
+def test_published_vocab_swapped_in_by_watcher(tmp_path):
+    path = tmp_path / "vocab.json"
+    vocab = _default_vocab()
+    publish_vocab(path, vocab)
+    other = VocabIndexCache(path, _default_vocab)  # «другой воркер»
+    other.start(0.02)
+    try:
+        first = other.get()
+        vocab["vocab_version"] = "0.2.0"
+        vocab["terms"].append({"lemma": "галерея", "aliases": [], "element": "Gallery"})
+        stamp = publish_vocab(path, vocab)
+        assert stamp.startswith("0.2.0 ")
+        assert not list(tmp_path.glob(".*.tmp"))
+
+        deadline = time.time() + 5
+        while other.get() is first and time.time() < deadline:
+            time.sleep(0.01)
+        index = other.get()
+        assert index.version == "0.2.0"
+        assert index.match(["галерея"], 0.8) == [("Gallery", 1.0)]
+    finally:
+        other.stop()
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import struct
+from pathlib import Path
+
+import pytest
+
+from app.services.mapping import _default_vocab
+from app.services.vocab_index import VocabIndexCache
+from app.services.vocab_snapshot import COMP, HEADER, MAGIC, MAP, NONE, SYN, TERM, SnapshotIndex, VocabSnapshot, fnv1a
+
+# словарь Mod3 явными строками: термины (term, активен), синонимы (synonym, term),
+# компоненты (name, component_type), привязки (term, component, confidence, активна)
+TERMS = [("форма обратный связь", True), ("каталог услуга", True), ("кнопка", True), ("галерея", True),
+         ("устаревший", False), ("без привязки", True), ("button", True)]
+SYNONYMS = [("обратная связь", "форма обратный связь"), ("btn", "button"), ("gallery", "галерея")]
+COMPONENTS = [("ContactForm", "form"), ("ServicesGrid", "list"), ("ui.button", "action"), ("Gallery", "card")]
+MAPPINGS = [("форма обратный связь", "ContactForm", 0.95, True), ("каталог услуга", "ServicesGrid", 0.9, True),
+            ("кнопка", "ui.button", 0.9, True), ("галерея", "Gallery", 0.9, True),
+            ("устаревший", "ContactForm", 0.5, True), ("button", "ui.button", 0.8, True),
+            ("без привязки", "Gallery", 0.5, False)]
+
+
+def _hash_table(keys):
+    size = 8
+    while size < 2 * len(keys):
+        size *= 2
+    slots = [0] * size
+    for i, key in enumerate(keys):
+        pos = fnv1a(key) & (size - 1)
+        while slots[pos]:
+            pos = (pos + 1) & (size - 1)
+        slots[pos] = i + 1
+    return struct.pack(f"<{size}I", *slots)
+
+
+def write_snapshot(path: Path, version: str = "3.0") -> Path:
+    """Снимок в формате Mod3 (Mod3-v1/app/services/vocab_snapshot.py build_snapshot) из строк выше."""
+    strings, ids = [], {}
+
+    def sid(s):
+        if s is None:
+            return NONE
+        if s not in ids:
+            ids[s] = len(strings)
+            strings.append(s)
+        return ids[s]
+
+    term_idx = {t: i for i, (t, _) in enumerate(TERMS)}
+    comp_idx = {c: i for i, (c, _) in enumerate(COMPONENTS)}
+    active = [m for m in MAPPINGS if m[3]]
+    first_map = {}
+    for j, (t, _, _, _) in enumerate(active):
+        first_map.setdefault(term_idx[t], j)
+    sid(version)
+    sections_data = [
+        b"".join(TERM.pack(sid(t), sid(t.lower()), first_map.get(i, -1), int(on)) for i, (t, on) in enumerate(TERMS)),
+        b"".join(SYN.pack(sid(s), sid(s.lower()), term_idx[t], 0) for s, t in SYNONYMS),
+        b"".join(COMP.pack(sid(c), sid(ct), NONE, NONE) for c, ct in COMPONENTS),
+        b"".join(MAP.pack(j + 1, term_idx[t], comp_idx[c], conf) for j, (t, c, conf, _) in enumerate(active)),
+        _hash_table([t.lower().encode() for t, _ in TERMS]),
+        _hash_table([s.lower().encode() for s, _ in SYNONYMS]),
+    ]
+    encoded = [s.encode() for s in strings]
+    offsets = [0]
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+    body, sections = bytearray(), []
+    for part in [struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(encoded)] + sections_data:
+        body.extend(b"\0" * (-len(body) % 8))
+        sections.append(HEADER.size + len(body))
+        body.extend(part)
+    body.extend(b"\0" * (-len(body) % 8))
+    sections.append(HEADER.size + len(body))
+    header = HEADER.pack(MAGIC, len(strings), len(TERMS), len(SYNONYMS), len(COMPONENTS), len(active),
+                         len(sections_data[4]) // 4, len(sections_data[5]) // 4, ids[version],
+                         hashlib.sha256(body).digest(), *sections)
+    path.write_bytes(header + bytes(body))
+    return path
+
+
+def test_snapshot_lookup(tmp_path):
+    snap = VocabSnapshot(write_snapshot(tmp_path / "vocab.snap"))
+    assert snap.version == "3.0" and snap.n_terms == len(TERMS)
+    index = SnapshotIndex(snap)
+    hits = index.match(["форма обратный связь", "обратная связь", "btn", "каталог услуги", "устаревший",
+                        "без привязки", "погода"], 0.8)
+    assert hits[0] == ("ContactForm", 1.0)
+    assert hits[1] == ("ContactForm", 1.0)  # синоним
+    assert hits[2] == ("ui.button", 1.0)
+    assert hits[3][0] == "ServicesGrid" and 0.8 <= hits[3][1] < 1.0
+    assert hits[4] is None  # термин выключен
+    assert hits[5] is None  # у термина нет активной привязки
+    assert hits[6] is None
+
+
+def test_truncated_snapshot_is_rejected(tmp_path):
+    data = write_snapshot(tmp_path / "full.snap").read_bytes()
+    for size in (0, 40, HEADER.size, len(data) // 2, len(data) - 8):
+        path = tmp_path / f"cut{size}.snap"
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            VocabSnapshot(path)
+
+
+def test_cache_prefers_snapshot(tmp_path):
+    path = tmp_path / "vocab.json"
+    path.write_text(json.dumps(_default_vocab()), encoding="utf-8")
+    cache = VocabIndexCache(path, _default_vocab, snapshot_path=tmp_path / "vocab.snap")
+    assert cache.stats()["strings"] == 0
+    assert cache.get().match(["галерея"], 0.8) == [None]
+
+    (tmp_path / "vocab.snap").write_bytes(write_snapshot(tmp_path / "built.snap").read_bytes()[:-8])
+    cache.refresh()
+    assert cache.stats()["source"] != "snapshot"  # обрезанный файл не роняет чтение словаря
+
+    write_snapshot(tmp_path / "vocab.snap")
+    assert cache.refresh()
+    assert cache.stats()["source"] == "snapshot"
+    assert cache.get().match(["gallery"], 0.8) == [("Gallery", 1.0)]
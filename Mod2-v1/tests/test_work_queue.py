@@ -0,0 +1,63 @@
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db import async_session
+from app.models import IngestEvent
+from app.services import work_queue
+from app.services.work_queue import PENDING, PROCESSING, IngestWorkQueue, WORK_QUEUE
+from main import app
+
+
+async def _add(sid, seqs):
+    async with async_session() as s:
+        for seq in seqs:
+            s.add(IngestEvent(session_id=sid, kind="chunk", seq=seq, payload={"text": f"t{seq}"}))
+        await s.commit()
+
+
+async def _event(sid, seq):
+    async with async_session() as s:
+        return (await s.execute(select(IngestEvent).where(IngestEvent.session_id == sid, IngestEvent.seq == seq))).scalar_one()
+
+
+async def _claim_head(sid, now=None):
+    async with async_session() as s:
+        return await IngestWorkQueue._claim_head(s, sid, now or time.time())
+
+
+def test_session_is_claimed_by_one_process_at_a_time():
+    sid = f"wq-{uuid.uuid4().hex[:8]}"
+    with TestClient(app) as client:
+        client.portal.call(WORK_QUEUE.stop)  # очередь разбираем вручную
+        client.portal.call(_add, sid, [1, 2])
+        ev = client.portal.call(_claim_head, sid)  # захват первого процесса prefork
+        assert ev.seq == 1
+        # второй процесс выбрал сессию до того, как первый закоммитил захват seq 1: seq 2 всё равно не берётся
+        assert client.portal.call(_claim_head, sid) is None
+        assert client.portal.call(_event, sid, 2).status == PENDING
+
+        client.portal.call(IngestWorkQueue()._finish, ev, {"mappings": [], "entities": [], "keyphrases": []}, None)
+        assert client.portal.call(_claim_head, sid).seq == 2
+
+
+def test_failed_event_waits_before_retry(monkeypatch):
+    monkeypatch.setattr(work_queue.settings, "ingest_retry_backoff_sec", 30.0)
+    sid = f"wq-{uuid.uuid4().hex[:8]}"
+    with TestClient(app) as client:
+        client.portal.call(WORK_QUEUE.stop)
+        client.portal.call(_add, sid, [1, 2])
+        q = IngestWorkQueue()
+
+        ev = client.portal.call(_claim_head, sid)
+        client.portal.call(q._finish, ev, None, "poison")
+        failed = client.portal.call(_event, sid, 1)
+        assert failed.status == PENDING and failed.not_before >= time.time() + 25
+        assert client.portal.call(_claim_head, sid) is None  # ни повтора без паузы, ни seq 2 раньше seq 1
+
+        ev = client.portal.call(_claim_head, sid, time.time() + 31)
+        assert (ev.seq, ev.attempts, ev.status) == (1, 2, PENDING)  # status — как был прочитан до захвата
+        assert client.portal.call(_event, sid, 1).status == PROCESSING
+        assert work_queue.retry_delay(2) == 60.0
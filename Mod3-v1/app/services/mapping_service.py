@@ -1,16 +1,19 @@
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 from app.models import Term, Synonym, Component, Mapping
+from app.services.vocab_snapshot import SNAPSHOT, VocabSnapshot
 from config.settings import settings
 import re
 
 
 class MappingService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, snapshot: Optional[VocabSnapshot] = None):
         self.db = db
         self.fuzzy_threshold = settings.fuzzy_threshold
         self.max_matches = settings.max_matches
+        # общий mmap-снимок словаря; без него — запросы к БД на каждый термин
+        self.snapshot = snapshot if snapshot is not None else SNAPSHOT.get()
     
     def find_matches(self, entities: List[str], keyphrases: List[str]) -> List[Dict[str, Any]]:
         """
@@ -21,23 +24,28 @@ class MappingService:
         # Объединяем все входные данные
         all_terms = entities + keyphrases
         
+        if self.snapshot is not None:
+            find_exact, find_synonym, find_fuzzy = self._snap_exact, self._snap_synonym, self._snap_fuzzy
+        else:
+            find_exact, find_synonym, find_fuzzy = self._find_exact_match, self._find_synonym_match, self._find_fuzzy_match
+        
         for term in all_terms:
             term_lower = term.lower().strip()
             
             # 1. Точное совпадение
-            exact_match = self._find_exact_match(term_lower)
+            exact_match = find_exact(term_lower)
             if exact_match:
                 matches.append(exact_match)
                 continue
             
             # 2. Поиск по синонимам
-            synonym_match = self._find_synonym_match(term_lower)
+            synonym_match = find_synonym(term_lower)
             if synonym_match:
                 matches.append(synonym_match)
                 continue
             
             # 3. Fuzzy matching
-            fuzzy_match = self._find_fuzzy_match(term_lower)
+            fuzzy_match = find_fuzzy(term_lower)
             if fuzzy_match:
                 matches.append(fuzzy_match)
         
@@ -151,6 +159,60 @@ class MappingService:
         
         return best_match
     
+    # --- те же шаги по mmap-снимку (app.services.vocab_snapshot) ---
+    
+    def _snap_match(self, term_i: int, match_type: str, factors: tuple, score: float) -> Optional[Dict[str, Any]]:
+        snap = self.snapshot
+        raw, _, map_i, _ = snap.term(term_i)
+        if map_i < 0:
+            return None
+        rule_id, _, comp_i, confidence = snap.mapping(map_i)
+        name, component_type, _, _ = snap.component(comp_i)
+        for f in factors:  # тот же порядок умножений, что и в ветке с БД
+            confidence *= f
+        return {
+            'term': snap.string(raw),
+            'component': snap.string(name),
+            'component_type': snap.string(component_type),
+            'confidence': confidence,
+            'match_type': match_type,
+            'rule_id': rule_id,
+            'score': score
+        }
+    
+    def _snap_exact(self, term: str) -> Optional[Dict[str, Any]]:
+        snap = self.snapshot
+        for i in snap.find_terms(term):
+            raw, _, _, flags = snap.term(i)
+            if flags & 1 and snap.string(raw) == term:
+                return self._snap_match(i, 'exact', (), 1.0)
+        return None
+    
+    def _snap_synonym(self, term: str) -> Optional[Dict[str, Any]]:
+        snap = self.snapshot
+        for i in snap.find_synonyms(term):
+            raw, _, term_i, _ = snap.synonym(i)
+            if snap.string(raw) != term:
+                continue
+            # как и в запросе к БД, решает первый найденный синоним
+            if not snap.term(term_i)[3] & 1:
+                return None
+            return self._snap_match(term_i, 'synonym', (0.9,), 0.9)
+        return None
+    
+    def _snap_fuzzy(self, term: str) -> Optional[Dict[str, Any]]:
+        choices, refs = self.snapshot.fuzzy_choices()
+        best = process.extractOne(term, choices, scorer=fuzz.ratio, processor=None,
+                                  score_cutoff=self.fuzzy_threshold * 100.0)
+        if best is None:
+            return None
+        _, score, pos = best
+        score /= 100.0
+        kind, i = refs[pos]
+        if kind == 0:
+            return self._snap_match(i, 'fuzzy', (score, 0.8), score)
+        return self._snap_match(self.snapshot.synonym(i)[2], 'fuzzy_synonym', (score, 0.7), score)
+    
     def _deduplicate_matches(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Удаляет дубликаты по компонентам, оставляя лучший match"""
         seen_components = {}
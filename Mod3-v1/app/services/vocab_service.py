@@ -1,6 +1,9 @@
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
+from pathlib import Path
 from app.models import Term, Synonym, Component, Mapping
+from app.services.vocab_snapshot import SNAPSHOT, export_snapshot
+from config.settings import settings
 
 
 class VocabService:
@@ -48,6 +51,7 @@ class VocabService:
                 self._sync_term(term_data)
             
             self.db.commit()
+            self._publish_snapshot(vocab_data.get("vocab_version") or "1.0.0")
             
             return {
                 "status": "success",
@@ -62,6 +66,13 @@ class VocabService:
                 "message": str(e)
             }
     
+    def _publish_snapshot(self, vocab_version: str) -> None:
+        """Пересобрать mmap-снимок словаря; воркеры подхватят его при следующей проверке файла."""
+        if not settings.vocab_snapshot_path:
+            return
+        export_snapshot(self.db, Path(settings.vocab_snapshot_path), vocab_version)
+        SNAPSHOT.reset()
+    
     def _sync_term(self, term_data: Dict[str, Any]):
         """Синхронизирует один термин"""
         term_name = term_data.get("term")
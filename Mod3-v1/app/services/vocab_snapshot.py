@@ -0,0 +1,305 @@
+"""
+Бинарный снимок словаря (terms / synonyms / components / mappings) для всех воркеров.
+
+Снимок экспортируется из БД одним процессом (старт, /v1/vocab/sync, scripts/export_vocab_snapshot.py)
+и атомарно подменяется; воркеры Mod3 и Mod2 открывают его через mmap только на чтение —
+страницы общие для всех процессов, точный поиск идёт по хэш-таблицам прямо в файле,
+без ORM-объектов и запросов к SQLite на каждый термин.
+
+Формат (little-endian, секции выровнены по 8 байт):
+  заголовок   MAGIC, счётчики, индекс строки vocab_version, sha256 тела, смещения секций
+  strings     u32 offsets[n+1] + UTF-8 blob (строки без дублей)
+  terms       <IIiI  term, нормализованный term, первая активная mapping (-1 — нет), флаги (1 — активен)
+  synonyms    <IIII  synonym, нормализованный synonym, индекс term, 0
+  components  <IIII  name, component_type, нормализованное имя (ui.*), category (NONE — нет)
+  mappings    <IIId  id правила, индекс term, индекс component, confidence (только активные)
+  term_hash / syn_hash  u32 слоты (индекс записи + 1, 0 — пусто), ключ — нормализованная строка,
+                        FNV-1a 32, линейное пробирование
+"""
+from __future__ import annotations
+import hashlib
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import Term, Synonym, Component, Mapping
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"M3VOCAB1"
+NONE = 0xFFFFFFFF
+HEADER = struct.Struct("<8sIIIIIIII32s8Q")
+TERM = struct.Struct("<IIiI")
+SYN = struct.Struct("<IIII")
+COMP = struct.Struct("<IIII")
+MAP = struct.Struct("<IIId")
+SLOT = struct.Struct("<I")
+
+
+def normalize(s: str) -> str:
+    return s.lower().strip()
+
+
+def ui_name(name: str) -> str:
+    """Имя компонента в формате ui.* (как MappingService.normalize_component_name)."""
+    if name.startswith("ui."):
+        return name
+    return "ui." + re.sub("([A-Z]+)", r"_\1", name).lower().strip("_")
+
+
+def fnv1a(data: bytes) -> int:
+    h = 0x811C9DC5
+    for b in data:
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def _pad(buf: bytearray) -> int:
+    buf.extend(b"\0" * (-len(buf) % 8))
+    return len(buf)
+
+
+def _hash_table(keys: List[bytes]) -> bytes:
+    size = 8
+    while size < 2 * len(keys):
+        size *= 2
+    slots = [0] * size
+    for i, key in enumerate(keys):
+        pos = fnv1a(key) & (size - 1)
+        while slots[pos]:
+            pos = (pos + 1) & (size - 1)
+        slots[pos] = i + 1
+    return struct.pack(f"<{size}I", *slots)
+
+
+# --- экспорт ---
+
+def build_snapshot(db: Session, vocab_version: str = "1.0.0") -> bytes:
+    strings: List[str] = []
+    ids: Dict[str, int] = {}
+
+    def sid(s: Optional[str]) -> int:
+        if s is None:
+            return NONE
+        if s not in ids:
+            ids[s] = len(strings)
+            strings.append(s)
+        return ids[s]
+
+    terms = db.query(Term).order_by(Term.id).all()
+    components = db.query(Component).order_by(Component.id).all()
+    mappings = db.query(Mapping).filter(Mapping.is_active == True).order_by(Mapping.id).all()  # noqa: E712
+    synonyms = db.query(Synonym).order_by(Synonym.id).all()
+
+    term_idx = {t.id: i for i, t in enumerate(terms)}
+    comp_idx = {c.id: i for i, c in enumerate(components)}
+    mappings = [m for m in mappings if m.term_id in term_idx and m.component_id in comp_idx]
+    first_map: Dict[int, int] = {}
+    for j, m in enumerate(mappings):
+        first_map.setdefault(term_idx[m.term_id], j)
+    synonyms = [s for s in synonyms if s.term_id in term_idx]
+
+    sid(vocab_version)
+    term_recs = b"".join(
+        TERM.pack(sid(t.term), sid(normalize(t.term)), first_map.get(i, -1), 1 if t.is_active else 0)
+        for i, t in enumerate(terms)
+    )
+    syn_recs = b"".join(SYN.pack(sid(s.synonym), sid(normalize(s.synonym)), term_idx[s.term_id], 0) for s in synonyms)
+    comp_recs = b"".join(COMP.pack(sid(c.name), sid(c.component_type), sid(ui_name(c.name)), sid(c.category)) for c in components)
+    map_recs = b"".join(MAP.pack(m.id, term_idx[m.term_id], comp_idx[m.component_id], float(m.confidence or 0.0)) for m in mappings)
+
+    term_hash = _hash_table([normalize(t.term).encode("utf-8") for t in terms])
+    syn_hash = _hash_table([normalize(s.synonym).encode("utf-8") for s in synonyms])
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+
+    body = bytearray()
+    sections: List[int] = []
+    for part in (struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(encoded),
+                 term_recs, syn_recs, comp_recs, map_recs, term_hash, syn_hash):
+        sections.append(HEADER.size + _pad(body))
+        body.extend(part)
+    _pad(body)
+    sections.append(HEADER.size + len(body))  # конец файла
+
+    header = HEADER.pack(
+        MAGIC, len(strings), len(terms), len(synonyms), len(components), len(mappings),
+        len(term_hash) // 4, len(syn_hash) // 4, ids[vocab_version], hashlib.sha256(body).digest(), *sections,
+    )
+    return header + bytes(body)
+
+
+def export_snapshot(db: Session, path: Path, vocab_version: str = "1.0.0") -> Path:
+    """Записать снимок атомарно: открытые mmap старого файла остаются валидны до перезагрузки воркеров."""
+    data = build_snapshot(db, vocab_version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+# --- чтение ---
+
+class VocabSnapshot:
+    """Снимок, открытый через mmap: записи читаются struct.unpack_from прямо из общих страниц."""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mv = memoryview(self._mm)
+        if len(mv) < HEADER.size:
+            raise ValueError(f"{path}: truncated vocabulary snapshot")
+        (magic, self.n_strings, self.n_terms, self.n_synonyms, self.n_components, self.n_mappings,
+         self._term_slots, self._syn_slots, version_idx, digest, *sections) = HEADER.unpack_from(mv, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a vocabulary snapshot")
+        self.digest = digest.hex()
+        self._mv = mv
+        s_str, self._terms, self._syns, self._comps, self._maps, self._th, self._sh, _ = sections
+        self._check_sections(path, sections)
+        self._offsets = mv[s_str:s_str + 4 * (self.n_strings + 1)].cast("I")
+        self._blob = s_str + 4 * (self.n_strings + 1)
+        if self._offsets[-1] > self._terms - self._blob:
+            raise ValueError(f"{path}: corrupted vocabulary snapshot (strings)")
+        if version_idx != NONE and version_idx >= self.n_strings:
+            raise ValueError(f"{path}: corrupted vocabulary snapshot (version)")
+        self.version = self.string(version_idx)
+
+    def _check_sections(self, path: Path, sections: List[int]) -> None:
+        """Секции лежат по порядку внутри файла и вмещают свои записи: обрезанный файл — ValueError, а не struct.error."""
+        need = [4 * (self.n_strings + 1), TERM.size * self.n_terms, SYN.size * self.n_synonyms,
+                COMP.size * self.n_components, MAP.size * self.n_mappings, 4 * self._term_slots, 4 * self._syn_slots]
+        if sections[-1] != len(self._mv) or sections[0] < HEADER.size:
+            raise ValueError(f"{path}: truncated vocabulary snapshot")
+        for start, size, end in zip(sections, need, sections[1:]):
+            if start + size > end:
+                raise ValueError(f"{path}: corrupted vocabulary snapshot (section at {start})")
+        for slots in (self._term_slots, self._syn_slots):
+            if slots < 1 or slots & (slots - 1):
+                raise ValueError(f"{path}: corrupted vocabulary snapshot (hash table)")
+        self._choices: Optional[Tuple[List[str], List[Tuple[int, int]]]] = None
+
+    def string(self, i: int) -> Optional[str]:
+        if i == NONE:
+            return None
+        return bytes(self._mv[self._blob + self._offsets[i]:self._blob + self._offsets[i + 1]]).decode("utf-8")
+
+    def _string_eq(self, i: int, key: bytes) -> bool:
+        lo, hi = self._offsets[i], self._offsets[i + 1]
+        return hi - lo == len(key) and self._mv[self._blob + lo:self._blob + hi] == key
+
+    def term(self, i: int) -> Tuple[int, int, int, int]:
+        return TERM.unpack_from(self._mv, self._terms + i * TERM.size)
+
+    def synonym(self, i: int) -> Tuple[int, int, int, int]:
+        return SYN.unpack_from(self._mv, self._syns + i * SYN.size)
+
+    def component(self, i: int) -> Tuple[int, int, int, int]:
+        return COMP.unpack_from(self._mv, self._comps + i * COMP.size)
+
+    def mapping(self, i: int) -> Tuple[int, int, int, float]:
+        return MAP.unpack_from(self._mv, self._maps + i * MAP.size)
+
+    def _probe(self, table: int, slots: int, norm_field: int, record, key: str) -> Iterator[int]:
+        """Индексы записей с нормализованной строкой key, в порядке записей."""
+        raw = key.encode("utf-8")
+        pos = fnv1a(raw) & (slots - 1)
+        while True:
+            (slot,) = SLOT.unpack_from(self._mv, table + pos * 4)
+            if not slot:
+                return
+            rec = record(slot - 1)
+            if self._string_eq(rec[norm_field], raw):
+                yield slot - 1
+            pos = (pos + 1) & (slots - 1)
+
+    def find_terms(self, norm: str) -> Iterator[int]:
+        return self._probe(self._th, self._term_slots, 1, self.term, norm)
+
+    def find_synonyms(self, norm: str) -> Iterator[int]:
+        return self._probe(self._sh, self._syn_slots, 1, self.synonym, norm)
+
+    def fuzzy_choices(self) -> Tuple[List[str], List[Tuple[int, int]]]:
+        """
+        Нормализованные строки для fuzzy-поиска: активные термины с маппингом, затем их синонимы.
+        Декодируются один раз на процесс (rapidfuzz нужен список str); (0, term) / (1, synonym).
+        """
+        if self._choices is None:
+            choices: List[str] = []
+            refs: List[Tuple[int, int]] = []
+            for i in range(self.n_terms):
+                _, norm, first_map, flags = self.term(i)
+                if flags & 1 and first_map >= 0:
+                    choices.append(self.string(norm))
+                    refs.append((0, i))
+            for i in range(self.n_synonyms):
+                _, norm, t, _ = self.synonym(i)
+                _, _, first_map, flags = self.term(t)
+                if flags & 1 and first_map >= 0:
+                    choices.append(self.string(norm))
+                    refs.append((1, i))
+            self._choices = (choices, refs)
+        return self._choices
+
+
+class SnapshotHolder:
+    """Текущий снимок процесса; файл переоткрывается при смене inode/mtime (проверка не чаще check_sec)."""
+
+    def __init__(self, path: Optional[Path], check_sec: float = 1.0) -> None:
+        self.path = path
+        self.check_sec = check_sec
+        self._snap: Optional[VocabSnapshot] = None
+        self._sig: Optional[Tuple[int, int, int]] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[VocabSnapshot]:
+        if self.path is None:
+            return None
+        now = time.monotonic()
+        if now - self._checked < self.check_sec:
+            return self._snap
+        with self._lock:
+            self._checked = now
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                self._snap, self._sig = None, None
+                return None
+            sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if sig != self._sig:
+                # старый mmap закроется, когда его отпустят запросы в полёте
+                try:
+                    self._snap = VocabSnapshot(self.path)
+                except (OSError, ValueError) as e:
+                    # битый или недописанный файл — словарь из БД до следующей подмены файла
+                    logger.warning("vocabulary snapshot ignored: %s", e)
+                    self._snap = None
+                self._sig = sig
+            return self._snap
+
+    def reset(self) -> None:
+        with self._lock:
+            self._checked = 0.0
+
+
+SNAPSHOT = SnapshotHolder(
+    Path(settings.vocab_snapshot_path) if settings.vocab_snapshot_path else None,
+    settings.vocab_snapshot_check_sec,
+)
@@ -17,6 +17,10 @@ class Settings(BaseSettings):
     max_components_per_section: int = 5
     max_matches: int = 6
     
+    # Бинарный снимок словаря (mmap во всех воркерах); пусто — читать словарь из БД
+    vocab_snapshot_path: str = "./vocab.snap"
+    vocab_snapshot_check_sec: float = 1.0
+    
     # Feature flags
     names_normalize: bool = True
     fallback_sections: bool = True
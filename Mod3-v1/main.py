@@ -31,6 +31,16 @@ async def startup_event():
     """Инициализация при запуске"""
     # Инициализируем базу данных
     init_db()
+    # Снимок словаря для mmap во всех воркерах (атомарная подмена — параллельный старт безопасен)
+    if settings.vocab_snapshot_path:
+        from pathlib import Path
+        from app.database import SessionLocal
+        from app.services.vocab_snapshot import export_snapshot
+        db = SessionLocal()
+        try:
+            export_snapshot(db, Path(settings.vocab_snapshot_path))
+        finally:
+            db.close()
 
 
 @app.get("/")
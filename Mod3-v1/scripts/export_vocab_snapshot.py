@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Экспорт бинарного снимка словаря (terms/synonyms/components/mappings) для mmap в воркерах Mod3 и Mod2.
+
+    python scripts/export_vocab_snapshot.py [path] [vocab_version]
+"""
+
+import sys
+import os
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.vocab_snapshot import export_snapshot, VocabSnapshot
+from config.settings import settings
+
+
+def main():
+    path = Path(sys.argv[1] if len(sys.argv) > 1 else settings.vocab_snapshot_path or "./vocab.snap")
+    version = sys.argv[2] if len(sys.argv) > 2 else "1.0.0"
+    db = SessionLocal()
+    try:
+        export_snapshot(db, path, version)
+    finally:
+        db.close()
+    snap = VocabSnapshot(path)
+    print(f"Exported {path}: {snap.n_terms} terms, {snap.n_synonyms} synonyms, "
+          f"{snap.n_components} components, {snap.n_mappings} mappings, {os.path.getsize(path)} bytes")
+
+
+if __name__ == "__main__":
+    main()
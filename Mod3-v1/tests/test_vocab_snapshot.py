@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Component, Mapping, Synonym, Term
+from app.services import mapping_service
+from app.services.mapping_service import MappingService
+from app.services.vocab_snapshot import HEADER, VocabSnapshot, export_snapshot
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    s = sessionmaker(bind=engine)()
+    form = Component(name="ContactForm", component_type="form", category="contact")
+    grid = Component(name="ServicesGrid", component_type="list", category="list")
+    button = Component(name="ui.button", component_type="action")
+    terms = {
+        name: Term(term=name, is_active=active)
+        for name, active in (("форма", True), ("каталог услуг", True), ("кнопка", True),
+                             ("устаревший", False), ("без привязки", True))
+    }
+    s.add_all([form, grid, button, *terms.values()])
+    s.flush()
+    s.add_all([
+        Mapping(term_id=terms["форма"].id, component_id=form.id, confidence=0.95),
+        Mapping(term_id=terms["каталог услуг"].id, component_id=grid.id, confidence=0.9),
+        Mapping(term_id=terms["кнопка"].id, component_id=button.id, confidence=0.8),
+        Mapping(term_id=terms["устаревший"].id, component_id=form.id, confidence=0.5),
+        Mapping(term_id=terms["без привязки"].id, component_id=grid.id, confidence=0.5, is_active=False),
+        Synonym(term_id=terms["форма"].id, synonym="обратная связь"),
+        Synonym(term_id=terms["кнопка"].id, synonym="btn"),
+        Synonym(term_id=terms["устаревший"].id, synonym="старьё"),
+    ])
+    s.commit()
+    yield s
+    s.close()
+
+
+QUERIES = {
+    "exact": ["форма", "каталог услуг", "кнопка"],
+    "synonym": ["обратная связь", "btn"],
+    "fuzzy": ["каталог услуги", "кнопкa", "обратная связъ", "формы"],
+    "none": ["устаревший", "старьё", "без привязки", "погода", ""],  # выключенный термин, его синоним, нет привязки
+}
+
+
+@pytest.mark.parametrize("kind", sorted(QUERIES))
+def test_snapshot_matches_db(db, tmp_path, monkeypatch, kind):
+    monkeypatch.setattr(mapping_service.SNAPSHOT, "path", None)  # ветка с запросами к БД
+    snap = VocabSnapshot(export_snapshot(db, tmp_path / "vocab.snap", "2.0"))
+    for q in QUERIES[kind]:
+        from_db = MappingService(db).find_matches([q], [])
+        from_snap = MappingService(db, snapshot=snap).find_matches([q], [])
+        assert from_snap == from_db, q
+        if kind == "none":
+            assert from_db == []
+        else:
+            assert from_db and from_db[0]["match_type"].startswith(kind), q
+
+
+def test_broken_snapshot_falls_back_to_db(db, tmp_path, monkeypatch):
+    path = export_snapshot(db, tmp_path / "vocab.snap")
+    path.write_bytes(path.read_bytes()[:HEADER.size + 16])
+    with pytest.raises(ValueError):
+        VocabSnapshot(path)
+    monkeypatch.setattr(mapping_service.SNAPSHOT, "path", Path(path))
+    mapping_service.SNAPSHOT.reset()
+    svc = MappingService(db)
+    assert svc.snapshot is None
+    assert svc.find_matches(["форма"], [])[0]["component"] == "ContactForm"